@@ -0,0 +1,179 @@
+# app/agent/document_chunker.py
+
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Set
+
+from app.agent.extraction_state import DocumentStructured, DocumentStructuredContent, PersonValidationDetails
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Lines inspected at the top of a page when looking for a document header
+HEADER_LINES = 20
+
+DATE_PATTERN = re.compile(
+    r"\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b"
+    r"|\b\d{1,2}\s+de\s+[a-záéíóú]+\s+(?:de|del)\s+\d{4}\b",
+    re.IGNORECASE,
+)
+TITLE_PATTERN = re.compile(r"\b(CONSTANCIA|CERTIFICADO)\b", re.IGNORECASE)
+TABLE_HEADER_PATTERN = re.compile(r"^\|.*\|\s*\n\|[\s:|-]+\|\s*$", re.MULTILINE)
+# The number must contain a digit, or words like "SALUD" or "VIGENTE" would pass for one
+POLICY_PATTERN = re.compile(
+    r"p[óo]liza[^:\n]{0,30}?(?:n[°º.o]*|nro\.?|n[uú]mero)?\s*:?\s*((?=[A-Z\-/]*\d)[A-Z0-9][A-Z0-9\-/]{4,})",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class DocumentChunk:
+    """A run of consecutive OCR pages sent to the LLM as one unit"""
+    pages: List[int] = field(default_factory=list)
+    texts: List[str] = field(default_factory=list)
+    policies: Set[str] = field(default_factory=set)
+    # True when the chunk does not start with a document header (e.g. a table split by size)
+    continuation: bool = False
+    # Table header carried over from the previous chunk so continued rows keep their columns
+    context: str = ""
+
+    @property
+    def text(self) -> str:
+        return "\n\n".join([self.context, *self.texts] if self.context else self.texts)
+
+    @property
+    def size(self) -> int:
+        return sum(len(text) for text in self.texts)
+
+
+def _page_head(page: str) -> str:
+    return "\n".join(page.strip().splitlines()[:HEADER_LINES])
+
+
+def starts_new_document(page: str, current: Optional[DocumentChunk]) -> bool:
+    """
+    A page opens a new document when its header has a date together with a
+    CONSTANCIA/CERTIFICADO title, or when it names a policy number the current
+    chunk has not seen yet.
+    """
+    head = _page_head(page)
+    if TITLE_PATTERN.search(head) and DATE_PATTERN.search(head):
+        return True
+    policies = {match.upper() for match in POLICY_PATTERN.findall(head)}
+    return bool(current and current.policies and policies - current.policies)
+
+
+def _last_table_header(chunk: DocumentChunk) -> str:
+    for text in reversed(chunk.texts):
+        headers = TABLE_HEADER_PATTERN.findall(text)
+        if headers:
+            return headers[-1]
+    return ""
+
+
+def split_into_chunks(pages: List[str], max_chars: int) -> List[DocumentChunk]:
+    """
+    Group OCR pages into chunks at document boundaries.
+    A document longer than `max_chars` is split at page boundaries; the following
+    chunks are flagged as continuations so their tables can be stitched back.
+    """
+    chunks: List[DocumentChunk] = []
+    current: Optional[DocumentChunk] = None
+
+    for index, page in enumerate(pages):
+        if not page.strip():
+            continue
+        boundary = starts_new_document(page, current)
+        if current is None or boundary or current.size + len(page) > max_chars:
+            continuation = current is not None and not boundary
+            context = (_last_table_header(current) or current.context) if continuation else ""
+            current = DocumentChunk(continuation=continuation, context=context)
+            chunks.append(current)
+        current.pages.append(index)
+        current.texts.append(page)
+        current.policies.update(match.upper() for match in POLICY_PATTERN.findall(page))
+
+    logger.info(f"Split {len(pages)} pages into {len(chunks)} segmentation chunks")
+    return chunks
+
+
+def split_oversized(chunk: DocumentChunk, max_chars: int) -> List[DocumentChunk]:
+    """
+    Split a chunk at line boundaries into pieces of at most `max_chars` (lines longer
+    than that are cut). The first piece keeps the chunk's flags; the rest are
+    continuations carrying the last table header seen, like chunks split at pages.
+    """
+    max_chars = max(max_chars, 1)
+    pieces: List[DocumentChunk] = []
+    current = DocumentChunk(continuation=chunk.continuation, context=chunk.context)
+    lines: List[str] = []
+    # Characters in the current piece, pages already closed included
+    size = 0
+
+    def _close_page(page: int) -> None:
+        if lines:
+            current.pages.append(page)
+            current.texts.append("\n".join(lines))
+            current.policies.update(match.upper() for match in POLICY_PATTERN.findall(current.texts[-1]))
+
+    for page, text in zip(chunk.pages, chunk.texts):
+        lines = []
+        for line in text.splitlines():
+            parts = [line[start:start + max_chars] for start in range(0, len(line), max_chars)] or [""]
+            for part in parts:
+                added = len(part) + (1 if lines else 0)
+                if size + added > max_chars and (lines or current.texts):
+                    _close_page(page)
+                    pieces.append(current)
+                    # A piece without a header of its own passes on the one it carried
+                    context = _last_table_header(current) or current.context
+                    current = DocumentChunk(continuation=True, context=context)
+                    lines, size = [], 0
+                    added = len(part)
+                lines.append(part)
+                size += added
+        _close_page(page)
+    if current.texts:
+        pieces.append(current)
+    return pieces
+
+
+def _person_key(person: PersonValidationDetails) -> tuple:
+    return (
+        (person.get("document_number") or "").strip(),
+        " ".join((person.get("full_name") or "").upper().split()),
+    )
+
+
+def _stitch(previous: DocumentStructured, section: DocumentStructured) -> None:
+    """Append the rows of a continued table to the section it started in"""
+    seen = {_person_key(person) for person in previous.get("person_by_policy") or []}
+    persons = list(previous.get("person_by_policy") or [])
+    for person in section.get("person_by_policy") or []:
+        if _person_key(person) not in seen:
+            seen.add(_person_key(person))
+            persons.append(person)
+    previous["person_by_policy"] = persons
+
+    for key, value in section.items():
+        if key != "person_by_policy" and value and not previous.get(key):
+            previous[key] = value
+
+
+def _continues(previous: DocumentStructured, section: DocumentStructured) -> bool:
+    policy = section.get("policy_number")
+    return not policy or policy == previous.get("policy_number")
+
+
+def merge_results(
+        chunks: List[DocumentChunk], results: List[Optional[DocumentStructuredContent]]
+) -> DocumentStructuredContent:
+    """Reduce step: concatenate the sections of every chunk, stitching continued tables"""
+    merged: List[DocumentStructured] = []
+    for chunk, result in zip(chunks, results):
+        sections = list((result or {}).get("content") or [])
+        if chunk.continuation and merged and sections and _continues(merged[-1], sections[0]):
+            _stitch(merged[-1], sections.pop(0))
+        merged.extend(sections)
+    return {"content": merged}
@@ -1,13 +1,21 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, BinaryIO, List, Optional, Tuple, Union
 from pathlib import Path
+import asyncio
+import hashlib
 import logging
 
-from fastapi import UploadFile
-from mistralai import Mistral
 from langchain_core.messages import SystemMessage, HumanMessage
 from langchain_core.output_parsers import StrOutputParser
-import os
 from dotenv import load_dotenv
+from langgraph.types import StreamWriter
+
+from app.agent.image_preprocessing import ImagePreprocessor
+from app.agent.pdf_pages import count_pdf_pages, merge_pdf_pages, split_pdf_pages
+from app.cache.ocr_cache import build_ocr_cache
+from app.config.config import get_settings
+from app.observability.progress import emit_progress
+from app.observability.spans import span
+from app.providers.ocr import OCRBackend, create_ocr_backend
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -17,86 +25,287 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 
 
+def _file_sha256(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as pdf:
+        for chunk in iter(lambda: pdf.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
 class DocumentExtractorAgent:
     """
-    Agent for extracting and processing document content using Mistral OCR.
+    Agent for extracting and processing document content with a pluggable OCR backend.
     Handles document extraction, text processing, and content structuring.
     """
 
-    def __init__(self):
-        """Initialize DocumentExtractorAgent with Mistral client"""
-        self.mistral_api_key = os.getenv("MISTRAL_API_KEY")
-        if not self.mistral_api_key:
-            raise ValueError("MISTRAL_API_KEY environment variable is required")
-
-        self.client = Mistral(api_key=self.mistral_api_key)
-        logger.info("DocumentExtractorAgent initialized with Mistral API")
+    def __init__(self, settings=None, ocr_backend: Optional[OCRBackend] = None):
+        """
+        Initialize DocumentExtractorAgent with its OCR backend.
+        Args:
+            settings: Optional application settings. If None, will load default settings.
+            ocr_backend: Optional OCR engine. If None, the one selected by `settings.ocr_backend`.
+        """
+        self.settings = settings or get_settings()
+        self.ocr_backend = ocr_backend or create_ocr_backend(self.settings)
+        # Limit the OCR round trips in flight per worker; the event loop stays free meanwhile
+        self._ocr_semaphore = asyncio.Semaphore(self.settings.ocr_max_concurrency)
+        self.ocr_cache = build_ocr_cache(self.settings)
+        self.preprocessor = None
+        if self.settings.ocr_preprocessing_enabled and self.ocr_backend.wants_preprocessing:
+            self.preprocessor = ImagePreprocessor(self.settings)
+        # Pages OCR'd from preprocessed images are cached apart from raw ones
+        self._page_cache_model = self.ocr_backend.model
+        if self.preprocessor:
+            self._page_cache_model = self._preprocessed_model
+        logger.info(f"DocumentExtractorAgent initialized with the {self.ocr_backend.name} OCR backend")
 
-    async def extract_document_content(self, state: Dict[str, Any]) -> Dict[str, Any]:
+    async def extract_document_content(
+            self, state: Dict[str, Any], writer: Optional[StreamWriter] = None
+    ) -> Dict[str, Any]:
         """
-        Main extraction function - processes PDF document using Mistral OCR and extracts content.
+        Main extraction function - processes PDF document using the OCR backend and extracts content.
 
         Args:
             state: Current state dictionary containing file_path
+            writer: LangGraph stream writer for the per-page progress events
 
         Returns:
             Updated state with extracted text and structured content
         """
         logger.info("Starting document extraction process")
-        file = state.get("file")
+        file_name = state.get("file_name")
 
-        # Extract document text using Mistral OCR
-        extracted_text = await self._process_with_mistral_ocr(file)
+        # Route each page: local text layer, cached OCR or remote OCR
+        text_layer_pages = state.get("text_layer_pages") or []
+        reocr_pages = state.get("reocr_pages") or []
+        if not text_layer_pages and reocr_pages:
+            # No text layer, but the selected pages must bypass the cache: route per page anyway
+            try:
+                total = await asyncio.to_thread(count_pdf_pages, state["file_path"])
+            except Exception as e:
+                raise ValueError(f"reocr_pages needs a PDF whose pages can be read: {str(e)}") from e
+            text_layer_pages = [None] * total
+        if text_layer_pages:
+            extracted_pages, page_sources = await self._process_pages(
+                state["file_path"], file_name, state.get("file_sha256"), text_layer_pages, reocr_pages, writer,
+            )
+        else:
+            # The PDF could not be opened locally: send it whole
+            extracted_pages = await self._process_with_ocr(
+                state["file_path"], file_name, state.get("file_sha256")
+            )
+            page_sources = ["ocr"] * len(extracted_pages)
+            for index in range(len(extracted_pages)):
+                self._page_done(writer, index, len(extracted_pages), "ocr", index + 1)
+        # Combinar texto de todas las páginas
+        extracted_text = "\n\n".join(extracted_pages)
 
         # Process extracted content to structure it
         structured_content = await self._structure_extracted_content(extracted_text)
 
-        logger.info(f"Successfully extracted and structured content from {structured_content}")
+        logger.info(
+            f"Successfully extracted and structured {file_name}: {len(extracted_pages)} pages, "
+            f"{len(extracted_text)} characters"
+        )
+        logger.debug(f"Structured content of {file_name}: {structured_content}")
 
         # Return updated state
         return {
             "extracted_text": extracted_text,
+            "extracted_pages": extracted_pages,
+            "page_sources": page_sources,
             "structured_content": structured_content,
-            "file_name": file.filename,
+            "file_name": file_name,
         }
 
-    async def _process_with_mistral_ocr(self, file: UploadFile) -> str:
-        """Process PDF document with Mistral OCR API."""
-        logger.info(f"Processing document with Mistral OCR: {file.filename}")
+    async def _process_pages(
+            self,
+            file_path: str,
+            file_name: str,
+            pdf_digest: Optional[str],
+            text_layer_pages: List[Optional[str]],
+            reocr_pages: List[int],
+            writer: Optional[StreamWriter] = None,
+    ) -> Tuple[List[str], List[str]]:
+        """
+        Page-level processing: keep the local text layer where it is usable, then
+        cached OCR, and send only the remaining pages to the OCR backend as single-page PDFs,
+        in parallel (bounded by the OCR semaphore). When every page needs OCR the
+        document goes in one request instead.
 
-        # Asegurarse de que estamos al inicio del archivo
-        await file.seek(0)
-        pdf_content = await file.read()
+        Args:
+            reocr_pages: Zero-based pages forced through remote OCR, bypassing the
+                text layer and replacing their cached result
+            writer: Stream writer for the `ocr_page` progress events
 
-        try:
-            # Subir el archivo a Mistral usando el mismo formato de la documentación
-            uploaded_pdf = self.client.files.upload(
-                file={
-                    "file_name": file.filename,
-                    "content": pdf_content,
-                },
-                purpose="ocr"
-            )
+        Returns:
+            Page markdown in page order, and the source of each page
+            ("text_layer", "ocr_cache" or "ocr")
+        """
+        pages: List[Optional[str]] = [
+            None if index in reocr_pages else text for index, text in enumerate(text_layer_pages)
+        ]
+        sources = ["text_layer" if text is not None else "ocr" for text in pages]
+        pending = [index for index, text in enumerate(pages) if text is None]
 
-            # Obtener la URL firmada para acceder al archivo
-            signed_url = self.client.files.get_signed_url(file_id=uploaded_pdf.id, expiry=1)
+        if pending and self.ocr_cache:
+            pdf_digest = pdf_digest or await asyncio.to_thread(_file_sha256, file_path)
+            for index in [index for index in pending if index not in reocr_pages]:
+                cached = await self.ocr_cache.get_page(pdf_digest, self._page_cache_model, index)
+                if cached is not None:
+                    pages[index] = cached
+                    sources[index] = "ocr_cache"
+                    pending.remove(index)
 
-            # Procesar el documento con OCR
-            from mistralai import DocumentURLChunk
+        # Local and cached pages are ready now; OCR'd pages are reported as each one finishes
+        completed = 0
+        for index, source in enumerate(sources):
+            if index not in pending:
+                completed += 1
+                self._page_done(writer, index, len(pages), source, completed)
 
-            ocr_response = self.client.ocr.process(
-                document=DocumentURLChunk(document_url=signed_url.url),
-                model="mistral-ocr-latest"
-            )
+        if pending and len(pending) == len(pages) > 1:
+            whole = await self._ocr_document_pages(file_path, file_name, pdf_digest, len(pages))
+            if whole is not None:
+                for index, markdown in enumerate(whole):
+                    pages[index] = markdown
+                    completed += 1
+                    self._page_done(writer, index, len(pages), "ocr", completed)
+                pending = []
+
+        if pending:
+            logger.info(f"Sending {len(pending)} of {len(pages)} pages of {file_name} to OCR")
+            page_pdfs, cache_model = await self._prepare_pages(file_path, pending)
 
-            # Combinar texto de todas las páginas
-            text = "\n\n".join([page.markdown for page in ocr_response.pages])
+            async def _ocr(index: int) -> str:
+                nonlocal completed
+                markdown = await self._ocr_single_page(file_name, index, page_pdfs[index], pdf_digest, cache_model)
+                completed += 1
+                self._page_done(writer, index, len(pages), "ocr", completed)
+                return markdown
 
-            logger.info(f"Successfully extracted {len(text)} characters from document")
-            return text
+            results = await asyncio.gather(*(_ocr(index) for index in pending))
+            for index, markdown in zip(pending, results):
+                pages[index] = markdown
 
+        logger.info(
+            f"Assembled {len(pages)} pages of {file_name}: "
+            + ", ".join(f"{source}={sources.count(source)}" for source in ("text_layer", "ocr_cache", "ocr"))
+        )
+        return pages, sources
+
+    @staticmethod
+    def _page_done(writer: Optional[StreamWriter], index: int, total: int, source: str, completed: int) -> None:
+        """Progress event for the streaming endpoint (no-op elsewhere)"""
+        emit_progress(writer, "ocr_page", page=index + 1, total_pages=total, source=source, completed=completed)
+
+    @property
+    def _preprocessed_model(self) -> str:
+        return f"{self.ocr_backend.model}:{self.preprocessor.options.variant}"
+
+    async def _prepare_pages(self, file_path: str, page_indexes: List[int]) -> Tuple[Dict[int, bytes], str]:
+        """
+        Single-page PDFs for OCR: cleaned page images when preprocessing is on, the original pages otherwise
+
+        Returns:
+            The page PDFs by page index, and the OCR cache model key matching what is sent
+        """
+        if self.preprocessor:
+            try:
+                with span("preprocess_pages") as fields:
+                    fields["pages"] = len(page_indexes)
+                    return await self.preprocessor.process(file_path, page_indexes), self._preprocessed_model
+            except Exception as e:
+                logger.warning(f"Page preprocessing failed, sending the original pages: {str(e)}")
+        # Raw pages are cached under the raw model key, never as preprocessed results
+        return await asyncio.to_thread(split_pdf_pages, file_path, page_indexes), self.ocr_backend.model
+
+    async def _ocr_document_pages(
+            self, file_path: str, file_name: str, pdf_digest: Optional[str], total: int
+    ) -> Optional[List[str]]:
+        """
+        OCR every page in one request (the original file, or the cleaned pages merged
+        back into one PDF when preprocessing is on) and cache each page.
+
+        Returns:
+            Page markdown in page order, or None when the backend returned a different
+            number of pages (the caller falls back to single-page requests)
+        """
+        logger.info(f"Every page of {file_name} needs OCR, sending the document whole")
+        cache_model = self.ocr_backend.model
+        if self.preprocessor:
+            page_pdfs, cache_model = await self._prepare_pages(file_path, list(range(total)))
+        if cache_model == self.ocr_backend.model:
+            with open(file_path, "rb") as pdf:
+                markdowns = await self._ocr_pages(file_name, pdf, pdf_digest)
+        else:
+            merged = await asyncio.to_thread(merge_pdf_pages, [page_pdfs[index] for index in range(total)])
+            markdowns = await self._ocr_pages(file_name, merged)
+
+        if len(markdowns) != total:
+            logger.warning(f"OCR returned {len(markdowns)} pages for the {total} of {file_name}, retrying per page")
+            return None
+        if self.ocr_cache and pdf_digest:
+            for index, markdown in enumerate(markdowns):
+                await self.ocr_cache.set_page(pdf_digest, cache_model, index, markdown)
+        return markdowns
+
+    async def _ocr_single_page(
+            self, file_name: str, index: int, page_pdf: bytes, pdf_digest: Optional[str], cache_model: str
+    ) -> str:
+        """OCR one single-page PDF and cache its markdown under the page of the original document"""
+        page_name = f"{Path(file_name).stem}-p{index + 1}.pdf"
+        markdown = (await self._ocr_pages(page_name, page_pdf))[0]
+        if self.ocr_cache and pdf_digest:
+            await self.ocr_cache.set_page(pdf_digest, cache_model, index, markdown)
+        return markdown
+
+    async def _process_with_ocr(
+            self, file_path: str, file_name: str, pdf_digest: Optional[str] = None
+    ) -> List[str]:
+        """
+        Process a whole PDF document with the OCR backend, reusing cached results for known documents.
+
+        Args:
+            file_path: Spooled PDF on local disk
+            file_name: Original file name
+            pdf_digest: SHA-256 computed while spooling (computed here if missing)
+
+        Returns:
+            Markdown of each page, in page order
+        """
+        logger.info(f"Processing document with {self.ocr_backend.name} OCR: {file_name}")
+
+        model = self.ocr_backend.model
+        if self.ocr_cache and pdf_digest is None:
+            pdf_digest = await asyncio.to_thread(_file_sha256, file_path)
+        pages = await self.ocr_cache.get_pages(pdf_digest, model) if self.ocr_cache else None
+
+        if pages is not None:
+            logger.info(f"OCR cache hit for {file_name} ({pdf_digest[:12]})")
+        else:
+            # El contenido se envía en bloques desde disco
+            with open(file_path, "rb") as pdf:
+                pages = await self._ocr_pages(file_name, pdf, pdf_digest)
+            if self.ocr_cache:
+                await self.ocr_cache.set_pages(pdf_digest, model, pages)
+
+        logger.info(f"Successfully extracted {sum(len(page) for page in pages)} characters from document")
+        return pages
+
+    async def _ocr_pages(
+            self, file_name: str, content: Union[bytes, BinaryIO], digest: Optional[str] = None
+    ) -> List[str]:
+        """Run the OCR backend and return the markdown of each page (`digest`: SHA-256 of the content, if known)."""
+        try:
+            async with self._ocr_semaphore:
+                with span("ocr_request", component=self.ocr_backend.name) as fields:
+                    pages = await self.ocr_backend.process(file_name, content, digest)
+                    fields["pages"] = len(pages)
+                return pages
         except Exception as e:
-            logger.error(f"Error in Mistral OCR processing: {str(e)}")
+            logger.error(f"Error in OCR processing ({self.ocr_backend.name}): {str(e)}")
             raise
 
     async def _structure_extracted_content(self, text: str) -> Dict[str, Any]:
@@ -2,7 +2,6 @@
 
 from typing import Dict, Any, List, Optional, TypedDict
 
-from fastapi import UploadFile
 from typing_extensions import NotRequired
 
 
@@ -38,8 +37,20 @@ class DocumentValidationDetails(TypedDict):
     person_by_policy: List[PersonValidationDetails]
     signatories: List[str]
     extracted_text: str
-    file: UploadFile
+    extracted_pages: List[str]
+    text_layer_pages: List[Optional[str]]
+    page_sources: List[str]
+    reocr_pages: List[int]
+    file_path: str
+    file_sha256: str
+    file_size: int
     person_name: str
+    user_date: str
     structured_content: str
     file_name: str
     segmented_sections: List[DocumentStructuredContent]
+    rule_confidence: float
+    prompt_stats: Dict[str, int]
+    person_match: Dict[str, Any]
+    # Set by the streaming endpoint: a client consumes the progress events
+    stream_progress: bool
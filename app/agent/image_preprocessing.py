@@ -0,0 +1,211 @@
+# app/agent/image_preprocessing.py
+
+import asyncio
+import logging
+import multiprocessing
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import fitz
+import numpy as np
+
+from app.config.config import get_settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+POINTS_PER_INCH = 72.0
+# Ink pixels are darker than this after normalization
+INK_THRESHOLD = 128
+# Skew is estimated on a copy scaled down to this width
+SKEW_ESTIMATION_WIDTH = 800
+
+# Preprocessors alive in this process, whose worker pools are shut down together
+_preprocessors: "weakref.WeakSet[ImagePreprocessor]" = weakref.WeakSet()
+
+
+@dataclass(frozen=True)
+class PreprocessingOptions:
+    render_dpi: int = 300
+    target_dpi: int = 200
+    binarization: str = "adaptive"
+    max_skew_degrees: float = 10.0
+    crop_padding: int = 12
+
+    @classmethod
+    def from_settings(cls, settings) -> "PreprocessingOptions":
+        return cls(
+            render_dpi=settings.ocr_preprocessing_render_dpi,
+            target_dpi=settings.ocr_preprocessing_target_dpi,
+            binarization=settings.ocr_preprocessing_binarization,
+            max_skew_degrees=settings.ocr_preprocessing_max_skew_degrees,
+        )
+
+    @property
+    def variant(self) -> str:
+        """Short tag of the options, used to keep OCR cache entries of different pipelines apart"""
+        return f"pre-{self.target_dpi}-{self.binarization}"
+
+
+def rasterize(page: "fitz.Page", dpi: int) -> np.ndarray:
+    """Render a PDF page to a grayscale array"""
+    pixmap = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+    return np.frombuffer(pixmap.samples, dtype=np.uint8).reshape(pixmap.height, pixmap.stride)[:, :pixmap.width]
+
+
+def _rotate(image: np.ndarray, angle: float, border: int) -> np.ndarray:
+    height, width = image.shape
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    return cv2.warpAffine(
+        image, matrix, (width, height), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT, borderValue=border
+    )
+
+
+def estimate_skew(gray: np.ndarray, max_degrees: float, width: int = SKEW_ESTIMATION_WIDTH) -> float:
+    """
+    Skew angle in degrees by projection profile: text lines are horizontal when the
+    row sums of the ink are the most uneven. Runs on a downscaled, despeckled copy.
+    """
+    scale = min(1.0, width / gray.shape[1])
+    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    ink = cv2.adaptiveThreshold(small, 1, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, 25, 15)
+    ink = cv2.morphologyEx(ink, cv2.MORPH_OPEN, np.ones((2, 2), np.uint8))
+    if np.count_nonzero(ink) < 100:
+        return 0.0
+
+    # Rotate the ink coordinates rather than the image: one bincount per candidate angle
+    ys, xs = np.nonzero(ink)
+    ys = ys.astype(np.float32) - small.shape[0] / 2
+    xs = xs.astype(np.float32) - small.shape[1] / 2
+    offset = np.hypot(*small.shape)
+
+    def score(angle: float) -> float:
+        theta = np.deg2rad(angle)
+        rows = (ys * np.cos(theta) - xs * np.sin(theta) + offset).astype(np.int32)
+        return float(np.var(np.bincount(rows)))
+
+    coarse = np.arange(-max_degrees, max_degrees + 0.5, 0.5)
+    best = max(coarse, key=score)
+    fine = np.arange(best - 0.5, best + 0.55, 0.1)
+    return float(max(fine, key=score))
+
+
+def deskew(gray: np.ndarray, max_degrees: float) -> Tuple[np.ndarray, float]:
+    angle = estimate_skew(gray, max_degrees)
+    if abs(angle) < 0.1:
+        return gray, 0.0
+    return _rotate(gray, angle, 255), angle
+
+
+def binarize(gray: np.ndarray, method: str) -> np.ndarray:
+    """Black text on white; adaptive thresholding copes with shadows and uneven lighting in photos"""
+    if method == "none":
+        return gray
+    if method == "otsu":
+        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+        return binary
+    if method == "adaptive":
+        block = max(15, (gray.shape[1] // 60) | 1)
+        return cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, block, 15)
+    raise ValueError(f"Unknown binarization method: {method}")
+
+
+def crop_to_content(image: np.ndarray, padding: int) -> np.ndarray:
+    """Drop the empty margins around the ink"""
+    ink = image < INK_THRESHOLD
+    rows = np.flatnonzero(ink.any(axis=1))
+    columns = np.flatnonzero(ink.any(axis=0))
+    if rows.size == 0 or columns.size == 0:
+        return image
+    top, bottom = max(rows[0] - padding, 0), min(rows[-1] + padding + 1, image.shape[0])
+    left, right = max(columns[0] - padding, 0), min(columns[-1] + padding + 1, image.shape[1])
+    return image[top:bottom, left:right]
+
+
+def preprocess_page(file_path: str, page_index: int, options: PreprocessingOptions) -> bytes:
+    """
+    Rasterize, deskew, binarize, crop and downscale one page.
+
+    Returns:
+        A single-page PDF holding the cleaned PNG, sized to the target DPI
+    """
+    with fitz.open(file_path) as document:
+        gray = rasterize(document[page_index], options.render_dpi)
+
+    # Low-contrast scans are stretched before thresholding
+    gray = cv2.normalize(gray, None, 0, 255, cv2.NORM_MINMAX)
+    gray, _ = deskew(gray, options.max_skew_degrees)
+
+    scale = options.target_dpi / options.render_dpi
+    if scale < 1:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    image = crop_to_content(binarize(gray, options.binarization), options.crop_padding)
+
+    # Two-level images are stored as 1-bit PNGs
+    params = [cv2.IMWRITE_PNG_COMPRESSION, 6]
+    if options.binarization != "none":
+        params += [cv2.IMWRITE_PNG_BILEVEL, 1]
+    _, png = cv2.imencode(".png", image, params)
+    height, width = image.shape
+    dpi = min(options.target_dpi, options.render_dpi)
+    with fitz.open() as output:
+        page = output.new_page(width=width * POINTS_PER_INCH / dpi, height=height * POINTS_PER_INCH / dpi)
+        page.insert_image(page.rect, stream=png.tobytes())
+        return output.tobytes(deflate=True, no_new_id=True)
+
+
+def _preprocess_worker(file_path: str, page_index: int, options: dict) -> bytes:
+    return preprocess_page(file_path, page_index, PreprocessingOptions(**options))
+
+
+class ImagePreprocessor:
+    """
+    Cleans scanned pages before they are sent to OCR.
+    The CPU-bound work runs in a process pool so it neither blocks the event loop
+    nor competes for the GIL with the request handlers.
+    """
+
+    def __init__(self, settings=None):
+        self.settings = settings or get_settings()
+        self.options = PreprocessingOptions.from_settings(self.settings)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        _preprocessors.add(self)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: the API process runs threads, forking it is not safe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.settings.ocr_preprocessing_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def process(self, file_path: str, page_indexes: List[int]) -> Dict[int, bytes]:
+        """Preprocess the given zero-based pages in parallel; returns single-page PDFs by page index"""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        options = asdict(self.options)
+        try:
+            results = await asyncio.gather(*(
+                loop.run_in_executor(executor, _preprocess_worker, file_path, index, options) for index in page_indexes
+            ))
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start a fresh pool on the next call
+            self.shutdown()
+            raise
+        return dict(zip(page_indexes, results))
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def shutdown_preprocessors() -> None:
+    """Stop the worker processes of every preprocessor (application shutdown)"""
+    for preprocessor in list(_preprocessors):
+        preprocessor.shutdown()
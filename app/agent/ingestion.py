@@ -0,0 +1,65 @@
+# app/agent/ingestion.py
+
+import hashlib
+import logging
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import UploadFile
+
+from app.observability.metrics import BYTES
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds the configured maximum size"""
+
+
+@dataclass
+class SpooledDocument:
+    """A PDF written to a local temporary file, hashed while it was copied"""
+    path: str
+    file_name: str
+    sha256: str
+    size: int
+
+    def remove(self) -> None:
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+async def spool_upload(file: UploadFile, max_bytes: int, spool_dir: Optional[str] = None) -> SpooledDocument:
+    """
+    Copy an upload to a temporary file in fixed-size chunks, computing its SHA-256
+    on the way, so the whole PDF is never held in memory.
+
+    Raises:
+        UploadTooLargeError: If the upload is larger than `max_bytes`
+    """
+    if spool_dir:
+        os.makedirs(spool_dir, exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix="upload-", suffix=".pdf", dir=spool_dir)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as spool:
+            await file.seek(0)
+            while chunk := await file.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLargeError(f"File exceeds the maximum upload size of {max_bytes} bytes")
+                digest.update(chunk)
+                spool.write(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+
+    BYTES.inc(size, stage="upload", direction="in")
+    logger.info(f"Spooled {file.filename} ({size} bytes) to {path}")
+    return SpooledDocument(path=path, file_name=file.filename, sha256=digest.hexdigest(), size=size)
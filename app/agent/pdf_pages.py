@@ -0,0 +1,33 @@
+# app/agent/pdf_pages.py
+
+from typing import Dict, List
+
+import fitz
+
+
+def split_pdf_pages(file_path: str, page_indexes: List[int]) -> Dict[int, bytes]:
+    """
+    Return a standalone single-page PDF for each requested zero-based page.
+    The output is byte-stable for the same input, so it can be used as a content key.
+    """
+    pages = {}
+    with fitz.open(file_path) as source:
+        for index in page_indexes:
+            with fitz.open() as single:
+                single.insert_pdf(source, from_page=index, to_page=index)
+                pages[index] = single.tobytes(garbage=3, deflate=True, no_new_id=True)
+    return pages
+
+
+def count_pdf_pages(file_path: str) -> int:
+    with fitz.open(file_path) as source:
+        return source.page_count
+
+
+def merge_pdf_pages(page_pdfs: List[bytes]) -> bytes:
+    """Join single-page PDFs back into one document, in the given order"""
+    with fitz.open() as merged:
+        for page_pdf in page_pdfs:
+            with fitz.open(stream=page_pdf, filetype="pdf") as page:
+                merged.insert_pdf(page)
+        return merged.tobytes(garbage=3, deflate=True, no_new_id=True)
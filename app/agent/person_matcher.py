@@ -0,0 +1,223 @@
+# app/agent/person_matcher.py
+
+import logging
+import re
+import unicodedata
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.agent.extraction_state import DocumentStructured, DocumentValidationDetails, PersonValidationDetails
+from app.config.config import get_settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DNI_PATTERN = re.compile(r"^\d{8}$")
+NON_ALNUM_PATTERN = re.compile(r"[^A-Z0-9 ]+")
+SPANISH_MONTHS = {
+    "ENERO": 1, "FEBRERO": 2, "MARZO": 3, "ABRIL": 4, "MAYO": 5, "JUNIO": 6, "JULIO": 7,
+    "AGOSTO": 8, "SETIEMBRE": 9, "SEPTIEMBRE": 9, "OCTUBRE": 10, "NOVIEMBRE": 11, "DICIEMBRE": 12,
+}
+SPANISH_DATE_PATTERN = re.compile(r"(\d{1,2})\s+DE\s+([A-Z]+)\s+(?:DE|DEL)\s+(\d{4})")
+DATE_FORMATS = ("%d/%m/%Y", "%d-%m-%Y", "%Y-%m-%d", "%d/%m/%y", "%d-%m-%y", "%d.%m.%Y")
+
+
+def fold(text: Optional[str]) -> str:
+    """Upper-case, strip accents and punctuation, and collapse whitespace"""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(char for char in text if not unicodedata.combining(char)).upper()
+    return " ".join(NON_ALNUM_PATTERN.sub(" ", text).split())
+
+
+def classify_person_input(value: str) -> Tuple[str, str]:
+    """Return ("dni", digits) for an 8-digit DNI, otherwise ("name", normalized upper-case name)"""
+    value = value.strip()
+    if DNI_PATTERN.match(value):
+        return "dni", value
+    return "name", " ".join(value.upper().split())
+
+
+def parse_date(value: Optional[str]) -> Optional[date]:
+    """Parse the date formats found in constancias (numeric or '1 de marzo de 2024')"""
+    if not value:
+        return None
+    value = value.strip()
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    match = SPANISH_DATE_PATTERN.search(fold(value))
+    if match and match.group(2) in SPANISH_MONTHS:
+        try:
+            return date(int(match.group(3)), SPANISH_MONTHS[match.group(2)], int(match.group(1)))
+        except ValueError:
+            return None
+    return None
+
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _token_trigrams(name: str) -> List[Set[str]]:
+    return [_trigrams(token) for token in fold(name).split()]
+
+
+def _dice(first: Set[str], second: Set[str]) -> float:
+    return 2 * len(first & second) / (len(first) + len(second))
+
+
+class PersonIndex:
+    """
+    Per-document index of insured persons.
+    Exact lookups by document number use a hash map; names use an inverted
+    trigram index over accent-folded name tokens, so only rows sharing trigrams
+    with the query are scored.
+
+    A name scores the average, over the query tokens, of the Dice coefficient of
+    each token with its most similar row token: token order does not matter and a
+    partial query ("JUAN PEREZ") fully matches a longer row ("PEREZ GOMEZ JUAN CARLOS").
+    """
+
+    def __init__(self):
+        self.entries: List[Tuple[int, PersonValidationDetails]] = []
+        self._by_document: Dict[str, List[int]] = defaultdict(list)
+        self._by_trigram: Dict[str, List[int]] = defaultdict(list)
+        self._tokens: List[List[Set[str]]] = []
+
+    @classmethod
+    def from_sections(cls, sections: List[DocumentStructured]) -> "PersonIndex":
+        index = cls()
+        for section_index, section in enumerate(sections):
+            for person in section.get("person_by_policy") or []:
+                index.add(section_index, person)
+        return index
+
+    def add(self, section_index: int, person: PersonValidationDetails) -> None:
+        entry_id = len(self.entries)
+        self.entries.append((section_index, person))
+
+        document_number = re.sub(r"\D", "", person.get("document_number") or "")
+        if document_number:
+            self._by_document[document_number].append(entry_id)
+
+        tokens = _token_trigrams(person.get("full_name") or "")
+        self._tokens.append(tokens)
+        for gram in set().union(*tokens):
+            self._by_trigram[gram].append(entry_id)
+
+    def find_by_document(self, document_number: str) -> List[Tuple[int, float]]:
+        return [(entry_id, 1.0) for entry_id in self._by_document.get(re.sub(r"\D", "", document_number), [])]
+
+    def _score(self, query: List[Set[str]], entry_id: int) -> float:
+        row = self._tokens[entry_id]
+        if not query or not row:
+            return 0.0
+        return round(sum(max(_dice(token, candidate) for candidate in row) for token in query) / len(query), 3)
+
+    def name_score(self, entry_id: int, name: str) -> float:
+        """Score of one entry against a name (for rows matched as they arrive)"""
+        return self._score(_token_trigrams(name), entry_id)
+
+    def find_by_name(self, name: str, min_score: float) -> List[Tuple[int, float]]:
+        query = _token_trigrams(name)
+        if not query:
+            return []
+        candidates = {entry_id for token in query for gram in token for entry_id in self._by_trigram.get(gram, ())}
+        matches = []
+        for entry_id in candidates:
+            score = self._score(query, entry_id)
+            if score >= min_score:
+                matches.append((entry_id, score))
+        return sorted(matches, key=lambda item: (-item[1], item[0]))
+
+
+def coverage_status(section: DocumentStructured, reference: date) -> Optional[bool]:
+    """True/False when the validity dates can be parsed, None otherwise"""
+    start = parse_date(section.get("start_date_validity"))
+    end = parse_date(section.get("end_date_validity"))
+    if start is None or end is None:
+        return None
+    return start <= reference <= end
+
+
+def overall_coverage(statuses: List[Optional[bool]]) -> Optional[bool]:
+    """
+    True if any coverage is valid, None if the validity dates of every match could
+    not be parsed, False otherwise (including when the person was not found)
+    """
+    if any(status is True for status in statuses):
+        return True
+    if statuses and all(status is None for status in statuses):
+        return None
+    return False
+
+
+def describe_match(
+        person: PersonValidationDetails,
+        section: DocumentStructured,
+        section_index: int,
+        score: float,
+        reference: date,
+) -> Dict[str, Any]:
+    """One entry of `match_person(...)["matches"]`"""
+    return {
+        "full_name": person.get("full_name"),
+        "document_number": person.get("document_number"),
+        "score": score,
+        "section_index": section_index,
+        "policy_number": section.get("policy_number"),
+        "insurance_company": section.get("insurance_company"),
+        "start_date_validity": section.get("start_date_validity"),
+        "end_date_validity": section.get("end_date_validity"),
+        "coverage_valid": coverage_status(section, reference),
+    }
+
+
+def match_person(
+        sections: List[DocumentStructured],
+        query: str,
+        input_type: str,
+        reference: date,
+        min_score: float,
+        index: Optional[PersonIndex] = None,
+) -> Dict[str, Any]:
+    """Find which constancias/policies cover a person and whether the coverage is valid"""
+    index = index or PersonIndex.from_sections(sections)
+    hits = index.find_by_document(query) if input_type == "dni" else index.find_by_name(query, min_score)
+
+    matches = []
+    for entry_id, score in hits:
+        section_index, person = index.entries[entry_id]
+        matches.append(describe_match(person, sections[section_index], section_index, score, reference))
+
+    return {
+        "query": query,
+        "input_type": input_type,
+        "reference_date": reference.isoformat(),
+        "found": bool(matches),
+        "coverage_valid": overall_coverage([match["coverage_valid"] for match in matches]),
+        "matches": matches,
+    }
+
+
+class PersonMatcher:
+    """Graph node that looks up the requested person in the segmented constancias"""
+
+    def __init__(self, settings=None):
+        self.settings = settings or get_settings()
+
+    async def match(self, state: DocumentValidationDetails) -> dict:
+        sections = (state.get("segmented_sections") or {}).get("content") or []
+        input_type, query = classify_person_input(state.get("person_name") or "")
+        reference = parse_date(state.get("user_date")) or date.today()
+
+        result = match_person(sections, query, input_type, reference, self.settings.person_match_min_score)
+        logger.info(
+            f"Person match for {input_type}: {len(result['matches'])} matches, "
+            f"coverage valid: {result['coverage_valid']}"
+        )
+        return {"person_match": result}
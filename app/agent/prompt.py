@@ -100,13 +100,12 @@ SEGMENTATION_PROMPT_V2 = """
     - "person_by_policy": [person_by_policy_o_null],
    """
 
+# v3 no lleva el texto del documento: las instrucciones son un prefijo fijo (cacheable por el
+# proveedor) y el documento va en el último mensaje (SEGMENTATION_DOCUMENT_MESSAGE)
 SEGMENTATION_PROMPT_V3 = """
-   Analyze the following compiled text {extracted_text} representing an entire PDF document, which was extracted page by page using an LLM. Now, perform semantic segmentation on this **compiled text** to divide it into logical, semantically distinct sections that may span **across multiple original pages**.
+   Analyze the compiled text of an entire PDF document, which was extracted page by page using an LLM. Now, perform semantic segmentation on this **compiled text** to divide it into logical, semantically distinct sections that may span **across multiple original pages**.
 
-   **Compiled Text from the Entire PDF Document (Extracted page by page):**
-   [Start Compiled Text]
-   {extracted_text}
-   [End Compiled Text]
+   **The Compiled Text from the Entire PDF Document (Extracted page by page)** is given in the last message, between the [Start Compiled Text] and [End Compiled Text] markers.
 
    Identify sections based on rules:
 
@@ -212,4 +211,18 @@ SEGMENTATION_PROMPT_V3 = """
     - "policy_number": [numeros_de_poliza_o_null],
     - "person_by_policy": [person_by_policy_o_null],
     - "signatories": [lista_de_nombres_y_cargos_de_firmantes]            
-   """
\ No newline at end of file
+   """
+SEGMENTATION_REQUEST = "Extrae los datos clave de un documento, particularmente la vigencia (fechas o periodos), empresa, póliza y retorna un lista segementada de secciones logicas"
+
+SEGMENTATION_DOCUMENT_MESSAGE = """[Start Compiled Text]
+{extracted_text}
+[End Compiled Text]
+
+""" + SEGMENTATION_REQUEST
+
+# Versiones disponibles del prompt de segmentación (Settings.segmentation_prompt_version)
+SEGMENTATION_PROMPTS = {
+    "v1": SEGMENTATION_PROMPT,
+    "v2": SEGMENTATION_PROMPT_V2,
+    "v3": SEGMENTATION_PROMPT_V3,
+}
@@ -0,0 +1,165 @@
+# app/agent/prompt_builder.py
+
+import logging
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import tiktoken
+
+from app.agent.document_chunker import starts_new_document
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Lines at each edge of a page where running headers and footers live
+EDGE_LINES = 4
+# Prose blocks shorter than this are never treated as boilerplate
+MIN_BOILERPLATE_CHARS = 120
+DIGITS = re.compile(r"\d+")
+# Used when the tokenizer files cannot be loaded (offline hosts)
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str) -> Optional["tiktoken.Encoding"]:
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            # Non-OpenAI models: close enough for budgeting
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logger.warning(f"Tokenizer for {model} unavailable, estimating tokens from characters: {str(e)}")
+        return None
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    encoding = _encoding(model)
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _normalize(line: str) -> str:
+    # "Página 2 de 5" and "Página 3 de 5" are the same footer
+    return DIGITS.sub("#", " ".join(line.lower().split()))
+
+
+def _edge_indexes(lines: List[str]) -> List[int]:
+    filled = [index for index, line in enumerate(lines) if line.strip()]
+    return filled[:EDGE_LINES] + filled[-EDGE_LINES:]
+
+
+def strip_running_headers(pages: List[str]) -> List[str]:
+    """
+    Remove header/footer lines repeated at the edges of most pages.
+    Pages that open a new document keep their header, since it carries the
+    insurer, date and certificate number that separate one constancia from the next.
+    """
+    if len(pages) < 3:
+        return pages
+
+    split = [page.splitlines() for page in pages]
+    seen = Counter()
+    for lines in split:
+        seen.update({_normalize(lines[index]) for index in _edge_indexes(lines)})
+    threshold = max(2, len(pages) // 2 + 1)
+    repeated = {line for line, count in seen.items() if count >= threshold and line and not line.startswith("|")}
+    if not repeated:
+        return pages
+
+    result = []
+    for page, lines in zip(pages, split):
+        if starts_new_document(page, None):
+            result.append(page)
+            continue
+        drop = {index for index in _edge_indexes(lines) if _normalize(lines[index]) in repeated}
+        result.append("\n".join(line for index, line in enumerate(lines) if index not in drop))
+    return result
+
+
+def dedupe_boilerplate(pages: List[str]) -> List[str]:
+    """
+    Keep only the first occurrence of long prose blocks (disclaimers, legal notes)
+    repeated across the document. Tables are never touched: two constancias can
+    legitimately list the same workers.
+    """
+    seen = set()
+    result = []
+    for page in pages:
+        blocks = []
+        for block in re.split(r"\n\s*\n", page):
+            stripped = block.strip()
+            is_prose = len(stripped) >= MIN_BOILERPLATE_CHARS and not stripped.startswith("|")
+            key = _normalize(stripped)
+            if is_prose and key in seen:
+                continue
+            if is_prose:
+                seen.add(key)
+            blocks.append(block)
+        result.append("\n\n".join(blocks))
+    return result
+
+
+@dataclass
+class CompactedText:
+    """Document text after compaction, with the token accounting of the request"""
+    pages: List[str]
+    raw_tokens: int
+    tokens: int
+    stats: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def text(self) -> str:
+        return "\n\n".join(self.pages)
+
+    @property
+    def saved_tokens(self) -> int:
+        return self.raw_tokens - self.tokens
+
+
+class PromptBuilder:
+    """
+    Prepares the document text for the segmentation prompt: drops running headers
+    and repeated boilerplate, counts tokens and checks the prompt against the budget.
+    """
+
+    def __init__(self, instructions: str, model: str, max_prompt_tokens: int):
+        """
+        Args:
+            instructions: Every fixed part of the prompt (the messages without the document text)
+            model: Model whose tokenizer is used for counting
+            max_prompt_tokens: Budget for instructions plus document text
+
+        Raises:
+            ValueError: When the instructions alone use up the budget
+        """
+        self.model = model
+        self.max_prompt_tokens = max_prompt_tokens
+        # Instructions are constant: count them once
+        self.overhead_tokens = count_tokens(instructions, model)
+        if self.text_budget <= 0:
+            raise ValueError(
+                f"segmentation_max_prompt_tokens ({max_prompt_tokens}) leaves no room for the document: "
+                f"the instructions alone take {self.overhead_tokens} tokens"
+            )
+
+    @property
+    def text_budget(self) -> int:
+        """Tokens left for the document text"""
+        return self.max_prompt_tokens - self.overhead_tokens
+
+    def compact(self, pages: List[str]) -> CompactedText:
+        raw_tokens = count_tokens("\n\n".join(pages), self.model)
+        compacted = dedupe_boilerplate(strip_running_headers(pages))
+        tokens = count_tokens("\n\n".join(compacted), self.model)
+        return CompactedText(pages=compacted, raw_tokens=raw_tokens, tokens=tokens)
+
+    def prompt_tokens(self, text_tokens: int) -> int:
+        return self.overhead_tokens + text_tokens
+
+    def fits(self, text_tokens: int) -> bool:
+        return self.prompt_tokens(text_tokens) <= self.max_prompt_tokens
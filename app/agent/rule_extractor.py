@@ -0,0 +1,251 @@
+# app/agent/rule_extractor.py
+
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Pattern, Tuple
+
+from app.agent.document_chunker import starts_new_document
+from app.agent.extraction_state import (
+    DocumentStructured,
+    DocumentValidationDetails,
+    PersonValidationDetails,
+)
+from app.config.config import get_settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DATE = r"(\d{1,2}[/-]\d{1,2}[/-]\d{4}|\d{1,2}\s+de\s+[a-záéíóú]+\s+(?:de|del)\s+\d{4})"
+
+VALIDITY_PATTERN = re.compile(
+    rf"vigencia[^\n\d]{{0,40}}{DATE}\s*(?:al|hasta|a|-|–)\s*(?:el\s+)?{DATE}", re.IGNORECASE
+)
+COMPANY_PATTERN = re.compile(
+    r"(?:contratante|empresa|raz[oó]n\s+social|asegurado|cliente)\s*:\s*\**\s*([^\n|*]+)", re.IGNORECASE
+)
+RUC_PATTERN = re.compile(r"\bRUC\s*(?:N[°º.o]*)?\s*:?\s*(\d{11})\b", re.IGNORECASE)
+GENERIC_POLICY_PATTERN = re.compile(
+    r"p[óo]liza[^:\n]{0,30}?(?:n[°º.o]*|nro\.?|n[uú]mero)\s*:?\s*([A-Z0-9][A-Z0-9\-/]{4,})", re.IGNORECASE
+)
+TABLE_ROW_PATTERN = re.compile(r"^\s*\|(.+)\|\s*$")
+TABLE_SEPARATOR_PATTERN = re.compile(r"^[\s:|-]+$")
+# A DNI in a row of a table whose header was not recognized
+DNI_CELL_PATTERN = re.compile(r"(?:^|\|)\s*\d{8}\s*(?:\||$)")
+
+# Confidence weight of each field in a document
+FIELD_WEIGHTS = {
+    "insurance_company": 0.15,
+    "policy_number": 0.25,
+    "start_date_validity": 0.15,
+    "end_date_validity": 0.15,
+    "company": 0.1,
+    "person_by_policy": 0.2,
+}
+
+
+@dataclass(frozen=True)
+class InsurerProfile:
+    """Fixed layout of the constancias issued by one insurer"""
+    name: str
+    detect: Pattern
+    policy_patterns: Tuple[Pattern, ...] = field(default_factory=tuple)
+
+
+INSURER_PROFILES: Tuple[InsurerProfile, ...] = (
+    InsurerProfile(
+        name="Rimac",
+        detect=re.compile(r"\bR[IÍ]MAC\b", re.IGNORECASE),
+        policy_patterns=(re.compile(r"\b(SCTR\s?\d{6,})\b", re.IGNORECASE),),
+    ),
+    InsurerProfile(
+        name="Mapfre",
+        detect=re.compile(r"\bMAPFRE\b", re.IGNORECASE),
+        policy_patterns=(re.compile(r"\b(MP/\d{4}/\d{5,})\b", re.IGNORECASE),),
+    ),
+    InsurerProfile(
+        name="La Positiva",
+        detect=re.compile(r"\bLA\s+POSITIVA\b", re.IGNORECASE),
+    ),
+    InsurerProfile(
+        name="Sanitas",
+        detect=re.compile(r"\bSANITAS\b", re.IGNORECASE),
+        policy_patterns=(re.compile(r"\b(POS-EPS\s*-\s*[A-Z]+\s*-\s*[A-Z]\s*-\s*\d{5,})\b", re.IGNORECASE),),
+    ),
+)
+
+# Header keywords used to map table columns to PersonValidationDetails fields
+NAME_COLUMNS = ("nombre", "apellido", "asegurado", "trabajador")
+DOCUMENT_COLUMNS = ("documento", "dni", "doc.", "c.e")
+TYPE_COLUMNS = ("tipo",)
+START_COLUMNS = ("inicio", "fecha", "alta", "ingreso")
+
+
+def _clean(value: str) -> str:
+    return " ".join(value.replace("*", "").split()).strip(" :-")
+
+
+def _first_match(patterns, text: str) -> Optional[str]:
+    for pattern in patterns:
+        match = pattern.search(text)
+        if match:
+            return _clean(match.group(1))
+    return None
+
+
+def _column_index(headers: List[str], keywords: Tuple[str, ...], exclude: Tuple[str, ...] = ()) -> List[int]:
+    return [
+        index for index, header in enumerate(headers)
+        if any(keyword in header for keyword in keywords) and not any(word in header for word in exclude)
+    ]
+
+
+def _table_columns(header_cells: List[str]) -> Optional[Dict[str, List[int]]]:
+    headers = [cell.lower() for cell in header_cells]
+    type_columns = _column_index(headers, TYPE_COLUMNS)
+    columns = {
+        "name": _column_index(headers, NAME_COLUMNS),
+        "document": [i for i in _column_index(headers, DOCUMENT_COLUMNS) if i not in type_columns],
+        "type": type_columns,
+        "start": _column_index(headers, START_COLUMNS, exclude=("nacimiento",)),
+    }
+    return columns if columns["name"] and columns["document"] else None
+
+
+def parse_person_tables(text: str) -> List[PersonValidationDetails]:
+    """
+    Parse the insured-person rows of every markdown table in `text`.
+    A table that continues on the next page without repeating its header reuses
+    the columns of the previous table when the row width matches.
+    """
+    persons, _ = parse_person_tables_with_rows(text)
+    return persons
+
+
+def parse_person_tables_with_rows(text: str) -> Tuple[List[PersonValidationDetails], int]:
+    """
+    Same as parse_person_tables, also counting the table rows that should hold a person.
+
+    Returns:
+        The parsed persons and the number of candidate rows: every non-empty row of a
+        person table (parsed or not) plus the rows of other tables that carry a DNI
+    """
+    persons: List[PersonValidationDetails] = []
+    columns: Optional[Dict[str, List[int]]] = None
+    width = 0
+    previous_cells: Optional[List[str]] = None
+    previous_counted = False
+    rows = 0
+
+    for line in text.splitlines():
+        row = TABLE_ROW_PATTERN.match(line)
+        if not row:
+            previous_cells = None
+            continue
+        cells = [cell.strip() for cell in row.group(1).split("|")]
+
+        if TABLE_SEPARATOR_PATTERN.match(row.group(1)):
+            # The row above the separator is the header
+            if previous_counted:
+                rows -= 1
+            columns = _table_columns(previous_cells or [])
+            width = len(previous_cells or [])
+            previous_counted = False
+            continue
+
+        previous_cells = cells
+        previous_counted = any(cells) and (columns is not None or bool(DNI_CELL_PATTERN.search(row.group(1))))
+        rows += previous_counted
+        if columns is None or len(cells) != width:
+            continue
+
+        document_number = _clean(cells[columns["document"][0]])
+        full_name = _clean(" ".join(cells[i] for i in columns["name"]))
+        if not document_number or not full_name or not any(char.isdigit() for char in document_number):
+            continue
+        persons.append(PersonValidationDetails(
+            full_name=full_name.upper(),
+            document_number=document_number,
+            coverage_start_date=_clean(cells[columns["start"][0]]) if columns["start"] else "",
+            type_document=_clean(cells[columns["type"][0]]) if columns["type"] else "",
+        ))
+    return persons, rows
+
+
+def split_documents(pages: List[str]) -> List[str]:
+    """Split OCR pages into the individual constancias they contain"""
+    documents: List[List[str]] = []
+    for page in pages:
+        if not page.strip():
+            continue
+        if not documents or starts_new_document(page, None):
+            documents.append([])
+        documents[-1].append(page)
+    return ["\n\n".join(document) for document in documents]
+
+
+class RuleBasedExtractor:
+    """
+    Deterministic extractor for the fixed layouts of the main insurers
+    (Rimac, Mapfre, La Positiva, Sanitas). Fills DocumentStructured sections
+    straight from the OCR text with compiled patterns and a markdown table parser,
+    and scores its confidence so the LLM segmentation only runs when needed.
+    """
+
+    def __init__(self, settings=None):
+        self.settings = settings or get_settings()
+
+    def extract_section(self, text: str) -> Tuple[DocumentStructured, float]:
+        """Extract one constancia and return it with its confidence (0..1)"""
+        profile = next((p for p in INSURER_PROFILES if p.detect.search(text)), None)
+        validity = VALIDITY_PATTERN.search(text)
+        company = COMPANY_PATTERN.search(text)
+        persons, rows = parse_person_tables_with_rows(text)
+
+        section = DocumentStructured(
+            start_date_validity=_clean(validity.group(1)) if validity else None,
+            end_date_validity=_clean(validity.group(2)) if validity else None,
+            validity=f"{_clean(validity.group(1))} al {_clean(validity.group(2))}" if validity else None,
+            policy_number=_first_match(
+                (profile.policy_patterns if profile else ()) + (GENERIC_POLICY_PATTERN,), text
+            ),
+            company=_clean(company.group(1)) if company else None,
+            insurance_company=profile.name if profile else None,
+            person_by_policy=persons,
+            signatories=[],
+        )
+
+        confidence = sum(weight for key, weight in FIELD_WEIGHTS.items() if section.get(key))
+        if not RUC_PATTERN.search(text):
+            # Every known layout prints the RUC of the insured company
+            confidence *= 0.9
+        completeness = len(persons) / rows if rows else 0.0
+        if profile is None:
+            # The rules were only written for the fixed layouts of the known insurers
+            confidence = 0.0
+        elif completeness < self.settings.rule_extraction_min_row_completeness:
+            # Field coverage says nothing about the rows the table parser skipped
+            logger.info(f"Rule-based extraction parsed {len(persons)} of {rows} person rows, leaving it to the LLM")
+            confidence = 0.0
+        return section, round(confidence, 3)
+
+    async def extract(self, state: DocumentValidationDetails) -> dict:
+        """Graph node: rule-based extraction over the OCR pages"""
+        if not self.settings.rule_extraction_enabled:
+            return {"rule_confidence": 0.0}
+
+        pages = state.get("extracted_pages") or [state["extracted_text"]]
+        results = [self.extract_section(document) for document in split_documents(pages)]
+        confidence = min((score for _, score in results), default=0.0)
+        logger.info(f"Rule-based extraction: {len(results)} sections, confidence {confidence:.2f}")
+
+        update = {"rule_confidence": confidence}
+        if confidence >= self.settings.rule_extraction_min_confidence:
+            update["segmented_sections"] = {"content": [section for section, _ in results]}
+        return update
+
+    def route(self, state: DocumentValidationDetails) -> str:
+        """Skip the LLM segmentation when the rules were confident enough"""
+        if state.get("rule_confidence", 0.0) >= self.settings.rule_extraction_min_confidence:
+            return "match_person"
+        return "structure_content"
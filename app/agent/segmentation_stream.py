@@ -0,0 +1,120 @@
+"""
+Incremental consumer of a streamed segmentation
+
+While the LLM is still writing the structured output, each insured-person row is
+added to a PersonIndex as soon as its JSON object closes, and checked against the
+requested person. A hit is reported right away as a `person_found` progress event
+(the final `person_match` still comes from the complete result). Finished
+constancias are reported as `section_parsed` events.
+
+Map-reduce segmentation streams every chunk through its own channel; rows from all
+channels share one index.
+"""
+
+import logging
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from langgraph.types import StreamWriter
+
+from app.agent.person_matcher import PersonIndex, describe_match
+from app.agent.streaming_json import JSONStreamParser, Path
+from app.observability.progress import emit_progress
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class SegmentationStream:
+    """
+    Args:
+        query: Normalized DNI or name of the requested person
+        input_type: "dni" or "name" (see classify_person_input)
+        reference: Reference date for coverage validity
+        min_score: Minimum name similarity for a name query
+        progress_every: Emit a `segmentation_progress` event every this many rows
+        writer: LangGraph stream writer the events go to
+    """
+
+    def __init__(
+            self,
+            query: str,
+            input_type: str,
+            reference: date,
+            min_score: float,
+            progress_every: int = 50,
+            writer: Optional[StreamWriter] = None,
+    ):
+        self.query = query
+        self.input_type = input_type
+        self.reference = reference
+        self.min_score = min_score
+        self.progress_every = max(progress_every, 1)
+        self.writer = writer
+        self.index = PersonIndex()
+        # Fields of each constancia seen so far, by (chunk, section index)
+        self.sections: Dict[Tuple[int, int], Dict[str, Any]] = {}
+        self.early_matches: List[Dict[str, Any]] = []
+        self._entry_sections: List[Tuple[int, int]] = []
+        self._reported: Set[str] = set()
+
+    def channel(self, chunk: int = 0) -> Callable[[str], None]:
+        """Callback for the JSON fragments of one segmentation call"""
+        parser = JSONStreamParser(lambda path, value: self._on_value(chunk, path, value))
+        return parser.feed
+
+    def _on_value(self, chunk: int, path: Path, value: Any) -> None:
+        if not path or path[0] != "content" or len(path) < 2:
+            return
+        key = (chunk, path[1])
+        if len(path) == 2 and isinstance(value, dict):
+            self.sections[key] = value
+            emit_progress(
+                self.writer,
+                "section_parsed",
+                chunk=chunk,
+                index=path[1],
+                persons=len(value.get("person_by_policy") or []),
+                section={name: field for name, field in value.items() if name != "person_by_policy"},
+            )
+        elif len(path) == 3 and isinstance(value, str):
+            self.sections.setdefault(key, {})[path[2]] = value
+        elif len(path) == 4 and path[2] == "person_by_policy" and isinstance(value, dict):
+            self._add_person(key, value)
+
+    def _add_person(self, key: Tuple[int, int], person: Dict[str, Any]) -> None:
+        entry_id = len(self.index.entries)
+        self.index.add(key[1], person)
+        self._entry_sections.append(key)
+
+        rows = len(self.index.entries)
+        if rows % self.progress_every == 0:
+            emit_progress(self.writer, "segmentation_progress", persons=rows, sections=len(self.sections))
+
+        if self.input_type == "dni":
+            hit = any(found == entry_id for found, _ in self.index.find_by_document(self.query))
+            score = 1.0
+        else:
+            score = self.index.name_score(entry_id, self.query)
+            hit = score >= self.min_score
+        if not hit:
+            return
+
+        # The section may still be incomplete: fields written after this row are missing
+        match = describe_match(person, self.sections.get(key, {}), key[1], score, self.reference)
+        identity = f"{key}|{match['document_number']}|{match['full_name']}"
+        if identity in self._reported:
+            return
+        self._reported.add(identity)
+        self.early_matches.append(match)
+        logger.info(f"Person found while streaming the segmentation (row {rows}, score {score})")
+        emit_progress(
+            self.writer,
+            "person_found",
+            query=self.query,
+            input_type=self.input_type,
+            chunk=key[0],
+            row=rows,
+            definitive=self.input_type == "dni",
+            match=match,
+        )
@@ -0,0 +1,103 @@
+"""
+Incremental JSON parsing of streamed LLM output
+
+The structured output arrives as fragments of one JSON document. JSONStreamParser
+scans each fragment once and reports every string, object or array as soon as it
+is complete, with its path from the root:
+
+    ("content", 0, "policy_number")           -> '"SCTR7039077"'
+    ("content", 0, "person_by_policy", 12)    -> '{"full_name": ..., ...}'
+    ("content", 0)                            -> the whole first constancia
+
+Numbers, booleans and null are not reported (the schemas only use strings).
+"""
+
+import json
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Tuple, Union
+
+PathItem = Union[str, int]
+Path = Tuple[PathItem, ...]
+
+
+@dataclass
+class _Frame:
+    kind: str  # "object" or "array"
+    start: int
+    key: Optional[str] = None
+    index: int = -1
+    # Objects: next string is a key; arrays: next non-blank character starts an element
+    expecting: bool = True
+
+
+class JSONStreamParser:
+    """
+    Args:
+        on_value: Called with (path, value) for each completed string, object or array
+    """
+
+    def __init__(self, on_value: Callable[[Path, Any], None]):
+        self.on_value = on_value
+        self._text = ""
+        self._position = 0
+        self._stack: List[_Frame] = []
+        self._in_string = False
+        self._escaped = False
+        self._string_start = 0
+
+    def _path(self) -> Path:
+        return tuple(frame.key if frame.kind == "object" else frame.index for frame in self._stack)
+
+    def _emit(self, path: Path, raw: str) -> None:
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            return
+        self.on_value(path, value)
+
+    def feed(self, fragment: str) -> None:
+        self._text += fragment
+        text = self._text
+        for position in range(self._position, len(text)):
+            char = text[position]
+            top = self._stack[-1] if self._stack else None
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    raw = text[self._string_start:position + 1]
+                    if top is not None and top.kind == "object" and top.expecting:
+                        top.key = json.loads(raw)
+                        top.expecting = False
+                    else:
+                        self._emit(self._path(), raw)
+                continue
+
+            if char.isspace():
+                continue
+            if top is not None and top.kind == "array" and top.expecting and char != "]":
+                top.index += 1
+                top.expecting = False
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = position
+            elif char in "{[":
+                self._stack.append(_Frame(kind="object" if char == "{" else "array", start=position))
+            elif char in "}]":
+                if not self._stack:
+                    continue
+                frame = self._stack.pop()
+                self._emit(self._path(), text[frame.start:position + 1])
+            elif char == "," and top is not None:
+                top.expecting = True
+        self._position = len(text)
+
+    @property
+    def text(self) -> str:
+        """Everything received so far"""
+        return self._text
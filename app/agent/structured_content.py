@@ -1,16 +1,30 @@
+import asyncio
+import hashlib
 import logging
-import re
+from datetime import date
+from typing import Callable, Dict, List, Optional, Tuple
 
-from langchain_core.messages import SystemMessage, HumanMessage
+from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage
+from langgraph.types import StreamWriter
 
+from app.agent.document_chunker import DocumentChunk, merge_results, split_into_chunks, split_oversized
 from app.agent.extraction_state import DocumentValidationDetails, DocumentStructuredContent
-from app.agent.prompt import SEGMENTATION_PROMPT, SEGMENTATION_PROMPT_V2, SEGMENTATION_PROMPT_V3
+from app.agent.person_matcher import classify_person_input, parse_date
+from app.agent.prompt import SEGMENTATION_DOCUMENT_MESSAGE, SEGMENTATION_PROMPTS, SEGMENTATION_REQUEST
+from app.agent.prompt_builder import CompactedText, PromptBuilder, count_tokens
+from app.agent.segmentation_stream import SegmentationStream
+from app.cache.segmentation_cache import build_segmentation_cache
 from app.config.config import get_settings
-from app.providers.llm_manager import LLMConfig, LLMManager, LLMType
+from app.providers.llm_manager import LLMConfig, get_llm_manager
+from app.providers.llm_router import LLMRouter
 
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+EMPTY_USAGE = {"llm_calls": 0, "input_tokens": 0, "cached_tokens": 0, "output_tokens": 0}
+# Below this, chunks would cut most table rows apart
+MIN_CHUNK_CHARS = 200
+
 
 class StructuredContentExtractor:
     """
@@ -30,20 +44,175 @@ class StructuredContentExtractor:
             temperature=0.0,  # Use deterministic output for compilation
             streaming=False,
         )
-        self.llm_manager = LLMManager(llm_config)
-        # Get the primary LLM for report generation
-        self.primary_llm = self.llm_manager.get_llm(LLMType.GPT_4O_MINI)
+        # Shared per process: graph rebuilds keep the model clients and their connections
+        self.llm_manager = get_llm_manager(llm_config)
+        # Calls go to the healthiest configured provider, with fallback and optional hedging
+        self.router = LLMRouter(self.llm_manager, settings=self.settings)
+        # Results are cached under the preferred provider, whichever one answered
+        self.llm_type = self.router.primary
+        # Prompt identity (version + digest of its text) is part of the cache key
+        self.prompt_version = self.settings.segmentation_prompt_version
+        self.prompt_template = SEGMENTATION_PROMPTS[self.prompt_version]
+        instructions = "".join(message.content for message in self._messages(""))
+        self.prompt_digest = hashlib.sha256(instructions.encode("utf-8")).hexdigest()
+        self.prompt_builder = PromptBuilder(
+            instructions, self.llm_type.value, self.settings.segmentation_max_prompt_tokens
+        )
+        self.segmentation_cache = build_segmentation_cache(self.settings)
+        # Bounded fan-out for map-reduce segmentation
+        self._segment_semaphore = asyncio.Semaphore(self.settings.segmentation_max_concurrency)
 
-    async def document_processor(self, state: DocumentValidationDetails) -> dict:
+    async def document_processor(
+            self, state: DocumentValidationDetails, writer: Optional[StreamWriter] = None
+    ) -> dict:
         extracted_text = state["extracted_text"]
-        structured_llm = self.primary_llm.with_structured_output(DocumentStructuredContent)
-        system_instructions = SEGMENTATION_PROMPT_V3.format(
-            extracted_text=extracted_text,
+        pages = state.get("extracted_pages") or [extracted_text]
+
+        compacted = self._compact(pages)
+        stream = self._stream_for(state, writer)
+        if self._use_map_reduce(compacted):
+            result, usage = await self._segment_map_reduce(
+                compacted.pages, self._chunk_max_chars(compacted), stream
+            )
+        else:
+            result, usage = await self._segment_cached(compacted.text, stream.channel() if stream else None)
+
+        prompt_stats = {
+            "raw_text_tokens": compacted.raw_tokens,
+            "text_tokens": compacted.tokens,
+            "saved_tokens": compacted.saved_tokens,
+            "instruction_tokens": self.prompt_builder.overhead_tokens,
+            **usage,
+        }
+        sections = (result or {}).get("content") or []
+        logger.info(
+            f"Segmented {len(sections)} sections with "
+            f"{sum(len(section.get('person_by_policy') or []) for section in sections)} persons; "
+            f"prompt tokens: {prompt_stats}"
+        )
+        return {"segmented_sections": result, "prompt_stats": prompt_stats}
+
+    def _stream_for(
+            self, state: DocumentValidationDetails, writer: Optional[StreamWriter]
+    ) -> Optional[SegmentationStream]:
+        """Row-by-row consumer of the LLM output, when segmentation is streamed"""
+        mode = self.settings.segmentation_streaming
+        # "auto" streams only for the streaming endpoint, which marks its runs in the state
+        if mode == "never" or (mode == "auto" and not state.get("stream_progress")):
+            return None
+        input_type, query = classify_person_input(state.get("person_name") or "")
+        return SegmentationStream(
+            query,
+            input_type,
+            parse_date(state.get("user_date")) or date.today(),
+            self.settings.person_match_min_score,
+            self.settings.segmentation_stream_progress_every,
+            writer,
+        )
+
+    def _compact(self, pages: list) -> CompactedText:
+        if self.settings.segmentation_compaction_enabled:
+            return self.prompt_builder.compact(pages)
+        tokens = count_tokens("\n\n".join(pages), self.llm_type.value)
+        return CompactedText(pages=pages, raw_tokens=tokens, tokens=tokens)
+
+    def _use_map_reduce(self, compacted: CompactedText) -> bool:
+        mode = self.settings.segmentation_mode
+        if mode == "auto":
+            return not self.prompt_builder.fits(compacted.tokens)
+        return mode == "map_reduce"
+
+    def _chunk_max_chars(self, compacted: CompactedText) -> int:
+        """Chunk size in characters that keeps each prompt within the token budget"""
+        max_chars = self.settings.segmentation_chunk_max_chars
+        if compacted.tokens:
+            chars_per_token = len(compacted.text) / compacted.tokens
+            max_chars = min(max_chars, int(self.prompt_builder.text_budget * chars_per_token))
+        if max_chars < MIN_CHUNK_CHARS:
+            raise ValueError(
+                f"The segmentation prompt budget leaves {self.prompt_builder.text_budget} tokens "
+                f"({max_chars} characters) per chunk; raise segmentation_max_prompt_tokens"
+            )
+        return max_chars
+
+    def _fit_to_budget(self, chunk: DocumentChunk, max_chars: int) -> List[DocumentChunk]:
+        """Split a chunk again (at line boundaries) until every piece fits the prompt budget"""
+        tokens = count_tokens(chunk.text, self.llm_type.value)
+        if self.prompt_builder.fits(tokens):
+            return [chunk]
+        limit = min(max_chars, chunk.size) // 2
+        if limit < MIN_CHUNK_CHARS:
+            raise ValueError(
+                f"Chunk of pages {chunk.pages} needs {self.prompt_builder.prompt_tokens(tokens)} prompt tokens, "
+                f"over the budget of {self.settings.segmentation_max_prompt_tokens}, and cannot be split further"
+            )
+        logger.info(f"Chunk of pages {chunk.pages} is over the prompt budget ({tokens} tokens), splitting it")
+        return [piece for part in split_oversized(chunk, limit) for piece in self._fit_to_budget(part, limit)]
+
+    async def _segment_map_reduce(
+            self, pages: list, max_chars: int, stream: Optional[SegmentationStream] = None
+    ) -> Tuple[DocumentStructuredContent, Dict[str, int]]:
+        """Segment each document chunk concurrently and merge the partial section lists"""
+        chunks = [
+            piece for chunk in split_into_chunks(pages, max_chars) for piece in self._fit_to_budget(chunk, max_chars)
+        ]
+        if len(chunks) == 1:
+            return await self._segment_cached(chunks[0].text, stream.channel() if stream else None)
+
+        async def _map(number, chunk):
+            async with self._segment_semaphore:
+                return await self._segment_cached(chunk.text, stream.channel(number) if stream else None)
+
+        outcomes = await asyncio.gather(*(_map(number, chunk) for number, chunk in enumerate(chunks)))
+        results = [result for result, _ in outcomes]
+        usage = {key: sum(chunk_usage[key] for _, chunk_usage in outcomes) for key in EMPTY_USAGE}
+        return merge_results(chunks, results), usage
+
+    async def _segment_cached(
+            self, text: str, on_text: Optional[Callable[[str], None]] = None
+    ) -> Tuple[DocumentStructuredContent, Dict[str, int]]:
+        cache_key = (
+            self.prompt_version,
+            self.prompt_digest,
+            self.llm_type.value,
+            self.segmentation_cache.digest(text),
+        ) if self.segmentation_cache else None
+
+        if cache_key:
+            cached = await self.segmentation_cache.get_result(*cache_key)
+            if cached is not None:
+                logger.info(f"Segmentation cache hit ({self.prompt_version}, {self.llm_type.value})")
+                return cached, dict(EMPTY_USAGE)
+
+        result, usage = await self._segment(text, on_text)
+        if cache_key and result is not None:
+            await self.segmentation_cache.set_result(*cache_key, result)
+        return result, usage
+
+    def _messages(self, extracted_text: str) -> List[BaseMessage]:
+        """
+        Static instructions first and the document last, so consecutive requests share
+        a byte-identical prefix that providers can cache. Older prompt versions embed
+        the text in the system message.
+        """
+        if "{extracted_text}" in self.prompt_template:
+            return [
+                SystemMessage(content=self.prompt_template.format(extracted_text=extracted_text)),
+                HumanMessage(content=SEGMENTATION_REQUEST),
+            ]
+        return [
+            SystemMessage(content=self.prompt_template),
+            HumanMessage(content=SEGMENTATION_DOCUMENT_MESSAGE.format(extracted_text=extracted_text)),
+        ]
+
+    async def _segment(
+            self, extracted_text: str, on_text: Optional[Callable[[str], None]] = None
+    ) -> Tuple[DocumentStructuredContent, Dict[str, int]]:
+        """
+        Args:
+            extracted_text: Document text
+            on_text: Optional consumer of the structured output as it streams
+        """
+        return await self.router.ainvoke_with_usage(
+            self._messages(extracted_text), schema=DocumentStructuredContent, on_text=on_text
         )
-        result = structured_llm.invoke([
-            SystemMessage(content=system_instructions),
-            HumanMessage(
-                content="Extrae los datos clave de un documento, particularmente la vigencia (fechas o periodos), empresa, póliza y retorna un lista segementada de secciones logicas")
-        ])
-        print(f"Segmented sections: {result}")
-        return {"segmented_sections": result}
@@ -0,0 +1,137 @@
+# app/agent/text_layer.py
+
+import asyncio
+import logging
+import unicodedata
+from dataclasses import dataclass
+from typing import List, Optional
+
+import fitz
+
+from app.agent.extraction_state import DocumentValidationDetails
+from app.config.config import get_settings
+from app.observability.spans import span
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# PDF user space units per inch
+POINTS_PER_INCH = 72.0
+ALLOWED_SYMBOLS = set(".,;:-_/()[]°º#%&*'\"|+@$¿?¡!=<>")
+
+
+@dataclass
+class PageText:
+    """Text layer of one page and its quality scores"""
+    index: int
+    text: str
+    # Visible characters per square inch of page
+    density: float
+    # Share of characters that are neither letters, digits, whitespace nor common punctuation
+    garbage_ratio: float
+    # Share of the page area covered by images
+    image_coverage: float
+    usable: bool
+
+
+def garbage_ratio(text: str) -> float:
+    visible = [char for char in text if not char.isspace()]
+    if not visible:
+        return 1.0
+    garbage = sum(
+        1 for char in visible
+        if (not char.isalnum() and char not in ALLOWED_SYMBOLS)
+        or unicodedata.category(char) in ("Co", "Cn", "Cc")
+        or char == "\ufffd"
+    )
+    return garbage / len(visible)
+
+
+def image_coverage(page: "fitz.Page") -> float:
+    """Share of the page covered by images (overlapping images counted once each, capped at 1)"""
+    page_area = page.rect.get_area()
+    if not page_area:
+        return 0.0
+    covered = sum((fitz.Rect(image["bbox"]) & page.rect).get_area() for image in page.get_image_info())
+    return min(covered / page_area, 1.0)
+
+
+def page_markdown(page: "fitz.Page", tables: bool) -> str:
+    """Page text in reading order, with ruled tables rendered as markdown tables"""
+    found = page.find_tables().tables if tables else []
+    blocks = [
+        (block[1], block[0], block[4].strip())
+        for block in page.get_text("blocks")
+        if block[6] == 0 and not any(fitz.Rect(block[:4]).intersects(table.bbox) for table in found)
+    ]
+    blocks += [(table.bbox[1], table.bbox[0], table.to_markdown().strip()) for table in found]
+    return "\n\n".join(text for _, _, text in sorted(blocks) if text)
+
+
+def read_text_layer(
+        file_path: str,
+        min_density: float,
+        max_garbage_ratio: float,
+        tables: bool = True,
+        max_image_coverage: float = 1.0,
+) -> List[PageText]:
+    """
+    Read and score the embedded text of every page of a PDF. A page is usable when
+    its text is dense and clean enough and images do not cover most of it: a scanned
+    page with a text stamp, header or signature on top still needs OCR.
+    """
+    pages = []
+    with fitz.open(file_path) as document:
+        for page in document:
+            raw = page.get_text("text")
+            visible = sum(1 for char in raw if not char.isspace())
+            area = (page.rect.width / POINTS_PER_INCH) * (page.rect.height / POINTS_PER_INCH)
+            density = visible / area if area else 0.0
+            ratio = garbage_ratio(raw)
+            coverage = image_coverage(page)
+            usable = density >= min_density and ratio <= max_garbage_ratio and coverage <= max_image_coverage
+            pages.append(PageText(
+                index=page.number,
+                text=page_markdown(page, tables) if usable else "",
+                density=round(density, 2),
+                garbage_ratio=round(ratio, 3),
+                image_coverage=round(coverage, 3),
+                usable=usable,
+            ))
+    return pages
+
+
+class TextLayerReader:
+    """
+    Graph node that reads the PDF text layer locally before OCR.
+    Born-digital pages with a good text layer are used as-is; scanned, image-only
+    or low-quality pages are left for the remote OCR.
+    """
+
+    def __init__(self, settings=None):
+        self.settings = settings or get_settings()
+
+    async def read(self, state: DocumentValidationDetails) -> dict:
+        if not self.settings.text_layer_enabled:
+            return {"text_layer_pages": []}
+
+        try:
+            with span("text_layer_read") as fields:
+                pages = await asyncio.to_thread(
+                    read_text_layer,
+                    state["file_path"],
+                    self.settings.text_layer_min_density,
+                    self.settings.text_layer_max_garbage_ratio,
+                    self.settings.text_layer_tables,
+                    self.settings.text_layer_max_image_coverage,
+                )
+                fields["pages"] = len(pages)
+        except Exception as e:
+            # Damaged or encrypted PDFs still go through the remote OCR
+            logger.warning(f"Could not read the text layer of {state.get('file_name')}: {str(e)}")
+            return {"text_layer_pages": []}
+
+        usable = sum(1 for page in pages if page.usable)
+        logger.info(f"Text layer usable on {usable}/{len(pages)} pages of {state.get('file_name')}")
+        return {"text_layer_pages": [page.text if page.usable else None for page in pages]}
+
@@ -0,0 +1,38 @@
+import asyncio
+import logging
+from typing import Awaitable, TypeVar
+
+from fastapi import Request
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# nginx's code for "client closed request"
+CLIENT_CLOSED_REQUEST = 499
+
+
+class ClientDisconnectedError(Exception):
+    """Raised when the client went away before the work finished"""
+
+
+async def cancel_on_disconnect(request: Request, work: Awaitable[T], poll_seconds: float = 0.5) -> T:
+    """
+    Await `work` while watching the connection; if the client disconnects first the
+    work is cancelled (OCR and LLM calls in flight included) and
+    ClientDisconnectedError is raised.
+    """
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_seconds)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                logger.info(f"Client disconnected, cancelling {request.url.path}")
+                task.cancel()
+                raise ClientDisconnectedError(request.url.path)
+    finally:
+        if not task.done():
+            task.cancel()
@@ -1,34 +1,47 @@
-import tempfile
-from datetime import datetime
-from typing import List, Tuple
-import re
-
-import cv2
-from fastapi import FastAPI, UploadFile, File, HTTPException, APIRouter, Depends, Form
-from sqlalchemy import desc
-from sqlalchemy.orm import Session
-import fitz
-import numpy as np
-
-from app.agent.extraction_state import DocumentValidationDetails
-from app.config.database import get_db
-import os
+import asyncio
+import json
 import logging
-from langchain_community.document_loaders import PyPDFLoader
+from datetime import date
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
+from fastapi import UploadFile, File, HTTPException, APIRouter, Depends, Form, Request
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
+from sqlalchemy.orm import Session
 
-from app.workflow.document_graph import document_graph
+from app.agent.ingestion import SpooledDocument, UploadTooLargeError, spool_upload
+from app.api.v1.cancellation import CLIENT_CLOSED_REQUEST, ClientDisconnectedError, cancel_on_disconnect
+from app.agent.person_matcher import PersonIndex, classify_person_input, match_person, parse_date
+from app.config.config import get_settings
+from app.config.database import get_db
+from app.workflow.validation import run_document_validation, stream_document_validation
 
 logger = logging.getLogger(__name__)
 
 # Verificar que la variable esté configurada
 router = APIRouter(prefix="/document", tags=["document"])
 
+
+def _parse_page_list(value: Optional[str]) -> List[int]:
+    """Parse "3,7" (1-based pages) into zero-based page indexes"""
+    if not value or not value.strip():
+        return []
+    try:
+        pages = sorted({int(part) for part in value.split(",") if part.strip()})
+    except ValueError:
+        raise HTTPException(status_code=400, detail="reocr_pages must be a comma-separated list of page numbers")
+    if any(page < 1 for page in pages):
+        raise HTTPException(status_code=400, detail="Page numbers start at 1")
+    return [page - 1 for page in pages]
+
+
 @router.post("/v2/validate", response_model=dict)
 async def validate_document(
+        request: Request,
         file: UploadFile = File(...),
         person_name: str = Form(...),
         user_date: str = Form(None),
+        reocr_pages: str = Form(None),
         db: Session = Depends(get_db),
 ):
     """
@@ -36,6 +49,8 @@ async def validate_document(
 
     Args:
         file: PDF file to validate
+        reocr_pages: Optional comma-separated 1-based pages to send through OCR again
+            (e.g. "3,7"); the rest of the document reuses its cached results
         db: Database session
 
     Returns:
@@ -60,37 +75,278 @@ async def validate_document(
             )
 
         # Determine if the input is a DNI (8 digits) or a name
-        is_dni = bool(re.match(r'^\d{8}$', input_value))
-
-        # Different formatting based on type
-        if is_dni:
-            # Store the DNI directly
-            input_type = "dni"
-            normalized_value = input_value
-            logger.info(f"Identified input as DNI: {normalized_value}")
-        else:
-            # Format as name - convert to uppercase and normalize spaces
-            input_type = "name"
-            normalized_value = " ".join(input_value.upper().split())
-            logger.info(f"Identified input as name: {normalized_value}")
-
-        # Execute workflow
-        logger.info(f"Starting document validation: {file.filename}")
-        state = DocumentValidationDetails(file=file, person_name=person_name)
-        component = document_graph.compile()
-        result = await component.ainvoke(state)
-        # Format response
-        response = {
-            "extracted_text": result["extracted_text"],
-            "component": result["structured_content"],
-            "person_name": result["person_name"],
-            "segmented_sections": result["segmented_sections"]
-        }
+        input_type, normalized_value = classify_person_input(input_value)
+        logger.info(f"Identified input as {input_type}: {normalized_value}")
+
+        pages_to_reocr = _parse_page_list(reocr_pages)
+
+        # Spool the upload to disk (hashing it on the way) and execute workflow
+        settings = get_settings()
+        document = await spool_upload(file, settings.max_upload_bytes, settings.upload_spool_dir)
+        try:
+            logger.info(f"Starting document validation: {file.filename}")
+            response = await cancel_on_disconnect(
+                request,
+                run_document_validation(document, normalized_value, user_date, pages_to_reocr),
+                settings.disconnect_poll_seconds,
+            )
+        finally:
+            document.remove()
         return response
 
+    except HTTPException:
+        raise
+    except ClientDisconnectedError:
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         logger.error(f"Error in document validation: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=f"Error processing document: {str(e)}"
         )
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """One Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+async def _validation_events(
+        document: SpooledDocument,
+        person_name: str,
+        user_date: Optional[str],
+        reocr_pages: List[int],
+        keepalive_seconds: float,
+        stop_on_match: bool = False,
+) -> AsyncIterator[str]:
+    """
+    SSE body of the streaming endpoint. The graph runs in its own task feeding a
+    queue, so keep-alive comments go out while a node is busy; when the client
+    disconnects the response is cancelled and the task (OCR and LLM calls
+    included) with it. With `stop_on_match`, a DNI found with valid coverage while
+    the segmentation is still streaming ends the response (and the validation)
+    right there; any other match cannot settle the result, since a later
+    constancia may still cover the person.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def _produce() -> None:
+        try:
+            async for event in stream_document_validation(document, person_name, user_date, reocr_pages):
+                queue.put_nowait(event)
+        except Exception as e:
+            logger.error(f"Error in streaming document validation: {str(e)}")
+            queue.put_nowait(("error", {"detail": f"Error processing document: {str(e)}"}))
+        finally:
+            queue.put_nowait(None)
+
+    producer = asyncio.create_task(_produce())
+    try:
+        yield _sse("started", {"file_name": document.file_name, "file_sha256": document.sha256})
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout=keepalive_seconds)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if item is None:
+                break
+            yield _sse(*item)
+            event, data = item
+            if (
+                    stop_on_match
+                    and event == "person_found"
+                    and data.get("definitive")
+                    and data["match"]["coverage_valid"] is True
+            ):
+                match = data["match"]
+                yield _sse("result", {
+                    "early": True,
+                    "file_name": document.file_name,
+                    "person_match": {
+                        "query": data["query"],
+                        "input_type": data["input_type"],
+                        "found": True,
+                        "coverage_valid": True,
+                        "matches": [match],
+                    },
+                })
+                break
+    finally:
+        if not producer.done():
+            logger.info(f"Streaming response ended early, cancelling validation of {document.file_name}")
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+        document.remove()
+
+
+@router.post("/v2/validate/stream")
+async def validate_document_stream(
+        file: UploadFile = File(...),
+        person_name: str = Form(...),
+        user_date: str = Form(None),
+        reocr_pages: str = Form(None),
+        stop_on_match: bool = Form(False),
+):
+    """
+    Streaming variant of /v2/validate, as Server-Sent Events. In order:
+
+    - `started`: file name and SHA-256
+    - `ocr_page`: one per page as it becomes available (text layer, OCR cache or OCR)
+    - `text_layer`, `extracted_text`: when each extraction step finishes
+    - while the LLM segmentation streams: `section_parsed` per constancia,
+      `segmentation_progress` every few rows and `person_found` as soon as a row
+      matches the requested person (the constancia fields may still be partial)
+    - `section`: each segmented constancia
+    - `person_match`: the match of the requested person
+    - `result`: the same body /v2/validate returns (or `error`)
+
+    Args:
+        file: PDF file to validate
+        person_name: Name or DNI of the person to look for
+        user_date: Reference date for coverage validity (defaults to today)
+        reocr_pages: Optional comma-separated 1-based pages to send through OCR again
+        stop_on_match: End with an early `result` ({"early": true, "person_match": ...})
+            at the first `person_found` for a DNI whose coverage is valid, skipping the
+            rest of the segmentation
+    """
+    if not file.filename.lower().endswith('.pdf'):
+        raise HTTPException(status_code=400, detail="Only PDF files are accepted")
+    input_value = person_name.strip()
+    if not input_value:
+        raise HTTPException(status_code=400, detail="Person name or DNI is required")
+    _, normalized_value = classify_person_input(input_value)
+    pages_to_reocr = _parse_page_list(reocr_pages)
+
+    settings = get_settings()
+    try:
+        document = await spool_upload(file, settings.max_upload_bytes, settings.upload_spool_dir)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    logger.info(f"Starting streaming document validation: {file.filename}")
+    return StreamingResponse(
+        _validation_events(
+            document, normalized_value, user_date, pages_to_reocr, settings.sse_keepalive_seconds, stop_on_match
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # The spooled upload is removed even if the stream never starts
+        background=BackgroundTask(document.remove),
+    )
+
+
+@router.post("/v2/validate/batch", response_model=dict)
+async def validate_documents_batch(
+        request: Request,
+        files: List[UploadFile] = File(...),
+        person_names: List[str] = Form(...),
+        user_date: str = Form(None),
+        max_concurrency: Optional[int] = Form(None),
+):
+    """
+    Validates several PDF documents against one or more persons.
+
+    Identical files are processed once; each unique document runs through the
+    extraction graph with bounded concurrency and is then matched against every
+    requested person. Failures are reported per item without failing the batch.
+
+    Args:
+        files: PDF files to validate
+        person_names: Names or DNIs to look up in every document
+        user_date: Reference date for coverage validity (defaults to today)
+        max_concurrency: Optional lower limit for documents processed at once
+
+    Returns:
+        Dict with one result per (file, person) pair and the processed documents
+    """
+    settings = get_settings()
+    if len(files) > settings.batch_max_files:
+        raise HTTPException(status_code=400, detail=f"At most {settings.batch_max_files} files per batch")
+
+    persons = [classify_person_input(name) for name in person_names if name.strip()]
+    if not persons:
+        raise HTTPException(status_code=400, detail="Person name or DNI is required")
+
+    # Spool every upload to disk and dedupe identical files by content hash
+    unique: Dict[str, SpooledDocument] = {}
+    duplicates: List[SpooledDocument] = []
+    item_files: List[Tuple[UploadFile, Optional[str], Optional[str]]] = []
+    for file in files:
+        if not file.filename.lower().endswith('.pdf'):
+            item_files.append((file, None, "Only PDF files are accepted"))
+            continue
+        try:
+            document = await spool_upload(file, settings.max_upload_bytes, settings.upload_spool_dir)
+        except UploadTooLargeError as e:
+            item_files.append((file, None, str(e)))
+            continue
+        if document.sha256 in unique:
+            duplicates.append(document)
+        else:
+            unique[document.sha256] = document
+        item_files.append((file, document.sha256, None))
+    for document in duplicates:
+        document.remove()
+
+    limit = min(max_concurrency or settings.batch_max_concurrency, settings.batch_max_concurrency)
+    semaphore = asyncio.Semaphore(max(limit, 1))
+    reference = parse_date(user_date) or date.today()
+
+    async def _process(document: SpooledDocument) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                _, normalized_value = persons[0]
+                logger.info(f"Starting batch document validation: {document.file_name}")
+                result = await run_document_validation(document, normalized_value, user_date)
+                return {"status": "ok", "file_name": document.file_name, "segmented_sections": result["segmented_sections"]}
+            except Exception as e:
+                logger.error(f"Error in batch validation of {document.file_name}: {str(e)}")
+                return {"status": "error", "file_name": document.file_name, "error": str(e)}
+            finally:
+                document.remove()
+
+    digests = list(unique)
+    try:
+        processed = await cancel_on_disconnect(
+            request,
+            asyncio.gather(*(_process(unique[digest]) for digest in digests)),
+            settings.disconnect_poll_seconds,
+        )
+    except ClientDisconnectedError:
+        # Documents whose processing never started still have their spool file
+        for document in unique.values():
+            document.remove()
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
+    documents = dict(zip(digests, processed))
+
+    items = []
+    for file, digest, error in item_files:
+        for input_type, normalized_value in persons:
+            item = {"file_name": file.filename, "file_sha256": digest, "person_name": normalized_value}
+            document = documents.get(digest)
+            if error:
+                item.update(status="error", error=error)
+            elif document["status"] == "error":
+                item.update(status="error", error=document["error"])
+            else:
+                sections = (document["segmented_sections"] or {}).get("content") or []
+                if "index" not in document:
+                    document["index"] = PersonIndex.from_sections(sections)
+                item.update(status="ok", person_match=match_person(
+                    sections, normalized_value, input_type, reference,
+                    settings.person_match_min_score, document["index"],
+                ))
+            items.append(item)
+
+    for document in documents.values():
+        document.pop("index", None)
+
+    return {
+        "total_files": len(files),
+        "unique_files": len(unique),
+        "items": items,
+        "documents": documents,
+    }
@@ -0,0 +1,80 @@
+import logging
+
+from fastapi import APIRouter, File, Form, HTTPException, UploadFile
+
+from app.agent.ingestion import UploadTooLargeError, spool_upload
+from app.agent.person_matcher import classify_person_input
+from app.config.config import get_settings
+from app.jobs.manager import JobManager, JobStatus, get_job_manager
+from app.jobs.queue import QueueFullError
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/document", tags=["jobs"])
+
+
+def _job_manager() -> JobManager:
+    if not get_settings().job_queue_backend:
+        raise HTTPException(
+            status_code=503, detail="Asynchronous jobs are not configured (set JOB_QUEUE_BACKEND)"
+        )
+    return get_job_manager()
+
+
+@router.post("/v2/jobs", response_model=dict, status_code=202)
+async def submit_validation_job(
+        file: UploadFile = File(...),
+        person_name: str = Form(...),
+        user_date: str = Form(None),
+):
+    """
+    Queues a PDF document for validation and returns immediately.
+
+    Args:
+        file: PDF file to validate
+        person_name: Name or DNI to look up
+        user_date: Reference date for coverage validity
+
+    Returns:
+        Job record with its id; poll /v2/jobs/{job_id} for the status
+    """
+    if not file.filename.lower().endswith('.pdf'):
+        raise HTTPException(status_code=400, detail="Only PDF files are accepted")
+    if not person_name.strip():
+        raise HTTPException(status_code=400, detail="Person name or DNI is required")
+
+    manager = _job_manager()
+    _, normalized_value = classify_person_input(person_name)
+    settings = get_settings()
+    try:
+        document = await spool_upload(file, settings.max_upload_bytes, settings.job_spool_dir)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    try:
+        return await manager.submit(document, normalized_value, user_date)
+    except QueueFullError as e:
+        document.remove()
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+
+
+@router.get("/v2/jobs/{job_id}", response_model=dict)
+async def get_validation_job(job_id: str):
+    """Returns the status of a job (without its result)"""
+    record = await _job_manager().get(job_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    record.pop("result", None)
+    return record
+
+
+@router.get("/v2/jobs/{job_id}/result", response_model=dict)
+async def get_validation_job_result(job_id: str):
+    """Returns the validation result of a finished job"""
+    record = await _job_manager().get(job_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    if record["status"] == JobStatus.FAILED:
+        raise HTTPException(status_code=500, detail=f"Error processing document: {record.get('error')}")
+    if record["status"] != JobStatus.DONE:
+        raise HTTPException(status_code=409, detail=f"Job is {record['status']}")
+    return record["result"]
@@ -0,0 +1,266 @@
+"""
+Cache backends - pluggable key/value stores for expensive pipeline results
+
+Three backends share the same async interface:
+- MemoryCacheBackend: in-process LRU with TTL and a maximum number of entries
+- DiskCacheBackend: one file per entry in a local directory, TTL and a maximum total size
+- RedisCacheBackend: shared across workers, TTL per key; size eviction is left to the
+  server's `maxmemory-policy` (e.g. allkeys-lru)
+
+Values are strings; callers serialize their own payloads.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend(ABC):
+    """Abstract async key/value store with expiration"""
+
+    def __init__(self, ttl_seconds: Optional[int] = None):
+        self.ttl_seconds = ttl_seconds
+
+    def _expires_at(self) -> Optional[float]:
+        return time.time() + self.ttl_seconds if self.ttl_seconds else None
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        """Return the stored value, or None if missing or expired"""
+
+    @abstractmethod
+    async def set(self, key: str, value: str) -> None:
+        """Store a value, evicting old entries if needed"""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Remove a single entry"""
+
+    @abstractmethod
+    async def clear(self, prefix: str = "") -> int:
+        """Remove every entry whose key starts with `prefix`; returns the number removed"""
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process LRU cache"""
+
+    def __init__(self, ttl_seconds: Optional[int] = None, max_entries: int = 512):
+        super().__init__(ttl_seconds)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Optional[float], str]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at < time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: str) -> None:
+        self._entries[key] = (self._expires_at(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    async def clear(self, prefix: str = "") -> int:
+        keys = [key for key in self._entries if key.startswith(prefix)]
+        for key in keys:
+            del self._entries[key]
+        return len(keys)
+
+
+class DiskCacheBackend(CacheBackend):
+    """
+    Local directory store; least recently used files are evicted above `max_bytes`.
+
+    The total size is kept as a running count (one directory scan at start-up, then
+    the writes and deletes of this process), so a write does not scan the directory.
+    Only when the count goes over `max_bytes` is the directory scanned, which also
+    picks up entries written by other processes, and brought down to
+    EVICT_TO_RATIO of the limit so the next eviction is a while away.
+    """
+
+    EVICT_TO_RATIO = 0.9
+
+    def __init__(self, directory: str, ttl_seconds: Optional[int] = None, max_bytes: int = 512 * 1024 * 1024):
+        super().__init__(ttl_seconds)
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._sizes: Dict[str, int] = {path.name: stat.st_size for stat, path in self._scan()}
+        self._total = sum(self._sizes.values())
+
+    def _scan(self):
+        files = []
+        for path in self.directory.glob("*.json"):
+            try:
+                files.append((path.stat(), path))
+            except FileNotFoundError:
+                continue
+        return files
+
+    def _forget(self, path: Path) -> None:
+        with self._lock:
+            self._total -= self._sizes.pop(path.name, 0)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{hashlib.sha256(key.encode()).hexdigest()}.json"
+
+    def _read(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return None
+        if entry["expires_at"] is not None and entry["expires_at"] < time.time():
+            path.unlink(missing_ok=True)
+            self._forget(path)
+            return None
+        # Touch the file so eviction follows access order
+        os.utime(path)
+        return entry["value"]
+
+    def _write(self, key: str, value: str) -> None:
+        path = self._path(key)
+        tmp_path = path.with_suffix(".tmp")
+        data = json.dumps({"key": key, "expires_at": self._expires_at(), "value": value}).encode("utf-8")
+        tmp_path.write_bytes(data)
+        tmp_path.replace(path)
+        with self._lock:
+            self._total += len(data) - self._sizes.get(path.name, 0)
+            self._sizes[path.name] = len(data)
+            over = self._total > self.max_bytes
+        if over:
+            self._evict()
+
+    def _evict(self) -> None:
+        files = self._scan()
+        target = self.max_bytes * self.EVICT_TO_RATIO
+        kept: Dict[str, int] = {}
+        kept_total = 0
+        full = False
+        # Newest first: keep entries until the target is reached, drop the older rest
+        for stat, path in sorted(files, key=lambda item: item[0].st_mtime, reverse=True):
+            full = full or kept_total + stat.st_size > target
+            if full:
+                path.unlink(missing_ok=True)
+                continue
+            kept[path.name] = stat.st_size
+            kept_total += stat.st_size
+        with self._lock:
+            self._sizes = kept
+            self._total = kept_total
+        logger.info(f"Disk cache {self.directory}: evicted {len(files) - len(kept)} entries")
+
+    def _delete(self, key: str) -> None:
+        path = self._path(key)
+        path.unlink(missing_ok=True)
+        self._forget(path)
+
+    def _clear(self, prefix: str) -> int:
+        removed = 0
+        for path in self.directory.glob("*.json"):
+            try:
+                key = json.loads(path.read_text(encoding="utf-8"))["key"]
+            except (FileNotFoundError, ValueError, KeyError):
+                continue
+            if key.startswith(prefix):
+                path.unlink(missing_ok=True)
+                self._forget(path)
+                removed += 1
+        return removed
+
+    async def get(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self._read, key)
+
+    async def set(self, key: str, value: str) -> None:
+        await asyncio.to_thread(self._write, key, value)
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self._delete, key)
+
+    async def clear(self, prefix: str = "") -> int:
+        return await asyncio.to_thread(self._clear, prefix)
+
+
+class RedisCacheBackend(CacheBackend):
+    """Redis store shared by every worker"""
+
+    def __init__(self, host: str, port: int, password: Optional[str] = None, ttl_seconds: Optional[int] = None):
+        super().__init__(ttl_seconds)
+        from redis.asyncio import Redis
+
+        self.client = Redis(host=host, port=port, password=password, decode_responses=True)
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: str) -> None:
+        await self.client.set(key, value, ex=self.ttl_seconds)
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(key)
+
+    async def clear(self, prefix: str = "") -> int:
+        removed = 0
+        async for key in self.client.scan_iter(match=f"{prefix}*"):
+            removed += await self.client.delete(key)
+        return removed
+
+
+def create_cache_backend(
+        kind: str,
+        namespace: str,
+        settings,
+        ttl_seconds: Optional[int] = None,
+        max_entries: int = 512,
+        max_bytes: int = 512 * 1024 * 1024,
+) -> CacheBackend:
+    """
+    Build a cache backend from its name
+
+    Args:
+        kind: One of "memory", "disk" or "redis"
+        namespace: Sub-directory used by the disk backend
+        settings: Application settings (cache directory and Redis connection)
+        ttl_seconds: Entry lifetime, None for no expiration
+        max_entries: Maximum entries for the memory backend
+        max_bytes: Maximum total size for the disk backend
+
+    Raises:
+        ValueError: For unknown backend names
+    """
+    if kind == "memory":
+        return MemoryCacheBackend(ttl_seconds=ttl_seconds, max_entries=max_entries)
+    elif kind == "disk":
+        return DiskCacheBackend(
+            os.path.join(settings.cache_dir, namespace), ttl_seconds=ttl_seconds, max_bytes=max_bytes
+        )
+    elif kind == "redis":
+        return RedisCacheBackend(
+            host=settings.redis_host,
+            port=settings.redis_port,
+            password=settings.redis_password,
+            ttl_seconds=ttl_seconds,
+        )
+    else:
+        raise ValueError(f"Unknown cache backend: {kind}")
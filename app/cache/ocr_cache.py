@@ -0,0 +1,56 @@
+import hashlib
+from typing import List, Optional
+
+from app.cache.backends import create_cache_backend
+from app.cache.result_cache import ResultCache
+
+
+class OCRCache(ResultCache):
+    """
+    Content-addressed cache of OCR results.
+    Entries are keyed by the OCR model and the SHA-256 of the PDF bytes, either for
+    the whole document or for a single page of it, so a repeated document skips OCR
+    entirely and a single bad page can be re-run on its own.
+    """
+
+    @staticmethod
+    def digest(pdf_content: bytes) -> str:
+        return hashlib.sha256(pdf_content).hexdigest()
+
+    @staticmethod
+    def key(pdf_digest: str, model: str) -> str:
+        return f"{model}:{pdf_digest}"
+
+    @staticmethod
+    def page_key(pdf_digest: str, model: str, page_index: int) -> str:
+        return f"{model}:{pdf_digest}:page:{page_index}"
+
+    async def get_pages(self, pdf_digest: str, model: str) -> Optional[List[str]]:
+        return await self.get(self.key(pdf_digest, model))
+
+    async def set_pages(self, pdf_digest: str, model: str, pages: List[str]) -> None:
+        await self.set(self.key(pdf_digest, model), pages)
+
+    async def get_page(self, pdf_digest: str, model: str, page_index: int) -> Optional[str]:
+        return await self.get(self.page_key(pdf_digest, model, page_index))
+
+    async def set_page(self, pdf_digest: str, model: str, page_index: int, markdown: str) -> None:
+        await self.set(self.page_key(pdf_digest, model, page_index), markdown)
+
+    async def delete_page(self, pdf_digest: str, model: str, page_index: int) -> None:
+        await self.delete(self.page_key(pdf_digest, model, page_index))
+
+
+def build_ocr_cache(settings) -> Optional[OCRCache]:
+    """Create the OCR cache configured in settings, or None when disabled"""
+    if not settings.ocr_cache_enabled:
+        return None
+    backend = create_cache_backend(
+        settings.ocr_cache_backend,
+        namespace="ocr",
+        settings=settings,
+        ttl_seconds=settings.ocr_cache_ttl_seconds,
+        max_entries=settings.ocr_cache_max_entries,
+        max_bytes=settings.ocr_cache_max_bytes,
+    )
+    return OCRCache(backend, namespace="ocr")
@@ -0,0 +1,71 @@
+import json
+import logging
+from typing import Any, Dict, Optional
+
+from app.cache.backends import CacheBackend
+from app.observability.metrics import CACHE_REQUESTS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    """
+    Namespaced JSON cache on top of a CacheBackend, with hit/miss counters.
+    Backend failures are logged and treated as misses so a cache outage never
+    fails a document.
+    """
+
+    def __init__(self, backend: CacheBackend, namespace: str):
+        self.backend = backend
+        self.namespace = namespace
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "writes": 0, "errors": 0}
+
+    def _count(self, outcome: str) -> None:
+        self.stats[outcome] += 1
+        CACHE_REQUESTS.inc(cache=self.namespace, outcome=outcome)
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def get(self, key: str) -> Optional[Any]:
+        try:
+            raw = await self.backend.get(self._key(key))
+        except Exception as e:
+            self._count("errors")
+            logger.warning(f"Cache '{self.namespace}' read failed: {str(e)}")
+            raw = None
+
+        if raw is None:
+            self._count("misses")
+            return None
+        try:
+            value = json.loads(raw)
+        except ValueError as e:
+            # Truncated or corrupt entry: drop it and recompute
+            self._count("errors")
+            self._count("misses")
+            logger.warning(f"Cache '{self.namespace}' entry {key} is corrupt, deleting it: {str(e)}")
+            await self.delete(key)
+            return None
+        self._count("hits")
+        return value
+
+    async def set(self, key: str, value: Any) -> None:
+        try:
+            await self.backend.set(self._key(key), json.dumps(value, ensure_ascii=False))
+            self._count("writes")
+        except Exception as e:
+            self._count("errors")
+            logger.warning(f"Cache '{self.namespace}' write failed: {str(e)}")
+
+    async def delete(self, key: str) -> None:
+        try:
+            await self.backend.delete(self._key(key))
+        except Exception as e:
+            self._count("errors")
+            logger.warning(f"Cache '{self.namespace}' delete failed: {str(e)}")
+
+    async def clear(self, prefix: str = "") -> int:
+        """Remove the entries of this namespace whose key starts with `prefix`"""
+        return await self.backend.clear(self._key(prefix))
@@ -0,0 +1,53 @@
+import hashlib
+from typing import Optional
+
+from app.agent.extraction_state import DocumentStructuredContent
+from app.cache.backends import create_cache_backend
+from app.cache.result_cache import ResultCache
+
+
+class SegmentationCache(ResultCache):
+    """
+    Memoized structured segmentation results.
+    Entries are keyed by prompt version, a digest of the prompt text, the LLM type
+    and the digest of the extracted text. Editing a prompt changes its digest, so
+    results produced by the previous wording are never served again; they age out
+    through TTL/LRU, or can be dropped right away with `invalidate`.
+    """
+
+    @staticmethod
+    def digest(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def key(self, prompt_version: str, prompt_digest: str, llm_type: str, text_digest: str) -> str:
+        return f"{prompt_version}:{prompt_digest[:16]}:{llm_type}:{text_digest}"
+
+    async def get_result(
+            self, prompt_version: str, prompt_digest: str, llm_type: str, text_digest: str
+    ) -> Optional[DocumentStructuredContent]:
+        return await self.get(self.key(prompt_version, prompt_digest, llm_type, text_digest))
+
+    async def set_result(
+            self, prompt_version: str, prompt_digest: str, llm_type: str, text_digest: str,
+            result: DocumentStructuredContent
+    ) -> None:
+        await self.set(self.key(prompt_version, prompt_digest, llm_type, text_digest), result)
+
+    async def invalidate(self, prompt_version: Optional[str] = None) -> int:
+        """Drop cached results for one prompt version, or all of them"""
+        return await self.clear(f"{prompt_version}:" if prompt_version else "")
+
+
+def build_segmentation_cache(settings) -> Optional[SegmentationCache]:
+    """Create the segmentation cache configured in settings, or None when disabled"""
+    if not settings.segmentation_cache_enabled:
+        return None
+    backend = create_cache_backend(
+        settings.segmentation_cache_backend,
+        namespace="segmentation",
+        settings=settings,
+        ttl_seconds=settings.segmentation_cache_ttl_seconds,
+        max_entries=settings.segmentation_cache_max_entries,
+        max_bytes=settings.segmentation_cache_max_bytes,
+    )
+    return SegmentationCache(backend, namespace="segmentation")
@@ -1,11 +1,14 @@
 from functools import lru_cache
-from typing import Optional, Any
+from typing import TYPE_CHECKING, Optional, Any
 from pydantic_settings import BaseSettings
 from dataclasses import dataclass, field, fields
 from dotenv import load_dotenv
-from langchain_core.runnables import RunnableConfig
 import os
 
+if TYPE_CHECKING:
+    # Solo para anotaciones: importar langchain_core aquí añade ~0.5 s al arranque
+    from langchain_core.runnables import RunnableConfig
+
 # Cargar las variables del archivo .env
 load_dotenv()
 
@@ -19,7 +22,7 @@ class LangGraphConfig:
 
     @classmethod
     def from_runnable_config(
-            cls, config: Optional[RunnableConfig] = None
+            cls, config: Optional["RunnableConfig"] = None
     ) -> "LangGraphConfig":
         """Crear configuración desde RunnableConfig de LangGraph"""
         configurable = (
@@ -38,7 +41,8 @@ class Settings(BaseSettings):
     openai_api_key: str
     anthropic_api_key: Optional[str] = None
     google_api_key: Optional[str] = None
-    mistral_api_key: str
+    # Only required by the Mistral OCR backend
+    mistral_api_key: Optional[str] = None
 
     # Database Configuration
     db_name: str
@@ -51,6 +55,137 @@ class Settings(BaseSettings):
     # Environment
     environment: str = "development"
 
+    # Shared HTTP clients of the OCR and LLM providers (one pool per provider and worker)
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry_seconds: float = 60.0
+    http_connect_timeout_seconds: float = 10.0
+    http_timeout_seconds: float = 120.0
+    # Requires the h2 package
+    http2_enabled: bool = False
+
+    # Synchronous endpoints cancel their work when the client goes away
+    disconnect_poll_seconds: float = 0.5
+    # Comment lines sent on idle Server-Sent Event streams so proxies keep them open
+    sse_keepalive_seconds: float = 15.0
+
+    # Uploads are spooled to disk (upload_spool_dir, system temp dir by default)
+    max_upload_bytes: int = 50 * 1024 * 1024
+    upload_spool_dir: Optional[str] = None
+
+    # Local PDF text layer (pages below these scores go to OCR)
+    text_layer_enabled: bool = True
+    text_layer_min_density: float = 3.0
+    text_layer_max_garbage_ratio: float = 0.05
+    # Share of the page covered by images above which the page is treated as a scan
+    # (a stamp or header with real text on top of a scanned table)
+    text_layer_max_image_coverage: float = 0.5
+    text_layer_tables: bool = True
+
+    # OCR backend: mistral | text_layer (offline, embedded text only) | replay (recorded fixtures)
+    ocr_backend: str = "mistral"
+    # Replay fixtures: one JSON file per document digest; default.json answers unknown documents
+    ocr_replay_dir: str = "fixtures/ocr"
+    # Record the responses of the Mistral backend as replay fixtures
+    ocr_replay_record: bool = False
+    ocr_replay_latency_seconds: float = 0.0
+
+    # Mistral OCR
+    mistral_server_url: Optional[str] = None
+    ocr_model: str = "mistral-ocr-latest"
+    ocr_max_concurrency: int = 4
+    ocr_timeout_seconds: float = 120.0
+    # Uploaded files: reused by content hash while idle less than the TTL, then deleted in background batches
+    mistral_file_reuse_enabled: bool = True
+    mistral_file_ttl_seconds: int = 3600
+    mistral_file_max_entries: int = 1000
+    mistral_signed_url_expiry_hours: int = 1
+    # Signed URLs are renewed this long before they expire
+    mistral_signed_url_margin_seconds: int = 120
+    mistral_file_gc_interval_seconds: float = 60.0
+    mistral_file_gc_batch_size: int = 20
+    mistral_file_delete_max_attempts: int = 3
+    mistral_file_delete_on_shutdown: bool = True
+
+    # Preprocessing of scanned pages before OCR (binarization: otsu | adaptive | none).
+    # Off until measured on real scans to help OCR accuracy: it trades grayscale for 1-bit pages
+    ocr_preprocessing_enabled: bool = False
+    ocr_preprocessing_render_dpi: int = 300
+    ocr_preprocessing_target_dpi: int = 200
+    ocr_preprocessing_binarization: str = "adaptive"
+    ocr_preprocessing_max_skew_degrees: float = 10.0
+    ocr_preprocessing_workers: int = 2
+
+    # OCR result cache (memory | disk | redis)
+    ocr_cache_enabled: bool = True
+    ocr_cache_backend: str = "memory"
+    ocr_cache_ttl_seconds: int = 7 * 24 * 3600
+    ocr_cache_max_entries: int = 512
+    ocr_cache_max_bytes: int = 512 * 1024 * 1024
+    cache_dir: str = ".cache"
+
+    # LLM routing: candidate providers (LLMType values) in order of preference
+    llm_router_providers: str = "gpt-4o-mini,gpt-4o"
+    llm_router_window_seconds: int = 300
+    llm_router_window_size: int = 200
+    llm_router_min_samples: int = 5
+    llm_router_max_error_rate: float = 0.5
+    # Assumed p95 of providers with too few samples
+    llm_router_default_latency_seconds: float = 10.0
+    # Per call timeout and calls in flight per provider and worker
+    llm_timeout_seconds: float = 60.0
+    llm_provider_max_concurrency: int = 8
+    # Hedged requests: second provider after this delay (None: p95 of the first provider)
+    llm_hedge_enabled: bool = False
+    llm_hedge_after_seconds: Optional[float] = None
+
+    # Structured segmentation
+    segmentation_prompt_version: str = "v3"
+    # single | map_reduce | auto (map_reduce when the prompt exceeds segmentation_max_prompt_tokens)
+    segmentation_mode: str = "auto"
+    segmentation_max_prompt_tokens: int = 16000
+    # Drop running headers/footers and repeated disclaimers before segmentation
+    segmentation_compaction_enabled: bool = True
+    segmentation_chunk_max_chars: int = 24000
+    segmentation_max_concurrency: int = 4
+    # auto (only for the streaming validate endpoint) | always | never: stream the
+    # segmentation output and match the requested person row by row as it is parsed
+    segmentation_streaming: str = "auto"
+    segmentation_stream_progress_every: int = 50
+    # Segmentation results memoized per text digest, prompt and model (memory | disk | redis)
+    segmentation_cache_enabled: bool = True
+    segmentation_cache_backend: str = "memory"
+    segmentation_cache_ttl_seconds: int = 7 * 24 * 3600
+    segmentation_cache_max_entries: int = 1024
+    segmentation_cache_max_bytes: int = 256 * 1024 * 1024
+
+    # Rule-based pre-extraction (the LLM only runs below this confidence)
+    rule_extraction_enabled: bool = True
+    rule_extraction_min_confidence: float = 0.85
+    # Parsed person rows / table rows that look like person rows; below this the LLM reads the tables
+    rule_extraction_min_row_completeness: float = 1.0
+
+    # Person lookup (Dice similarity over name trigrams)
+    person_match_min_score: float = 0.8
+
+    # Batch validation
+    batch_max_concurrency: int = 4
+    batch_max_files: int = 200
+
+    # Asynchronous jobs (memory | redis); unset disables the job API. The memory queue
+    # only works with a single API process, so it has to be chosen explicitly
+    job_queue_backend: Optional[str] = None
+    job_queue_max_size: int = 100
+    job_workers: int = 2
+    job_workers_enabled: bool = True
+    job_timeout_seconds: float = 600.0
+    job_result_ttl_seconds: int = 3600
+    job_store_max_entries: int = 10000
+    job_spool_dir: Optional[str] = None
+    # Redis: unacknowledged jobs idle longer than job_timeout_seconds plus this are requeued
+    job_recovery_interval_seconds: float = 60.0
+    job_max_attempts: int = 3
+
     # REDIS_HOST=redis
     redis_host: str = "redis"
     redis_port: int = 6379
@@ -1,10 +1,10 @@
 # app/db/database.py
+from functools import lru_cache
 from sqlalchemy import create_engine
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, Session
 import os
 from dotenv import load_dotenv
-from psycopg2 import connect, sql
 
 # Determinar el entorno actual
 environment = os.getenv("ENVIRONMENT", "development")
@@ -29,6 +29,8 @@ DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
 
 def create_database_if_not_exists():
     """Crea la base de datos si no existe"""
+    from psycopg2 import connect, sql
+
     conn = connect(
         dbname="postgres",
         user=POSTGRES_USER,
@@ -59,36 +61,70 @@ SQLALCHEMY_DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{PO
 # URL de la base de datos
 SQLALCHEMY_DATABASE_URL_ASYNC = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
 
-# Configuración del engine y creación de la sesión
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    pool_size=DB_POOL_SIZE,
-    max_overflow=DB_MAX_OVERFLOW,
-    pool_timeout=DB_POOL_TIMEOUT,
-    pool_pre_ping=True
-)
-
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-# Crear el motor asíncrono
-async_engine = create_async_engine(SQLALCHEMY_DATABASE_URL_ASYNC, echo=True)
-async_session = async_sessionmaker(
-    async_engine,
-    expire_on_commit=False,
-    class_=AsyncSession
-)
+
+# Los engines se crean en el primer uso: importar este módulo no abre pools ni carga drivers
+@lru_cache()
+def get_engine():
+    """Engine síncrono compartido por el proceso"""
+    return create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_pre_ping=True
+    )
+
+
+@lru_cache()
+def get_session_factory() -> sessionmaker:
+    return sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+
+
+@lru_cache()
+def get_async_engine():
+    """Engine asíncrono (asyncpg) compartido por el proceso"""
+    return create_async_engine(SQLALCHEMY_DATABASE_URL_ASYNC, echo=True)
+
+
+@lru_cache()
+def get_async_session_factory() -> async_sessionmaker:
+    return async_sessionmaker(
+        get_async_engine(),
+        expire_on_commit=False,
+        class_=AsyncSession
+    )
+
+
+_LAZY_ATTRIBUTES = {
+    "engine": get_engine,
+    "SessionLocal": get_session_factory,
+    "async_engine": get_async_engine,
+    "async_session": get_async_session_factory,
+}
+
+
+def __getattr__(name: str):
+    """Mantiene `engine`, `SessionLocal`, `async_engine` y `async_session` como atributos del módulo"""
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def init_db():
     """Inicializa la base de datos creando todas las tablas"""
     create_database_if_not_exists()
     from app.config.base import Base
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=get_engine())
 
 
 class Database:
-    def __init__(self):
-        self.engine = engine
-        self.SessionLocal = SessionLocal
+    @property
+    def engine(self):
+        return get_engine()
+
+    @property
+    def SessionLocal(self) -> sessionmaker:
+        return get_session_factory()
 
     def get_db(self) -> Session:
         """
@@ -108,7 +144,7 @@ database = Database()
 
 # Función de ayuda para obtener una sesión de base de datos
 def get_db() -> Session:
-    db = SessionLocal()
+    db = get_session_factory()()
     try:
         yield db
     finally:
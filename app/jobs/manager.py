@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import asdict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from app.agent.ingestion import SpooledDocument
+from app.config.config import get_settings
+from app.jobs.queue import JobQueue, QueueFullError, create_job_queue
+from app.jobs.store import JobStore, create_job_store
+from app.workflow.validation import run_document_validation
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class JobStatus:
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class JobManager:
+    """
+    Submit/poll/result model around the compiled document graph.
+
+    The API spools the PDF to `job_spool_dir` and submits it here as a small payload;
+    workers pull payloads, run the graph and store the response with a TTL.
+    With the Redis backend the spool directory must be shared with the
+    standalone workers (`python -m app.jobs.worker`), and jobs whose worker died
+    are put back in the queue (up to `job_max_attempts` runs). Jobs running when a
+    worker shuts down are left unacknowledged and put back right away.
+
+    The memory backend keeps jobs inside one process, so it only works with a
+    single API process and has to be configured explicitly.
+    """
+
+    def __init__(self, settings=None, queue: Optional[JobQueue] = None, store: Optional[JobStore] = None):
+        self.settings = settings or get_settings()
+        self.queue = queue or create_job_queue(self.settings)
+        self.store = store or create_job_store(self.settings)
+        self._workers: List[asyncio.Task] = []
+
+    async def submit(
+            self, document: SpooledDocument, person_name: str, user_date: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Enqueue a spooled document; raises QueueFullError under backpressure"""
+        job_id = uuid.uuid4().hex
+        record = {
+            "job_id": job_id,
+            "status": JobStatus.QUEUED,
+            "file_name": document.file_name,
+            "person_name": person_name,
+            "created_at": time.time(),
+        }
+        await self.store.save(job_id, record)
+        try:
+            await self.queue.put({
+                "job_id": job_id,
+                "document": asdict(document),
+                "person_name": person_name,
+                "user_date": user_date,
+            })
+        except QueueFullError:
+            await self.store.delete(job_id)
+            raise
+
+        logger.info(f"Queued job {job_id} for {document.file_name}")
+        return record
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self.store.get(job_id)
+
+    async def _run(self, payload: Dict[str, Any]) -> None:
+        job_id = payload["job_id"]
+        document = SpooledDocument(**payload["document"])
+        record = await self.store.get(job_id) or {}
+        await self.store.update(
+            job_id,
+            status=JobStatus.RUNNING,
+            started_at=time.time(),
+            attempts=record.get("attempts", 0) + 1,
+            interrupted=False,
+        )
+        handled = True
+        try:
+            result = await asyncio.wait_for(
+                run_document_validation(document, payload["person_name"], payload.get("user_date")),
+                timeout=self.settings.job_timeout_seconds,
+            )
+            await self.store.update(job_id, status=JobStatus.DONE, result=result, finished_at=time.time())
+            logger.info(f"Job {job_id} finished")
+        except asyncio.CancelledError:
+            # Worker shutting down: the job must not stay "running" forever
+            if self.queue.durable:
+                # Left unacknowledged with its spool file, for another worker to pick up
+                logger.warning(f"Job {job_id} interrupted, leaving it to be requeued")
+                handled = False
+                self.queue.release(payload)
+                await self.store.update(job_id, status=JobStatus.QUEUED, interrupted=True)
+            else:
+                logger.warning(f"Job {job_id} cancelled")
+                await self.store.update(
+                    job_id, status=JobStatus.FAILED, error="Cancelled while the worker shut down",
+                    finished_at=time.time(),
+                )
+            raise
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}")
+            await self.store.update(job_id, status=JobStatus.FAILED, error=str(e), finished_at=time.time())
+        finally:
+            if handled:
+                document.remove()
+                await self.queue.ack(payload)
+
+    async def _recovery_action(self, payload: Dict[str, Any]) -> str:
+        """What to do with a job taken by another consumer and never acknowledged"""
+        job_id = payload["job_id"]
+        record = await self.store.get(job_id)
+        if record is None or record["status"] in (JobStatus.DONE, JobStatus.FAILED):
+            return "drop"
+        if record.get("interrupted"):
+            # Released by a worker that shut down: not a failure of the job itself
+            return "requeue"
+        # A live worker finishes (or times out) a job within job_timeout_seconds
+        last_update = record.get("updated_at") or record.get("created_at") or 0
+        if time.time() - last_update < self.settings.job_timeout_seconds + self.settings.job_recovery_interval_seconds:
+            return "keep"
+        if record.get("attempts", 0) >= self.settings.job_max_attempts:
+            await self.store.update(
+                job_id, status=JobStatus.FAILED, error="Worker lost too many times", finished_at=time.time()
+            )
+            SpooledDocument(**payload["document"]).remove()
+            return "drop"
+        await self.store.update(job_id, status=JobStatus.QUEUED)
+        return "requeue"
+
+    async def _recover(self) -> None:
+        while True:
+            try:
+                requeued = await self.queue.recover(self._recovery_action)
+                if requeued:
+                    logger.warning(f"Requeued {len(requeued)} jobs whose worker stopped: {requeued}")
+            except Exception as e:
+                logger.error(f"Job recovery failed: {str(e)}")
+            await asyncio.sleep(self.settings.job_recovery_interval_seconds)
+
+    async def _worker(self, worker_id: int) -> None:
+        logger.info(f"Job worker {worker_id} started")
+        while True:
+            payload = await self.queue.get(timeout=1.0)
+            if payload is not None:
+                await self._run(payload)
+
+    def start(self, workers: Optional[int] = None) -> None:
+        """Start the worker tasks (and the recovery of lost jobs) on the running event loop"""
+        for worker_id in range(workers or self.settings.job_workers):
+            self._workers.append(asyncio.create_task(self._worker(worker_id)))
+        self._workers.append(asyncio.create_task(self._recover()))
+
+    async def stop(self) -> None:
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+
+
+@lru_cache()
+def get_job_manager() -> JobManager:
+    return JobManager()
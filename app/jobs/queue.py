@@ -0,0 +1,155 @@
+"""
+Job queues - where submitted documents wait for an extraction worker
+
+- InMemoryJobQueue: bounded asyncio.Queue, workers run inside the API process.
+  Jobs and their records only exist in that process: it cannot serve more than
+  one API worker process (a poll could land on another one), and queued jobs are
+  lost on restart.
+- RedisJobQueue: Redis list shared by API processes and standalone workers.
+  Taking a job moves it atomically to a processing list (BLMOVE) where it stays
+  until the worker acknowledges it, so a job whose worker crashed can be put back.
+
+Both are bounded: `put` raises QueueFullError instead of accepting unlimited work,
+which the API turns into a 503 so clients back off.
+"""
+
+import asyncio
+import json
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+class QueueFullError(Exception):
+    """Raised when the queue already holds its maximum number of jobs"""
+
+
+class JobQueue(ABC):
+    """Abstract FIFO queue of job payloads"""
+
+    # Whether jobs taken and not acknowledged survive the consumer (see recover)
+    durable = False
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+
+    @abstractmethod
+    async def put(self, payload: Dict[str, Any]) -> None:
+        """Enqueue a job, raising QueueFullError when the queue is full"""
+
+    @abstractmethod
+    async def get(self, timeout: float = 1.0) -> Optional[Dict[str, Any]]:
+        """Dequeue the next job, or None if nothing arrived within `timeout` seconds"""
+
+    @abstractmethod
+    async def size(self) -> int:
+        """Number of jobs waiting"""
+
+    async def ack(self, payload: Dict[str, Any]) -> None:
+        """Mark a job taken with `get` as handled (finished or failed for good)"""
+
+    def release(self, payload: Dict[str, Any]) -> None:
+        """Give up a job taken with `get` without acknowledging it, so `recover` can put it back"""
+
+    async def recover(self, decide: Callable[[Dict[str, Any]], Awaitable[str]]) -> List[str]:
+        """
+        Go over the jobs taken by other consumers and not acknowledged yet. `decide`
+        returns "requeue" (its worker died: put it back), "drop" (nothing left to
+        do) or "keep" (still running). Returns the ids of the requeued jobs.
+        """
+        return []
+
+
+class InMemoryJobQueue(JobQueue):
+    """Per-process asyncio queue"""
+
+    def __init__(self, max_size: int):
+        super().__init__(max_size)
+        self._queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=max_size)
+
+    async def put(self, payload: Dict[str, Any]) -> None:
+        try:
+            self._queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            raise QueueFullError(f"Job queue is full ({self.max_size} jobs)")
+
+    async def get(self, timeout: float = 1.0) -> Optional[Dict[str, Any]]:
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def size(self) -> int:
+        return self._queue.qsize()
+
+
+class RedisJobQueue(JobQueue):
+    """Redis list queue (LPUSH / BLMOVE to a processing list / LREM on ack)"""
+
+    durable = True
+
+    def __init__(self, max_size: int, host: str, port: int, password: Optional[str] = None,
+                 key: str = "jobs:document_extraction"):
+        super().__init__(max_size)
+        from redis.asyncio import Redis
+
+        self.client = Redis(host=host, port=port, password=password, decode_responses=True)
+        self.key = key
+        self.processing_key = f"{key}:processing"
+        # Raw list items of the jobs this process took, needed to remove them on ack
+        self._taken: Dict[str, str] = {}
+
+    async def put(self, payload: Dict[str, Any]) -> None:
+        if await self.client.llen(self.key) >= self.max_size:
+            raise QueueFullError(f"Job queue is full ({self.max_size} jobs)")
+        await self.client.lpush(self.key, json.dumps(payload))
+
+    async def get(self, timeout: float = 1.0) -> Optional[Dict[str, Any]]:
+        raw = await self.client.blmove(self.key, self.processing_key, max(int(timeout), 1), "RIGHT", "LEFT")
+        if raw is None:
+            return None
+        payload = json.loads(raw)
+        self._taken[payload["job_id"]] = raw
+        return payload
+
+    async def ack(self, payload: Dict[str, Any]) -> None:
+        raw = self._taken.pop(payload["job_id"], None)
+        if raw is not None:
+            await self.client.lrem(self.processing_key, 1, raw)
+
+    def release(self, payload: Dict[str, Any]) -> None:
+        self._taken.pop(payload["job_id"], None)
+
+    async def recover(self, decide: Callable[[Dict[str, Any]], Awaitable[str]]) -> List[str]:
+        requeued = []
+        for raw in await self.client.lrange(self.processing_key, 0, -1):
+            payload = json.loads(raw)
+            if payload["job_id"] in self._taken:
+                continue
+            action = await decide(payload)
+            if action == "keep":
+                continue
+            # Only the process that removes the item acts on it; requeued jobs go first
+            if await self.client.lrem(self.processing_key, 1, raw) and action == "requeue":
+                await self.client.rpush(self.key, raw)
+                requeued.append(payload["job_id"])
+        return requeued
+
+    async def size(self) -> int:
+        return await self.client.llen(self.key)
+
+
+def create_job_queue(settings) -> JobQueue:
+    """Build the job queue configured in settings ("memory" or "redis")"""
+    if not settings.job_queue_backend:
+        raise ValueError("Asynchronous jobs are disabled: set job_queue_backend (memory or redis)")
+    if settings.job_queue_backend == "memory":
+        return InMemoryJobQueue(settings.job_queue_max_size)
+    elif settings.job_queue_backend == "redis":
+        return RedisJobQueue(
+            settings.job_queue_max_size,
+            host=settings.redis_host,
+            port=settings.redis_port,
+            password=settings.redis_password,
+        )
+    else:
+        raise ValueError(f"Unknown job queue backend: {settings.job_queue_backend}")
@@ -0,0 +1,48 @@
+import json
+import time
+from typing import Any, Dict, Optional
+
+from app.cache.backends import CacheBackend, create_cache_backend
+
+
+class JobStore:
+    """
+    Job records (status, timestamps, result or error) kept with a TTL.
+    Uses the cache backends, so records live in process memory or in Redis
+    alongside the queue.
+    """
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+
+    @staticmethod
+    def _key(job_id: str) -> str:
+        return f"job:{job_id}"
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raw = await self.backend.get(self._key(job_id))
+        return json.loads(raw) if raw else None
+
+    async def save(self, job_id: str, record: Dict[str, Any]) -> None:
+        await self.backend.set(self._key(job_id), json.dumps(record, ensure_ascii=False, default=str))
+
+    async def delete(self, job_id: str) -> None:
+        await self.backend.delete(self._key(job_id))
+
+    async def update(self, job_id: str, **fields: Any) -> Dict[str, Any]:
+        record = await self.get(job_id) or {"job_id": job_id}
+        record.update(fields, updated_at=time.time())
+        await self.save(job_id, record)
+        return record
+
+
+def create_job_store(settings) -> JobStore:
+    """Job records use the same backend kind as the queue ("memory" or "redis")"""
+    backend = create_cache_backend(
+        settings.job_queue_backend,
+        namespace="jobs",
+        settings=settings,
+        ttl_seconds=settings.job_result_ttl_seconds,
+        max_entries=settings.job_store_max_entries,
+    )
+    return JobStore(backend)
@@ -0,0 +1,36 @@
+"""
+Standalone extraction worker
+
+Pulls jobs from the shared Redis queue so extraction can scale separately from
+the API processes (run those with job_workers_enabled=false):
+
+    JOB_QUEUE_BACKEND=redis python -m app.jobs.worker
+"""
+
+import asyncio
+import logging
+
+from app.config.config import get_settings
+from app.jobs.manager import get_job_manager
+from app.observability.spans import setup_logging
+from app.workflow.registry import graph_registry
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def main() -> None:
+    if get_settings().job_queue_backend != "redis":
+        raise RuntimeError("Standalone workers need the shared queue: set JOB_QUEUE_BACKEND=redis")
+    setup_logging()
+    graph_registry.warm_up()
+    manager = get_job_manager()
+    manager.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await manager.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
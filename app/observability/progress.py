@@ -0,0 +1,25 @@
+"""
+Progress events - custom stream chunks emitted from inside graph nodes
+
+Nodes that report progress declare LangGraph's injected `writer: StreamWriter`
+argument and hand it down to the code that emits the events:
+
+    emit_progress(writer, "ocr_page", page=3, total_pages=12, source="ocr")
+
+When the graph runs with `stream_mode="custom"` (the streaming validate endpoint)
+each call becomes a `{"event": ..., **data}` chunk as soon as it happens; under
+`ainvoke` the injected writer drops it, and outside a graph (no writer) nothing
+happens.
+
+The writer is passed explicitly instead of being read with `get_stream_writer()`:
+LangGraph only carries that context variable into async nodes on Python 3.11+.
+"""
+
+from typing import Any, Optional
+
+from langgraph.types import StreamWriter
+
+
+def emit_progress(writer: Optional[StreamWriter], event: str, **data: Any) -> None:
+    if writer is not None:
+        writer({"event": event, **data})
@@ -0,0 +1,95 @@
+"""
+Timing spans - one structured log event and one histogram sample per pipeline step
+
+    with span("ocr_request", component="mistral") as fields:
+        ...
+        fields["bytes_out"] = len(content)
+
+Every sample of the step histogram has the same labels: step, component (the
+provider or backend, "" when there is none) and status. Anything added to the
+yielded dict only goes to the log event. Events carry the context bound with
+`document_context` (e.g. the document digest), so every span of a request can be
+correlated.
+
+`setup_logging()` configures the JSON output once the process starts (API
+lifespan, job worker); until then structlog keeps its defaults.
+"""
+
+import inspect
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator
+
+import structlog
+from langgraph.types import StreamWriter
+
+from app.observability.metrics import NODE_SECONDS, STEP_SECONDS
+
+span_logger = structlog.get_logger("sctr.spans")
+
+
+def setup_logging(level: int = logging.INFO) -> None:
+    """JSON span and node events, filtered at `level`"""
+    structlog.configure(
+        processors=[
+            structlog.contextvars.merge_contextvars,
+            structlog.processors.add_log_level,
+            structlog.processors.TimeStamper(fmt="iso"),
+            structlog.processors.JSONRenderer(),
+        ],
+        wrapper_class=structlog.make_filtering_bound_logger(level),
+        cache_logger_on_first_use=True,
+    )
+
+
+def document_context(**context):
+    """Context manager attaching request context (document digest, file name, ...) to the spans logged inside it"""
+    return structlog.contextvars.bound_contextvars(**context)
+
+
+@contextmanager
+def span(step: str, component: str = "") -> Iterator[Dict[str, Any]]:
+    """Time a sub-step; works around awaits, so it can wrap async calls"""
+    fields: Dict[str, Any] = {}
+    status = "ok"
+    started = time.perf_counter()
+    try:
+        yield fields
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        seconds = time.perf_counter() - started
+        STEP_SECONDS.observe(seconds, step=step, component=component, status=status)
+        span_logger.info(
+            "span", step=step, component=component, status=status, duration_ms=round(seconds * 1000, 1), **fields
+        )
+
+
+def timed_node(name: str, node: Callable[..., Awaitable[Dict[str, Any]]]):
+    """
+    Wrap an async LangGraph node so its duration is logged and exported.
+    Nodes declaring a `writer` argument get LangGraph's stream writer passed through.
+    """
+    wants_writer = "writer" in inspect.signature(node).parameters
+
+    # LangGraph injects `writer` by looking at this signature (no functools.wraps:
+    # it would expose the wrapped node's signature instead)
+    async def _timed(state: Dict[str, Any], writer: StreamWriter) -> Dict[str, Any]:
+        status = "ok"
+        started = time.perf_counter()
+        try:
+            if wants_writer:
+                return await node(state, writer=writer)
+            return await node(state)
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            seconds = time.perf_counter() - started
+            NODE_SECONDS.observe(seconds, node=name, status=status)
+            span_logger.info("node", node=name, status=status, duration_ms=round(seconds * 1000, 1))
+
+    _timed.__name__ = name
+    return _timed
@@ -0,0 +1,172 @@
+"""
+HTTP client pool - long-lived httpx clients shared by the OCR and LLM providers
+
+One sync and one async client per provider, created on first use and closed on
+application shutdown, so every call reuses warm keep-alive connections instead
+of paying a TCP connect and TLS handshake. Pool sizes, keep-alive and HTTP/2 come
+from the `http_*` settings.
+
+Each client traces its requests: new TCP connections and TLS handshakes are
+counted (and timed) against the requests sent, which gives the connection reuse
+rate per provider (exported in /metrics and returned by `stats()`).
+"""
+
+import logging
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+import httpx
+
+from app.config.config import get_settings
+from app.observability.metrics import metrics
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+HTTP_REQUESTS = metrics.counter("sctr_http_requests_total", "Requests sent by the shared HTTP clients")
+HTTP_CONNECTIONS = metrics.counter(
+    "sctr_http_connections_total", "New TCP connections and TLS handshakes opened by the shared HTTP clients"
+)
+HTTP_CONNECT_SECONDS = metrics.histogram(
+    "sctr_http_connect_duration_seconds", "Time spent opening connections (TCP connect or TLS handshake)"
+)
+
+# httpcore trace events that open a connection, and the label they are counted under
+_CONNECT_EVENTS = {
+    "connection.connect_tcp": "tcp_connect",
+    "connection.start_tls": "tls_handshake",
+}
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class _ConnectionTracer:
+    """httpcore `trace` callback: counts and times connection set-up for one client"""
+
+    def __init__(self, pool: "HTTPClientPool", name: str):
+        self.pool = pool
+        self.name = name
+        self._started: Dict[str, float] = {}
+
+    def _record(self, event_name: str) -> None:
+        prefix, _, phase = event_name.rpartition(".")
+        event = _CONNECT_EVENTS.get(prefix)
+        if event is None:
+            return
+        # Each request gets its own tracer, so started/complete pairs do not mix
+        if phase == "started":
+            self._started[event] = time.perf_counter()
+        elif phase == "complete":
+            seconds = time.perf_counter() - self._started.pop(event, time.perf_counter())
+            HTTP_CONNECTIONS.inc(client=self.name, event=event)
+            HTTP_CONNECT_SECONDS.observe(seconds, client=self.name, event=event)
+            self.pool._count(self.name, event)
+
+    def sync(self, event_name: str, info: Dict[str, Any]) -> None:
+        self._record(event_name)
+
+    async def asynchronous(self, event_name: str, info: Dict[str, Any]) -> None:
+        self._record(event_name)
+
+
+class HTTPClientPool:
+    """
+    Shared httpx clients keyed by provider name ("openai", "mistral", ...).
+    Clients are thread-safe to hand out; async clients must be used from the
+    event loop of the application (they are closed by `aclose` on shutdown).
+    """
+
+    def __init__(self, settings=None):
+        self.settings = settings or get_settings()
+        self.http2 = self.settings.http2_enabled
+        if self.http2 and not _http2_available():
+            logger.warning("HTTP/2 requested but the h2 package is not installed; using HTTP/1.1")
+            self.http2 = False
+        self._sync: Dict[str, httpx.Client] = {}
+        self._async: Dict[str, httpx.AsyncClient] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def _options(self) -> Dict[str, Any]:
+        return {
+            "limits": httpx.Limits(
+                max_connections=self.settings.http_max_connections,
+                max_keepalive_connections=self.settings.http_max_keepalive_connections,
+                keepalive_expiry=self.settings.http_keepalive_expiry_seconds,
+            ),
+            # Providers pass their own per-call timeouts; these are the fallbacks
+            "timeout": httpx.Timeout(
+                self.settings.http_timeout_seconds, connect=self.settings.http_connect_timeout_seconds
+            ),
+            "http2": self.http2,
+        }
+
+    def _count(self, name: str, event: str) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(name, {"requests": 0, "tcp_connect": 0, "tls_handshake": 0})
+            stats[event] += 1
+
+    def _hooks(self, name: str, asynchronous: bool) -> Dict[str, list]:
+        def _on_request(request: httpx.Request) -> None:
+            tracer = _ConnectionTracer(self, name)
+            request.extensions["trace"] = tracer.asynchronous if asynchronous else tracer.sync
+            HTTP_REQUESTS.inc(client=name)
+            self._count(name, "requests")
+
+        async def _on_request_async(request: httpx.Request) -> None:
+            _on_request(request)
+
+        return {"request": [_on_request_async if asynchronous else _on_request]}
+
+    def client(self, name: str) -> httpx.Client:
+        """Shared synchronous client for `name`"""
+        with self._lock:
+            client = self._sync.get(name)
+            if client is None or client.is_closed:
+                client = self._sync[name] = httpx.Client(event_hooks=self._hooks(name, False), **self._options())
+            return client
+
+    def async_client(self, name: str) -> httpx.AsyncClient:
+        """Shared asynchronous client for `name`"""
+        with self._lock:
+            client = self._async.get(name)
+            if client is None or client.is_closed:
+                client = self._async[name] = httpx.AsyncClient(
+                    event_hooks=self._hooks(name, True), **self._options()
+                )
+            return client
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Requests, new connections and connection reuse rate per client"""
+        with self._lock:
+            result = {}
+            for name, stats in self._stats.items():
+                requests = stats["requests"]
+                reused = max(requests - stats["tcp_connect"], 0)
+                result[name] = {**stats, "reuse_rate": round(reused / requests, 3) if requests else 0.0}
+            return result
+
+    async def aclose(self) -> None:
+        """Close every client (application shutdown)"""
+        with self._lock:
+            sync_clients, async_clients = list(self._sync.values()), list(self._async.values())
+            self._sync.clear()
+            self._async.clear()
+        for client in async_clients:
+            await client.aclose()
+        for client in sync_clients:
+            client.close()
+
+
+@lru_cache()
+def get_http_clients() -> HTTPClientPool:
+    """Process-wide client pool"""
+    return HTTPClientPool()
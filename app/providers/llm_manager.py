@@ -8,22 +8,26 @@ including OpenAI, Anthropic, and Google Vertex AI. It includes:
 - Caching mechanisms
 - Error handling
 - Logging
+
+Provider SDKs are imported on first use: importing them all (Vertex AI alone takes
+seconds) slowed down every worker start even though only one provider is configured.
 """
 
 from enum import Enum
 import logging
-from functools import lru_cache
-from typing import Optional, Union
-from urllib.parse import urlparse
-
-import httpx
-from langchain_openai import AzureChatOpenAI, ChatOpenAI
-from langchain_anthropic import ChatAnthropic
-from langchain_google_vertexai import ChatVertexAI
-from langchain.callbacks.manager import CallbackManager
-from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple, Union
+
+from langchain_core.callbacks import CallbackManager, StreamingStdOutCallbackHandler
 from pydantic import BaseModel, Field
 
+from app.providers.http_clients import HTTPClientPool, get_http_clients
+
+if TYPE_CHECKING:
+    from langchain_anthropic import ChatAnthropic
+    from langchain_google_vertexai import ChatVertexAI
+    from langchain_openai import AzureChatOpenAI, ChatOpenAI
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -60,14 +64,27 @@ class LLMConfig(BaseModel):
 
 
 class LLMManager:
-    """Manager class for handling different LLM providers"""
+    """
+    Manager class for handling different LLM providers.
+    Model instances are cached per manager, and OpenAI and Azure models send their
+    requests through the shared HTTP client pool.
+    """
 
-    def __init__(self, config: LLMConfig = LLMConfig()):
+    def __init__(self, config: LLMConfig = LLMConfig(), http_clients: Optional[HTTPClientPool] = None):
         self.config = config
+        self.http_clients = http_clients or get_http_clients()
         self._callback_manager = CallbackManager([StreamingStdOutCallbackHandler()])
+        self._llms: Dict[Tuple, Any] = {}
+        self._lock = threading.Lock()
+
+    def _cached(self, key: Tuple, factory: Callable[[], Any]) -> Any:
+        with self._lock:
+            llm = self._llms.get(key)
+            if llm is None:
+                llm = self._llms[key] = factory()
+            return llm
 
-    @lru_cache(maxsize=4)
-    def get_openai_llm(self, model: str = "gpt-4o-mini", azure: bool = False) -> Union[ChatOpenAI, AzureChatOpenAI]:
+    def get_openai_llm(self, model: str = "gpt-4o-mini", azure: bool = False) -> Union["ChatOpenAI", "AzureChatOpenAI"]:
         """
         Get an OpenAI LLM instance with caching
 
@@ -83,40 +100,50 @@ class LLMManager:
             Exception: For other initialization errors
         """
         try:
-            if not azure:
-                return ChatOpenAI(
-                    model=model,
-                    temperature=self.config.temperature,
-                    streaming=self.config.streaming,
-                    max_tokens=self.config.max_tokens,
-                    callback_manager=self._callback_manager
-                )
-
-            if not all([
-                self.config.azure_deployment_name,
-                self.config.azure_api_base,
-                self.config.azure_api_version,
-                self.config.azure_api_key
-            ]):
-                raise ValueError("Incomplete Azure configuration")
-
-            return AzureChatOpenAI(
-                deployment_name=self.config.azure_deployment_name,
-                openai_api_base=self.config.azure_api_base,
-                openai_api_version=self.config.azure_api_version,
-                openai_api_key=self.config.azure_api_key,
+            return self._cached(("openai", model, azure), lambda: self._create_openai_llm(model, azure))
+        except Exception as e:
+            logger.error(f"Failed to initialize OpenAI LLM: {str(e)}")
+            raise
+
+    def _create_openai_llm(self, model: str, azure: bool) -> Union["ChatOpenAI", "AzureChatOpenAI"]:
+        from langchain_openai import AzureChatOpenAI, ChatOpenAI
+
+        client_name = "azure-openai" if azure else "openai"
+        http_clients = {
+            "http_client": self.http_clients.client(client_name),
+            "http_async_client": self.http_clients.async_client(client_name),
+        }
+        if not azure:
+            return ChatOpenAI(
+                model=model,
                 temperature=self.config.temperature,
                 streaming=self.config.streaming,
                 max_tokens=self.config.max_tokens,
-                callback_manager=self._callback_manager
+                callback_manager=self._callback_manager,
+                **http_clients
             )
 
-        except Exception as e:
-            logger.error(f"Failed to initialize OpenAI LLM: {str(e)}")
-            raise
-
-    @lru_cache(maxsize=2)
-    def get_anthropic_llm(self) -> ChatAnthropic:
+        if not all([
+            self.config.azure_deployment_name,
+            self.config.azure_api_base,
+            self.config.azure_api_version,
+            self.config.azure_api_key
+        ]):
+            raise ValueError("Incomplete Azure configuration")
+
+        return AzureChatOpenAI(
+            deployment_name=self.config.azure_deployment_name,
+            openai_api_base=self.config.azure_api_base,
+            openai_api_version=self.config.azure_api_version,
+            openai_api_key=self.config.azure_api_key,
+            temperature=self.config.temperature,
+            streaming=self.config.streaming,
+            max_tokens=self.config.max_tokens,
+            callback_manager=self._callback_manager,
+            **http_clients
+        )
+
+    def get_anthropic_llm(self) -> "ChatAnthropic":
         """
         Get an Anthropic Claude instance with caching
 
@@ -127,19 +154,21 @@ class LLMManager:
             Exception: For initialization errors
         """
         try:
-            return ChatAnthropic(
+            from langchain_anthropic import ChatAnthropic
+
+            # langchain_anthropic takes no client: it keeps its own process-wide httpx client
+            return self._cached(("anthropic",), lambda: ChatAnthropic(
                 model_name="claude-3-5-sonnet-20240620",
                 temperature=self.config.temperature,
                 max_tokens=self.config.max_tokens,
                 streaming=self.config.streaming,
                 callback_manager=self._callback_manager
-            )
+            ))
         except Exception as e:
             logger.error(f"Failed to initialize Anthropic LLM: {str(e)}")
             raise
 
-    @lru_cache(maxsize=1)
-    def get_google_llm(self) -> ChatVertexAI:
+    def get_google_llm(self) -> "ChatVertexAI":
         """
         Get a Google Vertex AI instance with caching
 
@@ -150,19 +179,22 @@ class LLMManager:
             Exception: For initialization errors
         """
         try:
-            return ChatVertexAI(
+            from langchain_google_vertexai import ChatVertexAI
+
+            # Vertex AI talks gRPC, outside the HTTP client pool
+            return self._cached(("google",), lambda: ChatVertexAI(
                 model_name="gemini-2.0-flash-exp",
                 temperature=self.config.temperature,
                 max_output_tokens=self.config.max_tokens,
                 streaming=self.config.streaming,
                 convert_system_message_to_human=True,
                 callback_manager=self._callback_manager
-            )
+            ))
         except Exception as e:
             logger.error(f"Failed to initialize Google Vertex AI LLM: {str(e)}")
             raise
 
-    def get_llm(self, llm_type: LLMType) -> Union[ChatOpenAI, AzureChatOpenAI, ChatAnthropic, ChatVertexAI]:
+    def get_llm(self, llm_type: LLMType) -> Union["ChatOpenAI", "AzureChatOpenAI", "ChatAnthropic", "ChatVertexAI"]:
         """
         Get an LLM instance based on the specified type
 
@@ -196,14 +228,31 @@ class LLMManager:
 
     def clear_caches(self):
         """Clear all LLM instance caches"""
-        self.get_openai_llm.cache_clear()
-        self.get_anthropic_llm.cache_clear()
-        self.get_google_llm.cache_clear()
+        with self._lock:
+            self._llms.clear()
+
+
+_managers: Dict[str, LLMManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_llm_manager(config: Optional[LLMConfig] = None) -> LLMManager:
+    """
+    Process-wide manager for a configuration, so agents and rebuilt graphs reuse
+    the same model instances (and their warm connections)
+    """
+    config = config or LLMConfig()
+    key = config.model_dump_json()
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = _managers[key] = LLMManager(config)
+        return manager
 
 
 # Example usage
 def get_default_llm(config: Optional[LLMConfig] = None) -> Union[
-    ChatOpenAI, AzureChatOpenAI, ChatAnthropic, ChatVertexAI]:
+    "ChatOpenAI", "AzureChatOpenAI", "ChatAnthropic", "ChatVertexAI"]:
     """
     Get a default LLM instance with optional configuration
 
@@ -213,5 +262,5 @@ def get_default_llm(config: Optional[LLMConfig] = None) -> Union[
     Returns:
         An initialized LLM instance using default settings
     """
-    manager = LLMManager(config or LLMConfig())
+    manager = get_llm_manager(config)
     return manager.get_llm(LLMType.get_default())
\ No newline at end of file
@@ -0,0 +1,373 @@
+"""
+LLM Router - latency-aware routing across the providers of LLMManager
+
+Keeps a rolling window of latencies and outcomes per provider and sends each call
+to the healthiest one:
+- providers whose error rate in the window exceeds the limit go last
+- the rest are ordered by their p95 latency (providers without enough samples
+  are assumed to have `llm_router_default_latency_seconds`)
+- failures and timeouts (`llm_timeout_seconds`) fall through to the next provider
+
+Calls are fully async and each provider has its own semaphore
+(`llm_provider_max_concurrency`), so a slow provider cannot take every slot.
+
+Token usage (including prompt tokens served from the provider's prefix cache) is
+read from each response and accumulated per provider.
+
+With hedging enabled, a second request goes to the next provider when the first has
+not answered after the hedge delay; the first answer wins and the other is cancelled.
+
+Structured calls can also be streamed (`on_text`): the schema is bound as a forced
+tool call and each fragment of its JSON arguments is handed to the caller as it
+arrives. Streamed calls are never hedged, and only fall back to the next provider
+when the failing one had not produced any output yet.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple, Type
+
+from langchain_core.messages import AIMessage, BaseMessage, SystemMessage
+from langchain_core.messages.ai import add_usage
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import BaseModel
+
+from app.config.config import get_settings
+from app.observability.metrics import BYTES, LLM_TOKENS
+from app.observability.spans import span
+from app.providers.llm_manager import LLMManager, LLMType
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Providers whose streamed responses only report token usage when asked to
+_STREAM_USAGE_PROVIDERS = (LLMType.GPT_4O_MINI, LLMType.GPT_4O, LLMType.AZURE_OPENAI)
+
+
+class PartialStreamError(Exception):
+    """A streamed call failed after part of its output was handed to the caller"""
+
+
+def _percentile(values: Sequence[float], percentile: float) -> float:
+    ordered = sorted(values)
+    index = min(int(round(percentile / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def usage_from_message(message: Any) -> Dict[str, int]:
+    """Token counts of one response, from LangChain's normalized usage metadata"""
+    metadata = getattr(message, "usage_metadata", None) or {}
+    details = metadata.get("input_token_details") or {}
+    return {
+        "llm_calls": 1,
+        "input_tokens": metadata.get("input_tokens", 0),
+        "cached_tokens": details.get("cache_read") or 0,
+        "output_tokens": metadata.get("output_tokens", 0),
+    }
+
+
+class ProviderStats:
+    """Rolling window of (timestamp, latency, ok) samples for one provider, plus token totals"""
+
+    def __init__(self, window_seconds: float, window_size: int):
+        self.window_seconds = window_seconds
+        self._samples: Deque[Tuple[float, float, bool]] = deque(maxlen=window_size)
+        self.in_flight = 0
+        self.tokens = {"input_tokens": 0, "cached_tokens": 0, "output_tokens": 0}
+
+    def record_usage(self, usage: Dict[str, int]) -> None:
+        for key in self.tokens:
+            self.tokens[key] += usage.get(key, 0)
+
+    def record(self, latency: float, ok: bool) -> None:
+        self._samples.append((time.monotonic(), latency, ok))
+
+    def _window(self) -> List[Tuple[float, float, bool]]:
+        horizon = time.monotonic() - self.window_seconds
+        while self._samples and self._samples[0][0] < horizon:
+            self._samples.popleft()
+        return list(self._samples)
+
+    def snapshot(self) -> Dict[str, Any]:
+        samples = self._window()
+        latencies = [latency for _, latency, ok in samples if ok]
+        errors = sum(1 for _, _, ok in samples if not ok)
+        return {
+            "samples": len(samples),
+            "p50_seconds": round(_percentile(latencies, 50), 3) if latencies else None,
+            "p95_seconds": round(_percentile(latencies, 95), 3) if latencies else None,
+            "error_rate": round(errors / len(samples), 3) if samples else 0.0,
+            "in_flight": self.in_flight,
+            **self.tokens,
+        }
+
+
+class LLMRouter:
+    """Routes chat/structured-output calls to the healthiest configured provider"""
+
+    def __init__(self, manager: LLMManager, providers: Optional[List[LLMType]] = None, settings=None):
+        """
+        Args:
+            manager: Builds the provider clients
+            providers: Candidate providers in order of preference.
+                If None, `settings.llm_router_providers`.
+            settings: Optional application settings. If None, will load default settings.
+        """
+        self.settings = settings or get_settings()
+        self.manager = manager
+        self.providers = providers or [
+            LLMType(name.strip()) for name in self.settings.llm_router_providers.split(",") if name.strip()
+        ]
+        if not self.providers:
+            raise ValueError("At least one LLM provider is required")
+        self.stats = {
+            provider: ProviderStats(self.settings.llm_router_window_seconds, self.settings.llm_router_window_size)
+            for provider in self.providers
+        }
+        self._semaphores = {
+            provider: asyncio.Semaphore(self.settings.llm_provider_max_concurrency) for provider in self.providers
+        }
+        self._runnables: Dict[Tuple[LLMType, Optional[Type[BaseModel]], bool], Any] = {}
+
+    @property
+    def primary(self) -> LLMType:
+        return self.providers[0]
+
+    def _expected_latency(self, provider: LLMType) -> float:
+        snapshot = self.stats[provider].snapshot()
+        if snapshot["p95_seconds"] is None or snapshot["samples"] < self.settings.llm_router_min_samples:
+            return self.settings.llm_router_default_latency_seconds
+        return snapshot["p95_seconds"]
+
+    def _is_unhealthy(self, provider: LLMType) -> bool:
+        snapshot = self.stats[provider].snapshot()
+        return (
+            snapshot["samples"] >= self.settings.llm_router_min_samples
+            and snapshot["error_rate"] > self.settings.llm_router_max_error_rate
+        )
+
+    def ranked(self) -> List[LLMType]:
+        """Providers from healthiest to least healthy; ties keep the configured order"""
+        return sorted(
+            self.providers,
+            key=lambda provider: (
+                self._is_unhealthy(provider),
+                self._expected_latency(provider),
+                self.providers.index(provider),
+            ),
+        )
+
+    def _runnable(self, provider: LLMType, schema: Optional[Type[BaseModel]], streaming: bool = False):
+        key = (provider, schema, streaming)
+        if key not in self._runnables:
+            llm = self.manager.get_llm(provider)
+            if streaming:
+                # The arguments of a forced tool call stream as plain JSON fragments
+                tool_name = convert_to_openai_tool(schema)["function"]["name"]
+                runnable = llm.bind_tools([schema], tool_choice=tool_name)
+                if provider in _STREAM_USAGE_PROVIDERS:
+                    runnable = runnable.bind(stream_usage=True)
+                self._runnables[key] = runnable
+            else:
+                # include_raw keeps the AIMessage, and with it the usage metadata
+                self._runnables[key] = llm.with_structured_output(schema, include_raw=True) if schema else llm
+        return self._runnables[key]
+
+    @staticmethod
+    def _prepare(provider: LLMType, messages: List[BaseMessage]) -> List[BaseMessage]:
+        """Anthropic only caches prefixes marked explicitly: mark the leading system message"""
+        if provider != LLMType.ANTHROPIC_CLAUDE or not messages or not isinstance(messages[0], SystemMessage):
+            return messages
+        if not isinstance(messages[0].content, str):
+            return messages
+        system = SystemMessage(content=[
+            {"type": "text", "text": messages[0].content, "cache_control": {"type": "ephemeral"}}
+        ])
+        return [system, *messages[1:]]
+
+    async def _stream(
+            self,
+            provider: LLMType,
+            messages: List[BaseMessage],
+            schema: Type[BaseModel],
+            on_text: Callable[[str], None],
+    ) -> Tuple[Any, AIMessage, int]:
+        """
+        Stream the tool-call arguments to `on_text` and parse them once complete.
+
+        Returns:
+            The parsed arguments, a message carrying the summed usage metadata,
+            and the size of the streamed JSON in bytes
+        """
+        fragments: List[str] = []
+        usage_metadata = None
+        try:
+            async for chunk in self._runnable(provider, schema, streaming=True).astream(messages):
+                # Chunks are not summed: merging re-parses the partial arguments every time
+                if chunk.usage_metadata:
+                    usage_metadata = add_usage(usage_metadata, chunk.usage_metadata)
+                for call in chunk.tool_call_chunks:
+                    # Only the first tool call carries the structured output
+                    if call.get("args") and (call.get("index") or 0) == 0:
+                        fragments.append(call["args"])
+                        on_text(call["args"])
+        except Exception as e:
+            if fragments:
+                raise PartialStreamError(f"{provider.value} failed mid-stream: {str(e)}") from e
+            raise
+
+        text = "".join(fragments)
+        if not text:
+            raise ValueError(f"{provider.value} returned no structured output")
+        return json.loads(text), AIMessage(content="", usage_metadata=usage_metadata), len(text.encode("utf-8"))
+
+    async def _invoke(
+            self,
+            provider: LLMType,
+            messages: List[BaseMessage],
+            schema: Optional[Type[BaseModel]],
+            on_text: Optional[Callable[[str], None]] = None,
+    ) -> Tuple[Any, Dict[str, int]]:
+        sent = sum(len(str(message.content).encode("utf-8")) for message in messages)
+        BYTES.inc(sent, stage="llm_request", direction="out")
+        with span("llm_call", component=provider.value) as fields:
+            fields["streamed"] = on_text is not None
+            if on_text is not None:
+                parsed, raw, received = await self._stream(
+                    provider, self._prepare(provider, messages), schema, on_text
+                )
+            else:
+                response = await self._runnable(provider, schema).ainvoke(self._prepare(provider, messages))
+                raw = response["raw"] if schema else response
+                received = len(str(raw.content).encode("utf-8"))
+            usage = usage_from_message(raw)
+            fields.update(bytes_out=sent, **usage)
+        BYTES.inc(received, stage="llm_response", direction="in")
+        for kind in ("input_tokens", "cached_tokens", "output_tokens"):
+            LLM_TOKENS.inc(usage[kind], provider=provider.value, kind=kind.replace("_tokens", ""))
+
+        if on_text is not None:
+            return parsed, usage
+        if not schema:
+            return response, usage
+        if response.get("parsing_error"):
+            raise response["parsing_error"]
+        return response["parsed"], usage
+
+    async def _call(
+            self,
+            provider: LLMType,
+            messages: List[BaseMessage],
+            schema: Optional[Type[BaseModel]],
+            on_text: Optional[Callable[[str], None]] = None,
+    ) -> Tuple[Any, Dict[str, int]]:
+        stats = self.stats[provider]
+        async with self._semaphores[provider]:
+            stats.in_flight += 1
+            started = time.perf_counter()
+            try:
+                result = await asyncio.wait_for(
+                    self._invoke(provider, messages, schema, on_text), timeout=self.settings.llm_timeout_seconds
+                )
+            except asyncio.CancelledError:
+                # A hedged loser or an abandoned request: its cut-short latency says nothing
+                # about the provider, so it is not sampled
+                raise
+            except asyncio.TimeoutError:
+                stats.record(time.perf_counter() - started, ok=False)
+                raise TimeoutError(
+                    f"{provider.value} did not answer within {self.settings.llm_timeout_seconds}s"
+                ) from None
+            except Exception:
+                stats.record(time.perf_counter() - started, ok=False)
+                raise
+            finally:
+                stats.in_flight -= 1
+        stats.record(time.perf_counter() - started, ok=True)
+        stats.record_usage(result[1])
+        return result
+
+    def _hedge_delay(self, provider: LLMType) -> float:
+        if self.settings.llm_hedge_after_seconds is not None:
+            return self.settings.llm_hedge_after_seconds
+        return self._expected_latency(provider)
+
+    async def ainvoke(self, messages: List[BaseMessage], schema: Optional[Type[BaseModel]] = None) -> Any:
+        """Invoke the healthiest provider and return only its response (see ainvoke_with_usage)"""
+        result, _ = await self.ainvoke_with_usage(messages, schema)
+        return result
+
+    async def ainvoke_with_usage(
+            self,
+            messages: List[BaseMessage],
+            schema: Optional[Type[BaseModel]] = None,
+            on_text: Optional[Callable[[str], None]] = None,
+    ) -> Tuple[Any, Dict[str, int]]:
+        """
+        Invoke the healthiest provider, falling back (and hedging, if enabled) to the next ones
+
+        Args:
+            messages: Chat messages
+            schema: Optional output schema for `with_structured_output`
+            on_text: Optional callback for the JSON of the structured output as it streams
+                (requires `schema`; disables hedging)
+
+        Returns:
+            The first successful response and its token usage
+
+        Raises:
+            PartialStreamError: A streamed call failed after producing output
+            Exception: The last provider error when every provider failed
+        """
+        if on_text is not None and schema is None:
+            raise ValueError("Streaming requires an output schema")
+        order = self.ranked()
+        # Two streams would interleave their fragments in the caller
+        hedge = self.settings.llm_hedge_enabled and on_text is None
+        pending: Dict[asyncio.Task, LLMType] = {}
+        last_error: Optional[BaseException] = None
+        next_index = 0
+
+        def _launch() -> None:
+            nonlocal next_index
+            provider = order[next_index]
+            next_index += 1
+            pending[asyncio.create_task(self._call(provider, messages, schema, on_text))] = provider
+
+        _launch()
+        try:
+            while pending:
+                can_hedge = hedge and next_index < len(order) and len(pending) == 1
+                timeout = self._hedge_delay(next(iter(pending.values()))) if can_hedge else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    logger.info(f"Hedging LLM call: {order[next_index].value} after {timeout:.2f}s")
+                    _launch()
+                    continue
+
+                for task in done:
+                    provider = pending.pop(task)
+                    if task.exception() is None:
+                        if provider != order[0]:
+                            logger.info(f"LLM call answered by {provider.value}")
+                        return task.result()
+                    last_error = task.exception()
+                    logger.warning(f"LLM provider {provider.value} failed: {str(last_error)}")
+                    if isinstance(last_error, PartialStreamError):
+                        # The caller already consumed part of this answer: another provider cannot resume it
+                        raise last_error
+
+                if not pending and next_index < len(order):
+                    _launch()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise last_error
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        return {provider.value: self.stats[provider].snapshot() for provider in self.providers}
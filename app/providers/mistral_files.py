@@ -0,0 +1,324 @@
+"""
+Mistral file objects - reuse and cleanup of the PDFs uploaded for OCR
+
+The OCR API reads documents from a signed URL of an uploaded file. Uploads are
+tracked by the SHA-256 of their content: the same PDF (or page) is uploaded once,
+and its file id and signed URL are reused until they expire. Uploads that stay idle
+longer than `mistral_file_ttl_seconds`, or that fall out of the LRU bound, are
+deleted from the provider by a background task, in concurrent batches.
+
+State is per worker process; a worker deletes its own uploads (all of them on
+shutdown when `mistral_file_delete_on_shutdown` is set).
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+import weakref
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, BinaryIO, Dict, List, Optional, Union
+
+from app.observability.metrics import BYTES, metrics
+from app.observability.spans import span
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FILE_EVENTS = metrics.counter(
+    "sctr_mistral_files_total", "Mistral file uploads, reuses, signed URLs and deletions by event"
+)
+LIVE_FILES = metrics.gauge("sctr_mistral_files_live", "Uploaded Mistral files not yet deleted, per worker")
+
+PDFContent = Union[bytes, BinaryIO]
+
+# Managers alive in this process, closed together on shutdown
+_managers: "weakref.WeakSet[MistralFileManager]" = weakref.WeakSet()
+
+
+def content_digest(content: PDFContent) -> str:
+    """SHA-256 of the bytes or of the file object (read in chunks, then rewound)"""
+    if isinstance(content, (bytes, bytearray)):
+        return hashlib.sha256(content).hexdigest()
+    digest = hashlib.sha256()
+    position = content.tell()
+    for chunk in iter(lambda: content.read(1024 * 1024), b""):
+        digest.update(chunk)
+    content.seek(position)
+    return digest.hexdigest()
+
+
+def content_size(content: PDFContent) -> int:
+    if isinstance(content, (bytes, bytearray)):
+        return len(content)
+    position = content.tell()
+    size = content.seek(0, 2) - position
+    content.seek(position)
+    return size
+
+
+@dataclass
+class RemoteFile:
+    """An uploaded file and its current signed URL"""
+    digest: str
+    file_id: str
+    last_used: float
+    signed_url: Optional[str] = None
+    url_expires_at: float = 0.0
+    # OCR calls currently reading this file (never deleted while > 0)
+    leases: int = 0
+    # Signed URL request in flight, shared by concurrent calls
+    signing: Optional[asyncio.Future] = None
+
+
+class MistralFileManager:
+    """
+    Maps content hashes to Mistral file ids and signed URLs.
+
+    Args:
+        client: Mistral SDK client
+        settings: Application settings (mistral_file_* and mistral_signed_url_*)
+    """
+
+    def __init__(self, client, settings):
+        self.client = client
+        self.settings = settings
+        self._timeout_ms = int(settings.ocr_timeout_seconds * 1000)
+        self._files: "OrderedDict[str, RemoteFile]" = OrderedDict()
+        self._uploading: Dict[str, asyncio.Future] = {}
+        self._pending_delete: List[str] = []
+        self._delete_attempts: Dict[str, int] = {}
+        self._gc_task: Optional[asyncio.Task] = None
+        _managers.add(self)
+
+    @asynccontextmanager
+    async def lease(
+            self, file_name: str, content: PDFContent, digest: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Signed URL of the content, uploading it only when no live upload exists.
+        The file is kept while the block runs; if the block fails, the upload is
+        dropped so a retry starts from a fresh one.
+
+        Args:
+            digest: SHA-256 of the content when the caller already has it (spooled uploads)
+        """
+        self._ensure_gc()
+        remote = await self._get_or_upload(file_name, content, digest)
+        remote.leases += 1
+        failed = False
+        try:
+            yield await self._signed_url(remote)
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            remote.leases -= 1
+            remote.last_used = time.monotonic()
+            if failed or not self.settings.mistral_file_reuse_enabled:
+                self._forget(remote.digest)
+
+    @staticmethod
+    async def _join(pending: asyncio.Future):
+        """
+        Wait for a request owned by another call. Returns None when that call was
+        cancelled (its caller went away), so the waiter can start its own.
+        """
+        try:
+            return await asyncio.shield(pending)
+        except asyncio.CancelledError:
+            if pending.cancelled():
+                return None
+            # This waiter was cancelled itself
+            raise
+
+    async def _get_or_upload(self, file_name: str, content: PDFContent, digest: Optional[str] = None) -> RemoteFile:
+        if digest is None:
+            if isinstance(content, (bytes, bytearray)):
+                digest = content_digest(content)
+            else:
+                # Whole documents are hashed off the event loop
+                digest = await asyncio.to_thread(content_digest, content)
+        while True:
+            remote = self._files.get(digest)
+            if remote is not None and self.settings.mistral_file_reuse_enabled:
+                self._files.move_to_end(digest)
+                remote.last_used = time.monotonic()
+                FILE_EVENTS.inc(event="upload_reused")
+                return remote
+
+            # Concurrent requests for the same content share one upload
+            pending = self._uploading.get(digest)
+            if pending is None:
+                break
+            remote = await self._join(pending)
+            if remote is not None:
+                return remote
+
+        future = asyncio.get_running_loop().create_future()
+        self._uploading[digest] = future
+        try:
+            remote = await self._upload(digest, file_name, content)
+            future.set_result(remote)
+            return remote
+        except asyncio.CancelledError:
+            # Waiters retry on their own instead of failing with this caller's cancellation
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody else may be waiting: retrieve it so it is not reported as unhandled
+            future.exception()
+            raise
+        finally:
+            self._uploading.pop(digest, None)
+
+    async def _upload(self, digest: str, file_name: str, content: PDFContent) -> RemoteFile:
+        size = content_size(content)
+        with span("mistral_upload") as fields:
+            uploaded = await self.client.files.upload_async(
+                file={"file_name": file_name, "content": content},
+                purpose="ocr",
+                timeout_ms=self._timeout_ms,
+            )
+            fields["bytes_out"] = size
+        BYTES.inc(size, stage="mistral_upload", direction="out")
+        FILE_EVENTS.inc(event="uploaded")
+
+        remote = RemoteFile(digest=digest, file_id=uploaded.id, last_used=time.monotonic())
+        self._files[digest] = remote
+        self._evict_over_limit()
+        LIVE_FILES.set(len(self._files))
+        return remote
+
+    async def _signed_url(self, remote: RemoteFile) -> str:
+        margin = self.settings.mistral_signed_url_margin_seconds
+        if remote.signed_url and time.monotonic() < remote.url_expires_at - margin:
+            FILE_EVENTS.inc(event="signed_url_reused")
+            return remote.signed_url
+
+        while remote.signing is not None:
+            signed_url = await self._join(remote.signing)
+            if signed_url is not None:
+                return signed_url
+
+        signing = remote.signing = asyncio.get_running_loop().create_future()
+        try:
+            expiry_hours = self.settings.mistral_signed_url_expiry_hours
+            requested_at = time.monotonic()
+            with span("mistral_signed_url"):
+                signed = await self.client.files.get_signed_url_async(
+                    file_id=remote.file_id,
+                    expiry=expiry_hours,
+                    timeout_ms=self._timeout_ms,
+                )
+            FILE_EVENTS.inc(event="signed_url")
+            remote.signed_url = signed.url
+            remote.url_expires_at = requested_at + expiry_hours * 3600
+            signing.set_result(remote.signed_url)
+            return remote.signed_url
+        except asyncio.CancelledError:
+            signing.cancel()
+            raise
+        except Exception as e:
+            signing.set_exception(e)
+            signing.exception()
+            raise
+        finally:
+            remote.signing = None
+
+    def _forget(self, digest: str) -> None:
+        """Stop reusing an upload and queue it for deletion once no call reads it"""
+        remote = self._files.get(digest)
+        if remote is None or remote.leases > 0:
+            return
+        del self._files[digest]
+        self._pending_delete.append(remote.file_id)
+        LIVE_FILES.set(len(self._files))
+
+    def _evict_over_limit(self) -> None:
+        idle = [digest for digest, remote in self._files.items() if remote.leases == 0]
+        for digest in idle[:max(len(self._files) - self.settings.mistral_file_max_entries, 0)]:
+            self._forget(digest)
+
+    def _collect_expired(self) -> None:
+        deadline = time.monotonic() - self.settings.mistral_file_ttl_seconds
+        for digest in [digest for digest, remote in self._files.items() if remote.last_used < deadline]:
+            self._forget(digest)
+
+    async def _delete_batch(self, file_ids: List[str]) -> None:
+        results = await asyncio.gather(
+            *(self.client.files.delete_async(file_id=file_id, timeout_ms=self._timeout_ms) for file_id in file_ids),
+            return_exceptions=True,
+        )
+        for file_id, result in zip(file_ids, results):
+            # Already gone (deleted elsewhere or expired) counts as deleted
+            if not isinstance(result, Exception) or getattr(result, "status_code", None) == 404:
+                FILE_EVENTS.inc(event="deleted")
+                self._delete_attempts.pop(file_id, None)
+                continue
+            FILE_EVENTS.inc(event="delete_failed")
+            attempts = self._delete_attempts[file_id] = self._delete_attempts.get(file_id, 0) + 1
+            if attempts < self.settings.mistral_file_delete_max_attempts:
+                self._pending_delete.append(file_id)
+            else:
+                self._delete_attempts.pop(file_id, None)
+                logger.warning(f"Giving up deleting Mistral file {file_id}: {str(result)}")
+
+    async def collect(self, everything: bool = False) -> int:
+        """
+        Queue expired uploads (or every idle upload) and delete the queue in batches.
+
+        Returns:
+            Number of files sent for deletion
+        """
+        if everything:
+            for digest in list(self._files):
+                self._forget(digest)
+        else:
+            self._collect_expired()
+
+        batch_size = max(self.settings.mistral_file_gc_batch_size, 1)
+        queued, self._pending_delete = self._pending_delete, []
+        for start in range(0, len(queued), batch_size):
+            with span("mistral_file_gc") as fields:
+                fields["files"] = len(queued[start:start + batch_size])
+                await self._delete_batch(queued[start:start + batch_size])
+        if queued:
+            logger.info(f"Deleted {len(queued)} Mistral files ({len(self._files)} still reusable)")
+        return len(queued)
+
+    def _ensure_gc(self) -> None:
+        """Start the background collector on the running loop (again if a previous loop ended)"""
+        if self._gc_task is None or self._gc_task.done():
+            self._gc_task = asyncio.get_running_loop().create_task(self._gc_loop())
+
+    async def _gc_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.settings.mistral_file_gc_interval_seconds)
+            try:
+                await self.collect()
+            except Exception as e:
+                logger.error(f"Mistral file collection failed: {str(e)}")
+
+    async def aclose(self) -> None:
+        """Stop the collector and delete the remaining uploads when configured to"""
+        if self._gc_task is not None and not self._gc_task.done():
+            self._gc_task.cancel()
+            try:
+                await self._gc_task
+            except asyncio.CancelledError:
+                pass
+        self._gc_task = None
+        await self.collect(everything=self.settings.mistral_file_delete_on_shutdown)
+
+
+async def close_file_managers() -> None:
+    """Close every file manager of the process (application shutdown)"""
+    for manager in list(_managers):
+        try:
+            await manager.aclose()
+        except Exception as e:
+            logger.error(f"Could not clean up Mistral files: {str(e)}")
@@ -0,0 +1,223 @@
+"""
+OCR backends - interchangeable engines behind the document extractor
+
+Every backend takes a PDF (whole document or a single page) and returns the
+markdown of each of its pages, in page order:
+- MistralOCRBackend: Mistral OCR API (requires MISTRAL_API_KEY)
+- TextLayerOCRBackend: embedded PDF text read with PyMuPDF, fully offline
+- ReplayOCRBackend: deterministic responses from recorded JSON fixtures, for
+  offline runs, load tests and benchmarks; it can also record a live backend
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from typing import BinaryIO, List, Optional, Union
+
+import fitz
+
+from app.agent.text_layer import page_markdown
+from app.observability.metrics import BYTES
+from app.observability.spans import span
+from app.providers.http_clients import get_http_clients
+from app.providers.mistral_files import MistralFileManager
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PDFContent = Union[bytes, BinaryIO]
+
+
+class OCRFixtureNotFoundError(LookupError):
+    """Raised by the replay backend when no fixture matches a document"""
+
+
+def _read_content(content: PDFContent) -> bytes:
+    return content if isinstance(content, bytes) else content.read()
+
+
+class OCRBackend(ABC):
+    """Abstract OCR engine"""
+
+    # Identifies the engine in OCR cache keys
+    name: str = "ocr"
+    # Whether scanned pages should be cleaned up (image_preprocessing) before this engine
+    wants_preprocessing: bool = True
+
+    @property
+    def model(self) -> str:
+        return self.name
+
+    @abstractmethod
+    async def process(self, file_name: str, content: PDFContent, digest: Optional[str] = None) -> List[str]:
+        """
+        Return the markdown of each page of the PDF, in page order
+
+        Args:
+            digest: SHA-256 of the content when the caller already computed it
+        """
+
+    async def aclose(self) -> None:
+        """Release network clients or other resources"""
+
+
+class MistralOCRBackend(OCRBackend):
+    """
+    Upload, sign and OCR a PDF with the Mistral API.
+    Uploads go through MistralFileManager, which reuses them by content hash and
+    deletes them in the background.
+    """
+
+    name = "mistral"
+
+    def __init__(self, settings):
+        api_key = settings.mistral_api_key or os.getenv("MISTRAL_API_KEY")
+        if not api_key:
+            raise ValueError("MISTRAL_API_KEY environment variable is required")
+        # The SDK is only imported when this backend is selected
+        from mistralai import Mistral
+
+        self.settings = settings
+        http_clients = get_http_clients()
+        self.client = Mistral(
+            api_key=api_key,
+            server_url=settings.mistral_server_url,
+            client=http_clients.client(self.name),
+            async_client=http_clients.async_client(self.name),
+        )
+        self._timeout_ms = int(settings.ocr_timeout_seconds * 1000)
+        self.files = MistralFileManager(self.client, settings)
+
+    @property
+    def model(self) -> str:
+        return self.settings.ocr_model
+
+    async def process(self, file_name: str, content: PDFContent, digest: Optional[str] = None) -> List[str]:
+        from mistralai import DocumentURLChunk
+
+        # Subir el archivo (o reutilizar la copia ya subida) y obtener su URL firmada
+        async with self.files.lease(file_name, content, digest) as signed_url:
+            # Procesar el documento con OCR
+            with span("mistral_ocr") as fields:
+                ocr_response = await self.client.ocr.process_async(
+                    document=DocumentURLChunk(document_url=signed_url),
+                    model=self.settings.ocr_model,
+                    timeout_ms=self._timeout_ms,
+                )
+                pages = [page.markdown for page in sorted(ocr_response.pages, key=lambda page: page.index)]
+                received = sum(len(page.encode("utf-8")) for page in pages)
+                fields.update(pages=len(pages), bytes_in=received)
+        BYTES.inc(received, stage="mistral_ocr", direction="in")
+        return pages
+
+
+class TextLayerOCRBackend(OCRBackend):
+    """
+    Offline engine: returns the embedded text of every page, whatever its quality.
+    Image-only pages come back empty.
+    """
+
+    name = "text-layer"
+    wants_preprocessing = False
+
+    def __init__(self, settings):
+        self.settings = settings
+
+    def _extract(self, content: bytes) -> List[str]:
+        with fitz.open(stream=content, filetype="pdf") as document:
+            return [page_markdown(page, self.settings.text_layer_tables) for page in document]
+
+    async def process(self, file_name: str, content: PDFContent, digest: Optional[str] = None) -> List[str]:
+        return await asyncio.to_thread(self._extract, _read_content(content))
+
+
+class ReplayOCRBackend(OCRBackend):
+    """
+    Serves recorded OCR responses from `<fixtures_dir>/<sha256 of the PDF>.json`,
+    falling back to `default.json`. Each fixture is `{"file_name": ..., "pages": [...]}`.
+
+    With `record` set and an inner backend, misses are forwarded to it and the
+    response is saved as a new fixture.
+    """
+
+    name = "replay"
+
+    def __init__(
+            self,
+            fixtures_dir: str,
+            latency_seconds: float = 0.0,
+            inner: Optional[OCRBackend] = None,
+            record: bool = False,
+    ):
+        self.fixtures_dir = fixtures_dir
+        self.latency_seconds = latency_seconds
+        self.inner = inner
+        self.record = record and inner is not None
+
+    @property
+    def model(self) -> str:
+        return self.inner.model if self.inner else self.name
+
+    def _fixture_path(self, key: str) -> str:
+        return os.path.join(self.fixtures_dir, f"{key}.json")
+
+    def _load(self, digest: str) -> Optional[List[str]]:
+        for key in (digest, "default"):
+            path = self._fixture_path(key)
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as fixture:
+                    return json.load(fixture)["pages"]
+        return None
+
+    def _save(self, digest: str, file_name: str, pages: List[str]) -> None:
+        os.makedirs(self.fixtures_dir, exist_ok=True)
+        with open(self._fixture_path(digest), "w", encoding="utf-8") as fixture:
+            json.dump({"file_name": file_name, "pages": pages}, fixture, ensure_ascii=False, indent=2)
+
+    async def process(self, file_name: str, content: PDFContent, digest: Optional[str] = None) -> List[str]:
+        data = _read_content(content)
+        digest = digest or hashlib.sha256(data).hexdigest()
+        if self.record:
+            # Recording must capture the live response, not a default fixture
+            pages = None
+        else:
+            pages = await asyncio.to_thread(self._load, digest)
+
+        if pages is None:
+            if self.inner is None:
+                raise OCRFixtureNotFoundError(f"No OCR fixture for {file_name} ({digest[:12]}) in {self.fixtures_dir}")
+            pages = await self.inner.process(file_name, data, digest)
+            if self.record:
+                await asyncio.to_thread(self._save, digest, file_name, pages)
+                logger.info(f"Recorded OCR fixture for {file_name} ({digest[:12]})")
+        elif self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        return pages
+
+    async def aclose(self) -> None:
+        if self.inner:
+            await self.inner.aclose()
+
+
+def create_ocr_backend(settings) -> OCRBackend:
+    """
+    Build the OCR backend selected by `settings.ocr_backend`
+
+    Raises:
+        ValueError: For unknown backend names, or the Mistral backend without an API key
+    """
+    kind = settings.ocr_backend
+    if kind == "mistral":
+        backend = MistralOCRBackend(settings)
+        if settings.ocr_replay_record:
+            return ReplayOCRBackend(settings.ocr_replay_dir, inner=backend, record=True)
+        return backend
+    elif kind == "text_layer":
+        return TextLayerOCRBackend(settings)
+    elif kind == "replay":
+        return ReplayOCRBackend(settings.ocr_replay_dir, latency_seconds=settings.ocr_replay_latency_seconds)
+    else:
+        raise ValueError(f"Unknown OCR backend: {kind}")
@@ -1,12 +1,16 @@
-from langgraph.graph import StateGraph
+from typing import TYPE_CHECKING
 
-from app.workflow.document_extraction_graph import DocumentExtractionGraph
+if TYPE_CHECKING:
+    from langgraph.graph import StateGraph
 
 
 class GraphDirector:
     """Director que maneja la construcción de grafos"""
 
     @staticmethod
-    def document_extraction() -> StateGraph:
+    def document_extraction() -> "StateGraph":
+        # Los agentes (OCR, LLM, PyMuPDF...) se importan al construir el grafo, no al registrarlo
+        from app.workflow.document_extraction_graph import DocumentExtractionGraph
+
         builder = DocumentExtractionGraph()
-        return builder.build()
\ No newline at end of file
+        return builder.build()
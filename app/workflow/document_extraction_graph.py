@@ -7,7 +7,11 @@ import logging
 
 from app.agent.document_extractor import DocumentExtractorAgent
 from app.agent.extraction_state import DocumentValidationDetails
+from app.agent.person_matcher import PersonMatcher
+from app.agent.rule_extractor import RuleBasedExtractor
 from app.agent.structured_content import StructuredContentExtractor
+from app.agent.text_layer import TextLayerReader
+from app.observability.spans import timed_node
 from app.workflow.builder.base import GraphBuilder
 
 # Configure logging
@@ -22,22 +26,40 @@ class DocumentExtractionGraph(GraphBuilder):
     def __init__(self):
         """Initialize workflow builder with necessary agents"""
         super().__init__()
+        self.text_layer = TextLayerReader()
         self.extractor = DocumentExtractorAgent()
+        self.rule_extractor = RuleBasedExtractor()
         self.segmenter = StructuredContentExtractor()
+        self.matcher = PersonMatcher()
 
     def init_graph(self) -> None:
         self.graph = StateGraph(DocumentValidationDetails)
 
     def add_nodes(self) -> None:
         """Add all required nodes to the graph"""
-        # Add the document extraction node
-        self.graph.add_node("extract_document", self.extractor.extract_document_content)
-        self.graph.add_node("structure_content", self.segmenter.document_processor)
+        # Add the document extraction nodes (local text layer first, then OCR)
+        nodes = {
+            "read_text_layer": self.text_layer.read,
+            "extract_document": self.extractor.extract_document_content,
+            "rule_extract": self.rule_extractor.extract,
+            "structure_content": self.segmenter.document_processor,
+            "match_person": self.matcher.match,
+        }
+        # Every node is timed (structured log + sctr_graph_node_duration_seconds)
+        for name, node in nodes.items():
+            self.graph.add_node(name, timed_node(name, node))
 
     def add_edges(self) -> None:
         """Define all edges in the graph"""
-        # Start -> extract_document
-        self.graph.add_edge(START, "extract_document")
-        self.graph.add_edge("extract_document", "structure_content")
-        # Error handler always ends the workflow
-        self.graph.add_edge("structure_content", END)
+        # Start -> read_text_layer -> extract_document
+        self.graph.add_edge(START, "read_text_layer")
+        self.graph.add_edge("read_text_layer", "extract_document")
+        self.graph.add_edge("extract_document", "rule_extract")
+        # Known insurer layouts skip the LLM segmentation
+        self.graph.add_conditional_edges(
+            "rule_extract",
+            self.rule_extractor.route,
+            {"structure_content": "structure_content", "match_person": "match_person"},
+        )
+        self.graph.add_edge("structure_content", "match_person")
+        self.graph.add_edge("match_person", END)
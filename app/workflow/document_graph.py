@@ -1,3 +1,18 @@
+from functools import lru_cache
+
+from langgraph.graph import StateGraph
+
 from app.workflow.director import GraphDirector
 
-document_graph = GraphDirector.document_extraction()
\ No newline at end of file
+
+@lru_cache()
+def get_document_graph() -> StateGraph:
+    """Construye el grafo (y sus agentes) la primera vez que se pide"""
+    return GraphDirector.document_extraction()
+
+
+def __getattr__(name: str):
+    # `document_graph` se resuelve al accederlo (langgraph.json lo referencia), no al importar el módulo
+    if name == "document_graph":
+        return get_document_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
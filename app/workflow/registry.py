@@ -0,0 +1,86 @@
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Dict, Optional
+
+from app.observability.metrics import GRAPH_COMPILES, GRAPH_COMPILE_SECONDS
+from app.workflow.director import GraphDirector
+
+if TYPE_CHECKING:
+    # langgraph se carga al compilar el primer grafo, no al importar la aplicación
+    from langgraph.graph import StateGraph
+    from langgraph.graph.state import CompiledStateGraph
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DOCUMENT_EXTRACTION_GRAPH = "document_extraction"
+
+
+class GraphRegistry:
+    """
+    Registro de grafos compilados.
+
+    Cada grafo se construye con su fábrica (normalmente un método de GraphDirector)
+    y se compila una sola vez por worker; las peticiones reutilizan la instancia
+    compilada. `swap` permite recompilar en caliente: el nuevo grafo se compila
+    antes de reemplazar al anterior, así las ejecuciones en curso no se ven afectadas.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], "StateGraph"]] = {}
+        self._compiled: Dict[str, "CompiledStateGraph"] = {}
+        self._metrics: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[[], "StateGraph"]) -> None:
+        """Registra la fábrica que construye el grafo `name`"""
+        self._factories[name] = factory
+
+    def compile(self, name: str) -> "CompiledStateGraph":
+        """Construye y compila el grafo `name`, reemplazando la versión anterior"""
+        if name not in self._factories:
+            raise KeyError(f"Unknown graph: {name}")
+
+        started = time.perf_counter()
+        compiled = self._factories[name]().compile()
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            self._compiled[name] = compiled
+            previous = self._metrics.get(name, {})
+            self._metrics[name] = {
+                "compile_seconds": elapsed,
+                "compile_count": previous.get("compile_count", 0) + 1,
+                "compiled_at": time.time(),
+            }
+
+        GRAPH_COMPILE_SECONDS.set(elapsed, graph=name)
+        GRAPH_COMPILES.inc(graph=name)
+        logger.info(f"Compiled graph '{name}' in {elapsed * 1000:.1f} ms")
+        return compiled
+
+    def warm_up(self) -> None:
+        """Compila todos los grafos registrados (se llama al iniciar la aplicación)"""
+        for name in self._factories:
+            self.compile(name)
+
+    def get(self, name: str) -> "CompiledStateGraph":
+        """Retorna el grafo compilado, compilándolo si todavía no se ha hecho"""
+        compiled = self._compiled.get(name)
+        return compiled if compiled is not None else self.compile(name)
+
+    def swap(self, name: str, factory: Optional[Callable[[], "StateGraph"]] = None) -> "CompiledStateGraph":
+        """Recompila en caliente el grafo `name`, opcionalmente con una nueva fábrica"""
+        if factory is not None:
+            self.register(name, factory)
+        return self.compile(name)
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        """Retorna las métricas de compilación por grafo"""
+        with self._lock:
+            return {name: dict(values) for name, values in self._metrics.items()}
+
+
+graph_registry = GraphRegistry()
+graph_registry.register(DOCUMENT_EXTRACTION_GRAPH, GraphDirector.document_extraction)
@@ -0,0 +1,105 @@
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from app.agent.extraction_state import DocumentValidationDetails
+from app.agent.ingestion import SpooledDocument
+from app.observability.spans import document_context
+from app.workflow.registry import graph_registry, DOCUMENT_EXTRACTION_GRAPH
+
+
+def _initial_state(
+        document: SpooledDocument,
+        person_name: str,
+        user_date: Optional[str],
+        reocr_pages: Optional[List[int]],
+        stream_progress: bool = False,
+) -> DocumentValidationDetails:
+    return DocumentValidationDetails(
+        file_path=document.path,
+        file_name=document.file_name,
+        file_sha256=document.sha256,
+        file_size=document.size,
+        person_name=person_name,
+        user_date=user_date,
+        reocr_pages=reocr_pages or [],
+        stream_progress=stream_progress,
+    )
+
+
+def _format_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "extracted_text": result["extracted_text"],
+        "component": result["structured_content"],
+        "person_name": result["person_name"],
+        "segmented_sections": result["segmented_sections"],
+        "person_match": result["person_match"],
+        "page_sources": result.get("page_sources", []),
+        "prompt_stats": result.get("prompt_stats"),
+    }
+
+
+async def run_document_validation(
+        document: SpooledDocument,
+        person_name: str,
+        user_date: Optional[str] = None,
+        reocr_pages: Optional[List[int]] = None,
+) -> Dict[str, Any]:
+    """Ejecuta el grafo de extracción compilado y da formato a la respuesta"""
+    state = _initial_state(document, person_name, user_date, reocr_pages)
+    component = graph_registry.get(DOCUMENT_EXTRACTION_GRAPH)
+    with document_context(document=document.sha256[:12], file_name=document.file_name):
+        result = await component.ainvoke(state)
+    return _format_result(result)
+
+
+def _node_events(node: str, update: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+    """Eventos que se envían al cliente cuando termina un nodo"""
+    if node == "read_text_layer":
+        pages = update.get("text_layer_pages") or []
+        return [("text_layer", {
+            "total_pages": len(pages),
+            "usable_pages": sum(1 for page in pages if page is not None),
+        })]
+    if node == "extract_document":
+        return [("extracted_text", {
+            "extracted_text": update.get("extracted_text", ""),
+            "page_sources": update.get("page_sources", []),
+        })]
+    if node in ("rule_extract", "structure_content") and update.get("segmented_sections"):
+        sections = update["segmented_sections"].get("content") or []
+        source = "rules" if node == "rule_extract" else "llm"
+        return [
+            ("section", {"index": index, "total_sections": len(sections), "source": source, "section": section})
+            for index, section in enumerate(sections)
+        ]
+    if node == "match_person":
+        return [("person_match", update.get("person_match") or {})]
+    return []
+
+
+async def stream_document_validation(
+        document: SpooledDocument,
+        person_name: str,
+        user_date: Optional[str] = None,
+        reocr_pages: Optional[List[int]] = None,
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Ejecuta el grafo en modo streaming y produce `(evento, datos)` a medida que avanza:
+    progreso de OCR por página, texto extraído, las filas de asegurados a medida que
+    el LLM las escribe (`person_found` apenas aparece la persona buscada), cada
+    constancia segmentada, el resultado del match y, al final, la misma respuesta
+    que `run_document_validation`
+    """
+    state = _initial_state(document, person_name, user_date, reocr_pages, stream_progress=True)
+    component = graph_registry.get(DOCUMENT_EXTRACTION_GRAPH)
+    result: Dict[str, Any] = dict(state)
+    with document_context(document=document.sha256[:12], file_name=document.file_name):
+        async for mode, chunk in component.astream(state, stream_mode=["updates", "custom"]):
+            if mode == "custom":
+                chunk = dict(chunk)
+                yield chunk.pop("event", "progress"), chunk
+                continue
+            for node, update in chunk.items():
+                result.update(update or {})
+                for event in _node_events(node, update or {}):
+                    yield event
+    yield "result", _format_result(result)
@@ -0,0 +1,92 @@
+"""
+Concurrency benchmark for the segmentation LLM call.
+
+Runs N segmentation calls at once against a local fake OpenAI server, first with the
+blocking `invoke` the node used to make, then through the async router, and reports
+wall time, the peak number of requests the server saw in flight and the worst
+event-loop stall.
+
+Usage:
+    python -m benchmarks.bench_llm_concurrency --requests 16 --latency 0.5
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+for _key in ("MISTRAL_API_KEY", "OPENAI_API_KEY"):
+    os.environ.setdefault(_key, "benchmark")
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from app.agent.extraction_state import DocumentStructuredContent
+from app.agent.structured_content import StructuredContentExtractor
+from app.config.config import get_settings
+from app.providers.http_clients import get_http_clients
+from benchmarks.fake_openai import FakeOpenAIServer
+from benchmarks.load_ocr import _heartbeat
+
+SAMPLE_TEXT = "CONSTANCIA Nº 4440435\nRIMAC SEGUROS Y REASEGUROS\n" * 20
+
+
+async def _measure(calls) -> tuple:
+    stop = asyncio.Event()
+    heartbeat = asyncio.create_task(_heartbeat(stop))
+    started = time.perf_counter()
+    await asyncio.gather(*calls)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    return elapsed, await heartbeat
+
+
+async def _blocking(extractor: StructuredContentExtractor, requests: int) -> tuple:
+    structured = extractor.llm_manager.get_llm(extractor.router.primary).with_structured_output(
+        DocumentStructuredContent
+    )
+    messages = [SystemMessage(content=SAMPLE_TEXT), HumanMessage(content="segment")]
+
+    async def _call():
+        return structured.invoke(messages)
+
+    return await _measure(_call() for _ in range(requests))
+
+
+async def _async(extractor: StructuredContentExtractor, requests: int) -> tuple:
+    return await _measure(extractor._segment(f"{SAMPLE_TEXT}{index}") for index in range(requests))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake completion latency in seconds")
+    parser.add_argument("--concurrency", type=int, default=8, help="llm_provider_max_concurrency")
+    args = parser.parse_args()
+
+    with FakeOpenAIServer(latency=args.latency) as server:
+        os.environ["OPENAI_API_BASE"] = server.url
+        settings = get_settings().model_copy(update={
+            "llm_router_providers": "gpt-4o-mini",
+            "llm_provider_max_concurrency": args.concurrency,
+            "segmentation_cache_enabled": False,
+        })
+        extractor = StructuredContentExtractor(settings)
+
+        results = {}
+        for name, run in (("blocking invoke", _blocking), ("async router", _async)):
+            server.app.state.max_in_flight = 0
+            results[name] = asyncio.run(run(extractor, args.requests)) + (server.app.state.max_in_flight,)
+
+    print(f"{args.requests} requests, {args.latency}s fake latency, provider limit {args.concurrency}")
+    print(f"{'mode':<18}{'wall s':>9}{'in flight':>11}{'worst stall ms':>16}")
+    for name, (elapsed, stall, in_flight) in results.items():
+        print(f"{name:<18}{elapsed:>9.2f}{in_flight:>11}{stall * 1000:>16.1f}")
+    for client, stats in get_http_clients().stats().items():
+        print(
+            f"{client} client: {stats['requests']} requests over {stats['tcp_connect']} connections "
+            f"(reuse rate {stats['reuse_rate']:.0%})"
+        )
+
+
+if __name__ == "__main__":
+    main()
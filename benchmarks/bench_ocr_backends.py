@@ -0,0 +1,105 @@
+"""
+Throughput and latency of each OCR backend, without network access.
+
+Generates born-digital sample PDFs and runs them through
+DocumentExtractorAgent._process_with_ocr with the OCR cache disabled:
+- text_layer: embedded text read locally
+- replay: fixtures recorded from the text_layer backend, plus optional latency
+- mistral: the real client against the local fake Mistral server
+
+Usage:
+    python -m benchmarks.bench_ocr_backends --documents 32 --pages 3 --concurrency 4
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from typing import List
+
+os.environ.setdefault("MISTRAL_API_KEY", "benchmark")
+
+import fitz
+
+from app.agent.document_extractor import DocumentExtractorAgent
+from app.config.config import get_settings
+from app.providers.ocr import ReplayOCRBackend, TextLayerOCRBackend
+from benchmarks.fake_mistral import FakeMistralServer
+
+
+def _sample_pdfs(directory: str, documents: int, pages: int) -> List[str]:
+    paths = []
+    for index in range(documents):
+        path = os.path.join(directory, f"doc-{index}.pdf")
+        with fitz.open() as document:
+            for number in range(pages):
+                page = document.new_page()
+                lines = [f"CONSTANCIA N° {index:05d}-{number}", "RIMAC SEGUROS Y REASEGUROS"]
+                lines += [f"{row:>3} TRABAJADOR {row} DNI {40000000 + index * 1000 + row}" for row in range(40)]
+                page.insert_text((50, 60), "\n".join(lines), fontsize=9)
+            document.save(path)
+        paths.append(path)
+    return paths
+
+
+async def _run(agent: DocumentExtractorAgent, paths: List[str]) -> dict:
+    latencies = []
+
+    async def _one(path: str) -> None:
+        started = time.perf_counter()
+        await agent._process_with_ocr(path, os.path.basename(path))
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(_one(path) for path in paths))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "docs_per_second": len(paths) / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)] * 1000,
+        "max_ms": latencies[-1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=32)
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--replay-latency", type=float, default=0.0, help="Simulated latency of replayed responses")
+    parser.add_argument("--mistral-latency", type=float, default=0.2, help="Round trip of the fake Mistral server")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = _sample_pdfs(directory, args.documents, args.pages)
+        fixtures = os.path.join(directory, "fixtures")
+        base = get_settings().model_copy(update={
+            "ocr_cache_enabled": False,
+            "ocr_preprocessing_enabled": False,
+            "ocr_max_concurrency": args.concurrency,
+        })
+
+        results = {}
+        text_layer = TextLayerOCRBackend(base)
+        results["text_layer"] = asyncio.run(_run(DocumentExtractorAgent(base, text_layer), paths))
+
+        recorder = ReplayOCRBackend(fixtures, inner=text_layer, record=True)
+        asyncio.run(_run(DocumentExtractorAgent(base, recorder), paths))
+        replay = ReplayOCRBackend(fixtures, latency_seconds=args.replay_latency)
+        results["replay"] = asyncio.run(_run(DocumentExtractorAgent(base, replay), paths))
+
+        with FakeMistralServer(latency=args.mistral_latency, pages=args.pages) as server:
+            settings = base.model_copy(update={"ocr_backend": "mistral", "mistral_server_url": server.url})
+            results["mistral (fake server)"] = asyncio.run(_run(DocumentExtractorAgent(settings), paths))
+
+    print(f"{args.documents} documents x {args.pages} pages, concurrency {args.concurrency}")
+    print(f"{'backend':<24}{'docs/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for name, result in results.items():
+        print(f"{name:<24}{result['docs_per_second']:>10.1f}{result['p50_ms']:>10.1f}"
+              f"{result['p95_ms']:>10.1f}{result['max_ms']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
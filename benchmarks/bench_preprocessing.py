@@ -0,0 +1,140 @@
+"""
+Benchmark of the scanned-page preprocessing that runs before OCR.
+
+Builds photographed-looking sample pages (skewed, shaded, noisy JPEGs), or takes
+real PDFs, and reports the size of the single-page PDFs sent to OCR with and
+without preprocessing, the time per page in one process and the throughput of
+the process pool.
+
+Usage:
+    python -m benchmarks.bench_preprocessing --pages 8
+    python -m benchmarks.bench_preprocessing --pdf scan1.pdf scan2.pdf
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from typing import Dict, List
+
+import cv2
+import fitz
+import numpy as np
+
+from app.agent.image_preprocessing import ImagePreprocessor, PreprocessingOptions, preprocess_page
+from app.agent.pdf_pages import split_pdf_pages
+from app.config.config import Settings
+
+SAMPLE_LINES = [
+    "15/03/2024",
+    "CONSTANCIA N° 4440435",
+    "RIMAC SEGUROS Y REASEGUROS",
+    "Contratante: CONSTRUCTORA ANDES S.A.C.   RUC: 20512345678",
+    "Poliza N° SCTR7039077   VIGENCIA: Del 01/03/2024 al 31/03/2024",
+    "",
+    "Nro  Nombres         Apellidos           Tipo Doc.  Nro. Documento",
+] + [f"{i:>3}  TRABAJADOR {i:<5} APELLIDO{i:<3} MATERNO   DNI        {40000000 + i * 7919}" for i in range(1, 31)]
+
+
+def _photographed_page(seed: int) -> bytes:
+    """A text page rendered, rotated, shaded and saved as a JPEG, like a phone photo"""
+    rng = np.random.default_rng(seed)
+    with fitz.open() as document:
+        page = document.new_page()
+        y = 60
+        for line in SAMPLE_LINES:
+            page.insert_text((50, y), line, fontsize=9, fontname="cour")
+            y += 16
+        pixmap = page.get_pixmap(dpi=300, colorspace=fitz.csRGB)
+    image = np.frombuffer(pixmap.samples, dtype=np.uint8).reshape(pixmap.height, pixmap.width, 3).astype(np.float32)
+
+    height, width = image.shape[:2]
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), rng.uniform(-4, 4), 1.0)
+    image = cv2.warpAffine(image, matrix, (width, height), borderValue=(255, 255, 255))
+    shade = np.linspace(0.65, 1.0, width, dtype=np.float32)[None, :, None]
+    image = image * shade * np.array([0.95, 0.92, 0.85], dtype=np.float32)
+    image += rng.normal(0, 12, image.shape).astype(np.float32)
+    image = np.clip(image, 0, 255).astype(np.uint8)
+    _, jpeg = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 85])
+    return jpeg.tobytes()
+
+
+def _sample_pdf(path: str, pages: int) -> None:
+    with fitz.open() as document:
+        for index in range(pages):
+            page = document.new_page()
+            page.insert_image(page.rect, stream=_photographed_page(index))
+        document.save(path)
+
+
+def _page_indexes(paths: List[str]) -> Dict[str, List[int]]:
+    indexes = {}
+    for path in paths:
+        with fitz.open(path) as document:
+            indexes[path] = list(range(document.page_count))
+    return indexes
+
+
+async def _pool_run(pages: Dict[str, List[int]], settings: Settings) -> float:
+    preprocessor = ImagePreprocessor(settings)
+    try:
+        # First call spawns the workers; keep it out of the measurement
+        await preprocessor.process(next(iter(pages)), [0])
+        started = time.perf_counter()
+        await asyncio.gather(*(preprocessor.process(path, indexes) for path, indexes in pages.items()))
+        return time.perf_counter() - started
+    finally:
+        preprocessor.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf", nargs="*", default=[], help="Scanned PDFs to use instead of generated samples")
+    parser.add_argument("--pages", type=int, default=8, help="Generated sample pages")
+    parser.add_argument("--target-dpi", type=int, default=200)
+    parser.add_argument("--binarization", default="adaptive", choices=["otsu", "adaptive", "none"])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    settings = Settings(
+        ocr_preprocessing_target_dpi=args.target_dpi,
+        ocr_preprocessing_binarization=args.binarization,
+        ocr_preprocessing_workers=args.workers,
+    )
+    options = PreprocessingOptions.from_settings(settings)
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = args.pdf
+        if not paths:
+            paths = [os.path.join(directory, "sample.pdf")]
+            _sample_pdf(paths[0], args.pages)
+
+        pages = _page_indexes(paths)
+        original_bytes = sum(
+            len(content) for path, indexes in pages.items() for content in split_pdf_pages(path, indexes).values()
+        )
+
+        processed_bytes = 0
+        timings = []
+        for path, indexes in pages.items():
+            for index in indexes:
+                started = time.perf_counter()
+                processed_bytes += len(preprocess_page(path, index, options))
+                timings.append(time.perf_counter() - started)
+
+        pool_seconds = asyncio.run(_pool_run(pages, settings))
+
+    timings.sort()
+    saved = 1 - processed_bytes / original_bytes if original_bytes else 0.0
+    print(f"pages:               {len(timings)}")
+    print(f"options:             {options}")
+    print(f"bytes to OCR:        {original_bytes:,} -> {processed_bytes:,} ({saved:.1%} saved)")
+    print(f"time per page:       mean {sum(timings) / len(timings) * 1000:.0f} ms, "
+          f"p50 {timings[len(timings) // 2] * 1000:.0f} ms, max {timings[-1] * 1000:.0f} ms")
+    print(f"pool ({args.workers} workers):    {pool_seconds:.2f}s total, "
+          f"{pool_seconds / len(timings) * 1000:.0f} ms/page effective")
+
+
+if __name__ == "__main__":
+    main()
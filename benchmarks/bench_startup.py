@@ -0,0 +1,154 @@
+"""
+Startup benchmark and import-time profile of the API process.
+
+Each repetition runs a fresh interpreter that imports `main` and then compiles
+the graphs like the lifespan hook does (graph_registry.warm_up), and reports the
+wall time and RSS after each phase. A separate `python -X importtime` run lists
+the modules that cost the most to import.
+
+It fails (exit code 1) when the median import time goes over --max-import-seconds,
+or when a module that must stay lazy is loaded, so it can run in CI to keep the
+cold start from regressing.
+
+Usage:
+    python -m benchmarks.bench_startup --repeat 5 --top 25
+    python -m benchmarks.bench_startup --max-import-seconds 2.5 --profile-output importtime.txt
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Provider SDKs and drivers that only load on first use
+LAZY_AFTER_IMPORT = (
+    "langchain_google_vertexai",
+    "langchain_anthropic",
+    "langchain_openai",
+    "langchain_community",
+    "mistralai",
+    "cv2",
+    "asyncpg",
+    "psycopg2",
+)
+# Still not needed once the graphs are compiled (only the configured providers load)
+LAZY_AFTER_STARTUP = (
+    "langchain_google_vertexai",
+    "langchain_anthropic",
+    "langchain_community",
+    "asyncpg",
+)
+
+CHILD = """
+import json, os, sys, time
+
+def rss():
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+import_rss = rss()
+after_import = sorted(sys.modules)
+main.graph_registry.warm_up()
+ready = time.perf_counter()
+print(json.dumps({
+    "import_seconds": imported - started,
+    "warm_up_seconds": ready - imported,
+    "import_rss_mb": import_rss / 2**20,
+    "ready_rss_mb": rss() / 2**20,
+    "modules_after_import": after_import,
+    "modules_after_startup": sorted(sys.modules),
+}))
+"""
+
+
+def _environment() -> Dict[str, str]:
+    env = dict(os.environ)
+    for key in ("MISTRAL_API_KEY", "OPENAI_API_KEY"):
+        env.setdefault(key, "benchmark")
+    env["LANGSMITH_TRACING"] = "false"
+    return env
+
+
+def _run_once() -> dict:
+    completed = subprocess.run(
+        [sys.executable, "-c", CHILD], capture_output=True, text=True, env=_environment(), check=True
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _import_profile() -> Tuple[str, List[Tuple[int, int, str]]]:
+    """Raw `-X importtime` report and its (cumulative us, self us, module) rows"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        capture_output=True, text=True, env=_environment(), check=True,
+    )
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        own, cumulative, module = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), int(own), module.rstrip()))
+    return completed.stderr, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=25, help="Modules to list in the import profile")
+    parser.add_argument("--max-import-seconds", type=float, default=3.0)
+    parser.add_argument("--profile-output", help="Save the raw -X importtime report here")
+    parser.add_argument("--output", help="Save the measurements as JSON")
+    args = parser.parse_args()
+
+    runs = [_run_once() for _ in range(args.repeat)]
+    report, rows = _import_profile()
+    if args.profile_output:
+        with open(args.profile_output, "w", encoding="utf-8") as profile:
+            profile.write(report)
+
+    summary = {
+        key: statistics.median(run[key] for run in runs)
+        for key in ("import_seconds", "warm_up_seconds", "import_rss_mb", "ready_rss_mb")
+    }
+    print(f"{args.repeat} fresh interpreters (median)")
+    print(f"  import main:      {summary['import_seconds']:.3f} s  RSS {summary['import_rss_mb']:.0f} MB")
+    print(f"  graph warm-up:    {summary['warm_up_seconds']:.3f} s  RSS {summary['ready_rss_mb']:.0f} MB")
+
+    print(f"\nslowest imports of main (cumulative / self, ms), top {args.top}:")
+    for cumulative, own, module in sorted(rows, reverse=True)[:args.top]:
+        print(f"  {cumulative / 1000:9.1f} {own / 1000:9.1f}  {module}")
+
+    failures = []
+    if summary["import_seconds"] > args.max_import_seconds:
+        failures.append(f"import main took {summary['import_seconds']:.2f} s (limit {args.max_import_seconds} s)")
+    after_import, after_startup = set(runs[0]["modules_after_import"]), set(runs[0]["modules_after_startup"])
+    failures += [f"{module} is imported by main" for module in LAZY_AFTER_IMPORT if module in after_import]
+    failures += [f"{module} is imported at startup" for module in LAZY_AFTER_STARTUP if module in after_startup]
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump({
+                "benchmark": "startup",
+                "repeat": args.repeat,
+                **summary,
+                "slowest_imports": [
+                    {"module": module.strip(), "cumulative_ms": cumulative / 1000, "self_ms": own / 1000}
+                    for cumulative, own, module in sorted(rows, reverse=True)[:args.top]
+                ],
+                "failures": failures,
+            }, output, indent=2)
+
+    if failures:
+        print("\nFAILED:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print("\nOK: startup within budget and provider imports stay lazy")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+"""
+End-to-end benchmark of the extraction workflow, fully offline.
+
+Runs the compiled `document_graph` (app/workflow/document_graph.py) over a corpus
+of PDFs at several concurrency levels. The external services are replaced by
+local stand-ins with configurable latency:
+- OCR: the replay backend, serving recorded fixtures (see `ocr_replay_record`);
+  without --ocr-fixtures a generic page fixture answers every page
+- LLM: the fake OpenAI server, answering with a recorded segmentation result
+  (--llm-fixture) or its built-in sample
+
+For each level it reports docs/sec, document and per-node latency percentiles,
+event-loop lag and peak RSS, and writes everything to a JSON file. --compare
+prints the change against an earlier result file.
+
+Usage:
+    python -m benchmarks.bench_workflow --concurrency 1,4,16 --documents 32
+    python -m benchmarks.bench_workflow --corpus samples/ --ocr-fixtures fixtures/ocr \\
+        --llm-fixture fixtures/llm/segmentation.json --compare benchmarks/results/baseline.json
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import platform
+import resource
+import subprocess
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import fitz
+
+from benchmarks.fake_openai import FakeOpenAIServer
+
+SAMPLE_PAGE_MARKDOWN = "\n".join([
+    "15/03/2024",
+    "CONSTANCIA Nº 4440435",
+    "RIMAC SEGUROS Y REASEGUROS",
+    "Contratante: CONSTRUCTORA ANDES S.A.C.",
+    "RUC: 20512345678",
+    "Póliza N° SCTR7039077",
+    "VIGENCIA: Del 01/03/2024 al 31/03/2024",
+    "",
+    "| Nro | Nombres | Nro. Documento |",
+    "|---|---|---|",
+] + [f"| {row} | TRABAJADOR {row} | {40000000 + row} |" for row in range(1, 41)])
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def _at(share: float) -> float:
+        return ordered[min(int(len(ordered) * share), len(ordered) - 1)] * 1000
+
+    return {
+        "count": len(ordered),
+        "mean_ms": sum(ordered) / len(ordered) * 1000,
+        "p50_ms": _at(0.50),
+        "p95_ms": _at(0.95),
+        "p99_ms": _at(0.99),
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def _rss_bytes() -> int:
+    """Current resident set size (Linux), or the process peak elsewhere"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class LoopMonitor:
+    """Samples event-loop lag and RSS from a heartbeat task while a level runs"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.lags: List[float] = []
+        self.peak_rss = 0
+        self._stop = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(time.perf_counter() - started - self.interval, 0.0))
+            self.peak_rss = max(self.peak_rss, _rss_bytes())
+
+    def __enter__(self) -> "LoopMonitor":
+        self.peak_rss = _rss_bytes()
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+
+    async def wait(self) -> None:
+        await self._task
+
+
+def _sample_corpus(directory: str, documents: int, pages: int, scanned_every: int) -> List[str]:
+    """Born-digital constancias where every `scanned_every`-th page is an image only (sent to OCR)"""
+    paths = []
+    for index in range(documents):
+        path = os.path.join(directory, f"constancia-{index}.pdf")
+        with fitz.open() as document:
+            for number in range(pages):
+                lines = [
+                    "15/03/2024", f"CONSTANCIA Nº {4440000 + index}", "RIMAC SEGUROS Y REASEGUROS",
+                    "Contratante: CONSTRUCTORA ANDES S.A.C.", "RUC: 20512345678",
+                    f"Póliza N° SCTR{7039000 + index}", "VIGENCIA: Del 01/03/2024 al 31/03/2024",
+                ] + [f"{row:>3} TRABAJADOR {row} DNI {40000000 + index * 1000 + row}" for row in range(40)]
+                if scanned_every and number % scanned_every == scanned_every - 1:
+                    # Rendered to an image, so the page has no text layer
+                    with fitz.open() as source:
+                        source.new_page().insert_text((50, 60), "\n".join(lines), fontsize=9)
+                        pixmap = source[0].get_pixmap(dpi=100)
+                    page = document.new_page()
+                    page.insert_image(page.rect, pixmap=pixmap)
+                else:
+                    document.new_page().insert_text((50, 60), "\n".join(lines), fontsize=9)
+            document.save(path)
+        paths.append(path)
+    return paths
+
+
+def _sha256(path: str) -> str:
+    with open(path, "rb") as pdf:
+        return hashlib.sha256(pdf.read()).hexdigest()
+
+
+async def _run_document(graph, path: str, digest: str, person: str, node_samples: Dict[str, List[float]]) -> None:
+    state = {
+        "file_path": path,
+        "file_name": os.path.basename(path),
+        "file_sha256": digest,
+        "file_size": os.path.getsize(path),
+        "person_name": person,
+        "user_date": None,
+        "reocr_pages": [],
+    }
+    # The graph is a chain: each update arrives when its node finishes
+    previous = time.perf_counter()
+    async for update in graph.astream(state, stream_mode="updates"):
+        now = time.perf_counter()
+        for node in update:
+            node_samples[node].append(now - previous)
+        previous = now
+
+
+async def _run_level(graph, corpus: List[tuple], documents: int, concurrency: int, person: str) -> dict:
+    node_samples: Dict[str, List[float]] = defaultdict(list)
+    latencies: List[float] = []
+    errors: Dict[str, int] = defaultdict(int)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _one(index: int) -> None:
+        path, digest = corpus[index % len(corpus)]
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await _run_document(graph, path, digest, person, node_samples)
+                latencies.append(time.perf_counter() - started)
+            except Exception as e:
+                errors[type(e).__name__] += 1
+
+    with LoopMonitor() as monitor:
+        started = time.perf_counter()
+        await asyncio.gather(*(_one(index) for index in range(documents)))
+        elapsed = time.perf_counter() - started
+    await monitor.wait()
+
+    return {
+        "concurrency": concurrency,
+        "documents": documents,
+        "errors": dict(errors),
+        "wall_seconds": elapsed,
+        "docs_per_second": len(latencies) / elapsed if elapsed else 0.0,
+        "document_latency": _percentiles(latencies),
+        "nodes": {node: _percentiles(samples) for node, samples in sorted(node_samples.items())},
+        "event_loop_lag": _percentiles(monitor.lags),
+        "peak_rss_mb": monitor.peak_rss / (1024 * 1024),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print_levels(levels: List[dict]) -> None:
+    print(f"{'conc':>5}{'docs/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'lag p99 ms':>12}{'lag max ms':>12}{'RSS MB':>9}{'errors':>8}")
+    for level in levels:
+        latency, lag = level["document_latency"], level["event_loop_lag"]
+        print(
+            f"{level['concurrency']:>5}{level['docs_per_second']:>9.2f}"
+            f"{latency.get('p50_ms', 0):>10.1f}{latency.get('p95_ms', 0):>10.1f}"
+            f"{lag.get('p99_ms', 0):>12.1f}{lag.get('max_ms', 0):>12.1f}"
+            f"{level['peak_rss_mb']:>9.1f}{sum(level['errors'].values()):>8}"
+        )
+    print("\nper node (highest concurrency):")
+    for node, stats in levels[-1]["nodes"].items():
+        print(f"  {node:<20} p50={stats['p50_ms']:8.1f} ms  p95={stats['p95_ms']:8.1f} ms  p99={stats['p99_ms']:8.1f} ms")
+
+
+def _print_comparison(levels: List[dict], baseline_path: str) -> None:
+    with open(baseline_path, encoding="utf-8") as baseline_file:
+        baseline = {level["concurrency"]: level for level in json.load(baseline_file)["levels"]}
+    print(f"\nchange against {baseline_path}:")
+    for level in levels:
+        before = baseline.get(level["concurrency"])
+        if not before:
+            continue
+        throughput = level["docs_per_second"] / before["docs_per_second"] - 1 if before["docs_per_second"] else 0.0
+        p95 = level["document_latency"].get("p95_ms", 0) - before["document_latency"].get("p95_ms", 0)
+        print(f"  concurrency {level['concurrency']:>3}: docs/s {throughput:+.1%}, p95 {p95:+.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="Directory of sample PDFs (generated when omitted)")
+    parser.add_argument("--documents", type=int, default=32, help="Documents per concurrency level")
+    parser.add_argument("--pages", type=int, default=3, help="Pages of each generated document")
+    parser.add_argument("--scanned-every", type=int, default=3, help="Every n-th generated page is scanned (0: none)")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma separated concurrency levels")
+    parser.add_argument("--ocr-fixtures", help="Recorded OCR fixtures (default: one generic page for every request)")
+    parser.add_argument("--ocr-latency", type=float, default=0.3, help="Simulated OCR latency per request")
+    parser.add_argument("--llm-fixture", help="JSON segmentation result returned by the fake LLM")
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="Simulated LLM latency per call")
+    parser.add_argument("--force-llm", action="store_true", help="Disable the rule-based shortcut")
+    parser.add_argument("--preprocessing", action="store_true", help="Preprocess scanned pages before OCR")
+    parser.add_argument("--person", default="40000001")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/workflow-<timestamp>.json)")
+    parser.add_argument("--compare", help="Earlier result file to compare against")
+    args = parser.parse_args()
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    llm_result = None
+    if args.llm_fixture:
+        with open(args.llm_fixture, encoding="utf-8") as fixture:
+            llm_result = json.load(fixture)
+
+    with tempfile.TemporaryDirectory() as directory, \
+            FakeOpenAIServer(latency=args.llm_latency, result=llm_result) as llm_server:
+        fixtures_dir = args.ocr_fixtures
+        if not fixtures_dir:
+            fixtures_dir = os.path.join(directory, "ocr")
+            os.makedirs(fixtures_dir)
+            with open(os.path.join(fixtures_dir, "default.json"), "w", encoding="utf-8") as fixture:
+                json.dump({"file_name": "default", "pages": [SAMPLE_PAGE_MARKDOWN]}, fixture, ensure_ascii=False)
+
+        # The graph's agents read their settings from the environment when document_graph is imported
+        overrides = {
+            "OCR_BACKEND": "replay",
+            "OCR_REPLAY_DIR": fixtures_dir,
+            "OCR_REPLAY_LATENCY_SECONDS": str(args.ocr_latency),
+            "OCR_PREPROCESSING_ENABLED": str(args.preprocessing).lower(),
+            "OCR_CACHE_ENABLED": "false",
+            "SEGMENTATION_CACHE_ENABLED": "false",
+            "LLM_ROUTER_PROVIDERS": "gpt-4o-mini",
+            "OPENAI_API_BASE": llm_server.url,
+            "LANGSMITH_TRACING": "false",
+        }
+        if args.force_llm:
+            overrides["RULE_EXTRACTION_ENABLED"] = "false"
+        os.environ.update(overrides)
+        # Required by the settings but never used offline
+        for key in (
+                "OPENAI_API_KEY", "TAVILY_API_KEY", "DB_NAME", "DB_USER", "DB_PASSWORD",
+                "LANGSMITH_API_KEY", "LANGSMITH_ENDPOINT", "LANGSMITH_PROJECT",
+        ):
+            os.environ.setdefault(key, "benchmark")
+
+        from app.workflow.document_graph import document_graph
+        graph = document_graph.compile()
+
+        if args.corpus:
+            paths = sorted(
+                os.path.join(args.corpus, name) for name in os.listdir(args.corpus) if name.lower().endswith(".pdf")
+            )
+        else:
+            paths = _sample_corpus(directory, min(args.documents, 16), args.pages, args.scanned_every)
+        corpus = [(path, _sha256(path)) for path in paths]
+
+        async def _run_all() -> List[dict]:
+            # Warm-up: first imports, client pools and tokenizer loading stay out of the numbers
+            await _run_document(graph, corpus[0][0], corpus[0][1], args.person, defaultdict(list))
+            results = []
+            for concurrency in levels:
+                llm_server.app.state.max_in_flight = 0
+                calls = llm_server.app.state.calls
+                result = await _run_level(graph, corpus, args.documents, concurrency, args.person)
+                result["llm_calls"] = llm_server.app.state.calls - calls
+                result["llm_max_in_flight"] = llm_server.app.state.max_in_flight
+                results.append(result)
+            return results
+
+        results = asyncio.run(_run_all())
+
+    report = {
+        "benchmark": "workflow",
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "config": {
+            "corpus": args.corpus or "generated",
+            "corpus_documents": len(corpus),
+            "ocr_fixtures": args.ocr_fixtures or "generic",
+            "ocr_latency_seconds": args.ocr_latency,
+            "llm_fixture": args.llm_fixture or "builtin",
+            "llm_latency_seconds": args.llm_latency,
+            "force_llm": args.force_llm,
+            "preprocessing": args.preprocessing,
+        },
+        "process_peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "levels": results,
+    }
+    output = args.output or os.path.join(
+        "benchmarks", "results", f"workflow-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as result_file:
+        json.dump(report, result_file, indent=2)
+
+    _print_levels(results)
+    if args.compare:
+        _print_comparison(results, args.compare)
+    print(f"\nresults saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
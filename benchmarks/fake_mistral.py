@@ -0,0 +1,110 @@
+"""
+Local stand-in for the Mistral files/OCR API used by the load tests and benchmarks.
+
+Every route sleeps for a configurable latency (without blocking its own event loop)
+so that overlapping client requests are visible in wall-clock time.
+"""
+
+import asyncio
+import socket
+import threading
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+def create_app(latency: float = 0.5, pages: int = 2) -> FastAPI:
+    app = FastAPI()
+    app.state.in_flight = 0
+    app.state.max_in_flight = 0
+    app.state.calls = {"upload": 0, "signed_url": 0, "ocr": 0, "delete": 0}
+    # Uploaded files not deleted yet
+    app.state.files = set()
+
+    async def _simulate(kind: str, seconds: float):
+        app.state.calls[kind] += 1
+        app.state.in_flight += 1
+        app.state.max_in_flight = max(app.state.max_in_flight, app.state.in_flight)
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            app.state.in_flight -= 1
+
+    @app.post("/v1/files")
+    async def upload(request: Request):
+        body = await request.body()
+        await _simulate("upload", latency / 4)
+        file_id = str(uuid.uuid4())
+        app.state.files.add(file_id)
+        return {
+            "id": file_id,
+            "object": "file",
+            "size_bytes": len(body),
+            "created_at": int(time.time()),
+            "filename": "document.pdf",
+            "purpose": "ocr",
+            "sample_type": "ocr_input",
+            "source": "upload",
+        }
+
+    @app.get("/v1/files/{file_id}/url")
+    async def signed_url(file_id: str):
+        await _simulate("signed_url", latency / 4)
+        return {"url": f"https://files.local/{file_id}.pdf"}
+
+    @app.delete("/v1/files/{file_id}")
+    async def delete(file_id: str):
+        await _simulate("delete", 0)
+        if file_id not in app.state.files:
+            return JSONResponse(status_code=404, content={"detail": "File not found"})
+        app.state.files.discard(file_id)
+        return {"id": file_id, "object": "file", "deleted": True}
+
+    @app.post("/v1/ocr")
+    async def ocr(request: Request):
+        payload = await request.json()
+        await _simulate("ocr", latency / 2)
+        indexes = payload.get("pages") or range(pages)
+        return {
+            "model": payload.get("model"),
+            "usage_info": {"pages_processed": len(indexes)},
+            "pages": [
+                {
+                    "index": index,
+                    "markdown": f"# CONSTANCIA\n\nPágina {index + 1}",
+                    "images": [],
+                    "dimensions": {"dpi": 200, "height": 2200, "width": 1700},
+                }
+                for index in indexes
+            ],
+        }
+
+    return app
+
+
+class FakeMistralServer:
+    """Runs the fake API with uvicorn on a background thread"""
+
+    def __init__(self, latency: float = 0.5, pages: int = 2):
+        self.app = create_app(latency=latency, pages=pages)
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        self.url = f"http://127.0.0.1:{self.port}"
+        self._server = uvicorn.Server(
+            uvicorn.Config(self.app, host="127.0.0.1", port=self.port, log_level="warning")
+        )
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    def __enter__(self) -> "FakeMistralServer":
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self._server.should_exit = True
+        self._thread.join()
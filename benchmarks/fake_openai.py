@@ -0,0 +1,177 @@
+"""
+Local stand-in for the OpenAI chat completions API used by the LLM benchmarks.
+
+Answers structured-output requests (tool calling or JSON schema) with a fixed
+segmentation result (or a recorded one passed as `result`) after a configurable latency, and tracks how many requests
+were in flight at once. Like the real API, a leading system message seen before
+is reported as cached prompt tokens (in 128-token blocks, 4 characters per token).
+
+Requests with `stream: true` get the answer as SSE chunks of `chunk_chars`
+characters, `chunk_delay` seconds apart (usage last, when `stream_options`
+asks for it).
+"""
+
+import asyncio
+import json
+import socket
+import threading
+import time
+import uuid
+from typing import Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+SEGMENTATION_RESULT = {
+    "content": [{
+        "start_date_validity": "01/03/2024",
+        "end_date_validity": "31/03/2024",
+        "validity": "Del 01/03/2024 al 31/03/2024",
+        "policy_number": "SCTR7039077",
+        "company": "CONSTRUCTORA ANDES S.A.C.",
+        "insurance_company": "RIMAC SEGUROS Y REASEGUROS",
+        "person_by_policy": [{
+            "full_name": "JUAN PEREZ GOMEZ",
+            "document_number": "12345678",
+            "coverage_start_date": "01/03/2024",
+            "type_document": "DNI",
+        }],
+        "signatories": [],
+    }]
+}
+
+
+def _stream_chunks(completion: dict, chunk_chars: int, chunk_delay: float, include_usage: bool):
+    """SSE body of a streamed completion, argument (or content) fragments first"""
+    message = completion["choices"][0]["message"]
+    base = {key: completion[key] for key in ("id", "created", "model")}
+
+    def _chunk(delta: dict, finish_reason: Optional[str] = None, **extra) -> str:
+        choices = [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+        return f"data: {json.dumps({**base, 'object': 'chat.completion.chunk', 'choices': choices, **extra})}\n\n"
+
+    async def _body():
+        if message.get("tool_calls"):
+            call = message["tool_calls"][0]
+            text = call["function"]["arguments"]
+            yield _chunk({"role": "assistant", "content": None, "tool_calls": [{
+                "index": 0, "id": call["id"], "type": "function",
+                "function": {"name": call["function"]["name"], "arguments": ""},
+            }]})
+            fragment = lambda part: {"tool_calls": [{"index": 0, "function": {"arguments": part}}]}
+        else:
+            text = message["content"]
+            yield _chunk({"role": "assistant", "content": ""})
+            fragment = lambda part: {"content": part}
+        for start in range(0, len(text), chunk_chars):
+            if chunk_delay:
+                await asyncio.sleep(chunk_delay)
+            yield _chunk(fragment(text[start:start + chunk_chars]))
+        yield _chunk({}, completion["choices"][0]["finish_reason"])
+        if include_usage:
+            yield f"data: {json.dumps({**base, 'object': 'chat.completion.chunk', 'choices': [], 'usage': completion['usage']})}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return _body()
+
+
+def create_app(
+        latency: float = 0.5,
+        result: Optional[dict] = None,
+        chunk_chars: int = 64,
+        chunk_delay: float = 0.0,
+) -> FastAPI:
+    app = FastAPI()
+    app.state.in_flight = 0
+    app.state.max_in_flight = 0
+    app.state.calls = 0
+    app.state.cancelled = 0
+    app.state.prefixes = set()
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        payload = await request.json()
+        app.state.calls += 1
+        app.state.in_flight += 1
+        app.state.max_in_flight = max(app.state.max_in_flight, app.state.in_flight)
+        try:
+            await asyncio.sleep(latency)
+        except asyncio.CancelledError:
+            app.state.cancelled += 1
+            raise
+        finally:
+            app.state.in_flight -= 1
+
+        messages = payload.get("messages") or []
+        prompt_tokens = sum(len(str(message.get("content") or "")) for message in messages) // 4
+        cached_tokens = 0
+        if messages and messages[0].get("role") == "system":
+            prefix = str(messages[0].get("content"))
+            if prefix in app.state.prefixes:
+                cached_tokens = len(prefix) // 4 // 128 * 128
+            app.state.prefixes.add(prefix)
+
+        arguments = json.dumps(result or SEGMENTATION_RESULT)
+        message = {"role": "assistant", "content": arguments}
+        finish_reason = "stop"
+        if payload.get("tools"):
+            tool = payload["tools"][0]["function"]["name"]
+            message = {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [{
+                    "id": f"call_{uuid.uuid4().hex[:12]}",
+                    "type": "function",
+                    "function": {"name": tool, "arguments": arguments},
+                }],
+            }
+            finish_reason = "tool_calls"
+        completion = {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model"),
+            "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": 100,
+                "total_tokens": prompt_tokens + 100,
+                "prompt_tokens_details": {"cached_tokens": cached_tokens},
+            },
+        }
+        if payload.get("stream"):
+            include_usage = bool((payload.get("stream_options") or {}).get("include_usage"))
+            return StreamingResponse(
+                _stream_chunks(completion, chunk_chars, chunk_delay, include_usage), media_type="text/event-stream"
+            )
+        return completion
+
+    return app
+
+
+class FakeOpenAIServer:
+    """Runs the fake API with uvicorn on a background thread"""
+
+    def __init__(
+            self, latency: float = 0.5, result: Optional[dict] = None, chunk_chars: int = 64, chunk_delay: float = 0.0
+    ):
+        self.app = create_app(latency=latency, result=result, chunk_chars=chunk_chars, chunk_delay=chunk_delay)
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        self.url = f"http://127.0.0.1:{self.port}/v1"
+        self._server = uvicorn.Server(
+            uvicorn.Config(self.app, host="127.0.0.1", port=self.port, log_level="warning")
+        )
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self._server.should_exit = True
+        self._thread.join()
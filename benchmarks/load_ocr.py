@@ -0,0 +1,76 @@
+"""
+Load test for the non-blocking OCR path of DocumentExtractorAgent.
+
+Fires N concurrent documents at a local fake Mistral server and reports the
+wall-clock time, the peak number of requests the server saw in flight and the
+worst event-loop stall observed by a heartbeat task.
+
+Usage:
+    python -m benchmarks.load_ocr --documents 16 --latency 0.5 --concurrency 4
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+for _key in ("MISTRAL_API_KEY", "OPENAI_API_KEY"):
+    os.environ.setdefault(_key, "benchmark")
+
+from app.agent.document_extractor import DocumentExtractorAgent
+from app.config.config import get_settings
+from benchmarks.fake_mistral import FakeMistralServer
+
+
+async def _heartbeat(stop: asyncio.Event, interval: float = 0.01) -> float:
+    """Return the largest delay between expected and actual wake-ups"""
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - started - interval)
+    return worst
+
+
+async def _run(agent: DocumentExtractorAgent, directory: str, documents: int) -> float:
+    paths = []
+    for index in range(documents):
+        path = os.path.join(directory, f"doc-{index}.pdf")
+        with open(path, "wb") as pdf:
+            pdf.write(f"%PDF-1.4 fake {index}".encode())
+        paths.append(path)
+
+    stop = asyncio.Event()
+    heartbeat = asyncio.create_task(_heartbeat(stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(agent._process_with_ocr(path, os.path.basename(path)) for path in paths))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    return elapsed, await heartbeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake OCR round trip in seconds")
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    with FakeMistralServer(latency=args.latency) as server, tempfile.TemporaryDirectory() as directory:
+        settings = get_settings().model_copy(update={
+            "mistral_server_url": server.url,
+            "ocr_max_concurrency": args.concurrency,
+        })
+        agent = DocumentExtractorAgent(settings=settings)
+        elapsed, worst_stall = asyncio.run(_run(agent, directory, args.documents))
+
+        serial = args.documents * args.latency
+        print(f"documents:           {args.documents}")
+        print(f"wall time:           {elapsed:.2f} s (serial would be ~{serial:.2f} s)")
+        print(f"max OCR calls in flight on server: {server.app.state.max_in_flight}")
+        print(f"worst event-loop stall: {worst_stall * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,45 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 import asyncio
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.v1.endpoints import evaluator
+from app.api.v1.endpoints import evaluator, jobs
 import logging
 from app.config.database import init_db
+from app.config.config import get_settings
+from app.jobs.manager import get_job_manager
+from app.observability.metrics import metrics
+from app.observability.spans import setup_logging
+from app.providers.http_clients import get_http_clients
+from app.providers.mistral_files import close_file_managers
+from app.workflow.registry import graph_registry
+
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Eventos de tiempos (spans) en JSON
+    setup_logging()
+    # Compila los grafos una sola vez por worker
+    graph_registry.warm_up()
+    # Workers de extracción para los jobs asíncronos
+    settings = get_settings()
+    job_manager = get_job_manager() if settings.job_workers_enabled and settings.job_queue_backend else None
+    if job_manager:
+        job_manager.start()
+    yield
+    if job_manager:
+        await job_manager.stop()
+    # Detiene los procesos de preprocesamiento de imágenes (OpenCV se importa recién con los grafos)
+    from app.agent.image_preprocessing import shutdown_preprocessors
+    shutdown_preprocessors()
+    # Borra en el proveedor los archivos subidos para OCR que siguen vivos
+    await close_file_managers()
+    # Cierra las conexiones keep-alive con los proveedores (OCR y LLM)
+    await get_http_clients().aclose()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
 
 # Configurar el logger
 logging.basicConfig(level=logging.INFO)
@@ -23,6 +56,9 @@ app.add_middleware(
 app.include_router(
     evaluator.router
 )
+app.include_router(
+    jobs.router
+)
 
 # Inicializa la base de datos
 #init_db()
@@ -34,10 +70,18 @@ async def health_check():
     return {
         "status": "ok",
         "version": "1.0.0",
-        "langsmith_enabled": True
+        "langsmith_enabled": True,
+        "graphs": graph_registry.metrics(),
+        "http_clients": get_http_clients().stats(),
     }
 
 
+# Prometheus scrape endpoint (per worker process)
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -0,0 +1,13 @@
+import pytest
+
+from app.config.config import Settings
+
+
+@pytest.fixture
+def make_settings():
+    """Settings with their defaults, without reading the environment (API keys are not needed)"""
+
+    def _make(**overrides) -> Settings:
+        return Settings.model_construct(**overrides)
+
+    return _make
@@ -0,0 +1,66 @@
+from app.agent.document_chunker import DocumentChunk, split_into_chunks, split_oversized, starts_new_document
+
+HEADER = "| N° | Apellidos y Nombres | DNI |\n|---|---|---|"
+
+
+def _page(title, policy, rows, first=1):
+    lines = [f"{title} 01/01/2025", f"Póliza N°: {policy}", "", HEADER]
+    lines += [f"| {i} | ASEGURADO NUMERO {i} | {10000000 + i} |" for i in range(first, first + rows)]
+    return "\n".join(lines)
+
+
+def _rows(first, count):
+    return "\n".join(f"| {i} | ASEGURADO NUMERO {i} | {10000000 + i} |" for i in range(first, first + count))
+
+
+def test_chunks_follow_document_boundaries():
+    pages = [
+        _page("CONSTANCIA", "SCTR1000001", 3),
+        _rows(4, 3),
+        "",
+        _page("CONSTANCIA", "SCTR1000002", 3),
+    ]
+    chunks = split_into_chunks(pages, max_chars=10_000)
+    assert [chunk.pages for chunk in chunks] == [[0, 1], [3]]
+    assert not any(chunk.continuation for chunk in chunks)
+
+
+def test_new_policy_number_starts_a_document():
+    current = DocumentChunk(pages=[0], texts=["..."], policies={"SCTR1000001"})
+    assert starts_new_document("Póliza N°: SCTR1000002\n" + _rows(1, 2), current)
+    assert not starts_new_document("Póliza N°: SCTR1000001\n" + _rows(1, 2), current)
+
+
+def test_policy_words_without_digits_are_not_policy_numbers():
+    current = DocumentChunk(pages=[0], texts=["..."], policies={"SCTR1000001"})
+    assert not starts_new_document("Póliza de SALUD vigente\n" + _rows(1, 2), current)
+    assert not starts_new_document("Póliza: VIGENTE\n" + _rows(1, 2), current)
+
+
+def test_long_document_is_split_into_continuations_with_the_table_header():
+    pages = [_page("CONSTANCIA", "SCTR1000001", 10), _rows(11, 10), _rows(21, 10)]
+    chunks = split_into_chunks(pages, max_chars=len(pages[0]) + 10)
+    assert [chunk.pages for chunk in chunks] == [[0], [1], [2]]
+    assert [chunk.continuation for chunk in chunks] == [False, True, True]
+    assert [chunk.context for chunk in chunks[1:]] == [HEADER, HEADER]
+    assert chunks[2].text.startswith(HEADER)
+
+
+def test_split_oversized_respects_the_limit():
+    chunk = DocumentChunk(pages=[0, 1], texts=[_page("CONSTANCIA", "SCTR1000001", 40), _rows(41, 40)])
+    pieces = split_oversized(chunk, max_chars=500)
+    assert len(pieces) > 1
+    assert all(piece.size <= 500 for piece in pieces)
+    assert not pieces[0].continuation
+    assert all(piece.continuation and piece.context == HEADER for piece in pieces[1:])
+    # No line is lost or duplicated
+    assert "\n".join(text for piece in pieces for text in piece.texts) == "\n".join(chunk.texts)
+    assert [page for piece in pieces for page in piece.pages] == sorted(
+        page for piece in pieces for page in piece.pages
+    )
+
+
+def test_split_oversized_cuts_lines_longer_than_the_limit():
+    chunk = DocumentChunk(pages=[0], texts=["x" * 250])
+    pieces = split_oversized(chunk, max_chars=100)
+    assert [piece.size for piece in pieces] == [100, 100, 50]
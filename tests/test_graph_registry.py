@@ -0,0 +1,69 @@
+import pytest
+
+from app.workflow.registry import GraphRegistry
+
+
+class FakeGraph:
+    """Stands in for a StateGraph: `compile` returns a new object each time"""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.compiles = 0
+
+    def compile(self):
+        self.compiles += 1
+        return (self.label, self.compiles)
+
+
+def make_registry(**graphs):
+    registry = GraphRegistry()
+    for name, graph in graphs.items():
+        registry.register(name, lambda graph=graph: graph)
+    return registry
+
+
+def test_warm_up_compiles_every_registered_graph():
+    first, second = FakeGraph("first"), FakeGraph("second")
+    registry = make_registry(first=first, second=second)
+
+    registry.warm_up()
+
+    assert (first.compiles, second.compiles) == (1, 1)
+    assert set(registry.metrics()) == {"first", "second"}
+
+
+def test_get_reuses_the_compiled_graph():
+    graph = FakeGraph("graph")
+    registry = make_registry(graph=graph)
+
+    compiled = registry.get("graph")
+
+    assert registry.get("graph") is compiled
+    assert graph.compiles == 1
+    assert registry.metrics()["graph"]["compile_count"] == 1
+
+
+def test_get_unknown_graph():
+    with pytest.raises(KeyError):
+        GraphRegistry().get("missing")
+
+
+def test_swap_recompiles_in_place():
+    graph = FakeGraph("graph")
+    registry = make_registry(graph=graph)
+    before = registry.get("graph")
+
+    after = registry.swap("graph")
+
+    assert after is not before
+    assert registry.get("graph") is after
+    assert registry.metrics()["graph"]["compile_count"] == 2
+
+
+def test_swap_with_a_new_factory():
+    registry = make_registry(graph=FakeGraph("old"))
+    registry.get("graph")
+
+    registry.swap("graph", lambda: FakeGraph("new"))
+
+    assert registry.get("graph") == ("new", 1)
@@ -0,0 +1,182 @@
+import asyncio
+from typing import Dict, List, Optional
+
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from pydantic import BaseModel
+
+from app.providers.llm_manager import LLMType
+from app.providers.llm_router import LLMRouter, PartialStreamError
+
+MINI, FULL, CLAUDE = LLMType.GPT_4O_MINI, LLMType.GPT_4O, LLMType.ANTHROPIC_CLAUDE
+MESSAGES = [HumanMessage(content="Segmenta el documento")]
+USAGE = {"input_tokens": 10, "output_tokens": 5, "total_tokens": 15}
+
+
+class Answer(BaseModel):
+    value: str
+
+
+class FakeModel:
+    """Stands in for a chat model and the runnables the router derives from it"""
+
+    def __init__(self, name: str, delay: float = 0.0, error: Optional[Exception] = None,
+                 fragments: Optional[List[str]] = None, fail_after: Optional[int] = None):
+        self.name = name
+        self.delay = delay
+        self.error = error
+        self.fragments = fragments if fragments is not None else ['{"value": ', f'"{name}"', "}"]
+        self.fail_after = fail_after
+        self.calls = 0
+
+    def with_structured_output(self, schema, include_raw=False):
+        return self
+
+    def bind_tools(self, tools, tool_choice=None):
+        return self
+
+    def bind(self, **kwargs):
+        return self
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return {"raw": AIMessage(content=self.name, usage_metadata=USAGE), "parsed": Answer(value=self.name),
+                "parsing_error": None}
+
+    async def astream(self, messages):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        for position, fragment in enumerate(self.fragments):
+            if self.fail_after is not None and position == self.fail_after:
+                raise self.error
+            yield AIMessageChunk(
+                content="", tool_call_chunks=[{"name": "Answer", "args": fragment, "id": "call", "index": 0}]
+            )
+        yield AIMessageChunk(content="", usage_metadata=USAGE)
+        if self.fail_after is None and self.error:
+            raise self.error
+
+
+class FakeManager:
+    def __init__(self, models: Dict[LLMType, FakeModel]):
+        self.models = models
+
+    def get_llm(self, provider: LLMType) -> FakeModel:
+        return self.models[provider]
+
+
+def _router(make_settings, models, **overrides):
+    settings = make_settings(**{"llm_router_min_samples": 2, "llm_timeout_seconds": 5.0, **overrides})
+    return LLMRouter(FakeManager(models), providers=list(models), settings=settings)
+
+
+def test_requires_a_provider(make_settings):
+    with pytest.raises(ValueError):
+        LLMRouter(FakeManager({}), settings=make_settings(llm_router_providers=" "))
+
+
+def test_ranked_keeps_the_configured_order_without_samples(make_settings):
+    router = _router(make_settings, {MINI: FakeModel("mini"), FULL: FakeModel("full")})
+    assert router.ranked() == [MINI, FULL]
+    assert router.primary == MINI
+
+
+def test_ranked_prefers_the_faster_provider(make_settings):
+    router = _router(make_settings, {MINI: FakeModel("mini"), FULL: FakeModel("full")})
+    for _ in range(3):
+        router.stats[MINI].record(4.0, ok=True)
+        router.stats[FULL].record(1.0, ok=True)
+    assert router.ranked() == [FULL, MINI]
+
+
+def test_ranked_puts_failing_providers_last(make_settings):
+    router = _router(make_settings, {MINI: FakeModel("mini"), FULL: FakeModel("full"), CLAUDE: FakeModel("claude")})
+    for _ in range(3):
+        router.stats[MINI].record(0.5, ok=False)
+        router.stats[FULL].record(3.0, ok=True)
+    # Too few samples to judge: assumed to take the default latency
+    router.stats[CLAUDE].record(0.1, ok=False)
+    assert router.ranked() == [FULL, CLAUDE, MINI]
+
+
+def test_falls_back_to_the_next_provider(make_settings):
+    models = {MINI: FakeModel("mini", error=RuntimeError("rate limited")), FULL: FakeModel("full")}
+    router = _router(make_settings, models)
+    result, usage = asyncio.run(router.ainvoke_with_usage(MESSAGES, Answer))
+    assert result == Answer(value="full")
+    assert usage["input_tokens"] == 10 and usage["output_tokens"] == 5
+    assert router.metrics()[MINI.value]["error_rate"] == 1.0
+    assert router.metrics()[FULL.value]["input_tokens"] == 10
+
+
+def test_raises_the_last_error_when_every_provider_fails(make_settings):
+    models = {MINI: FakeModel("mini", error=RuntimeError("first")), FULL: FakeModel("full", error=RuntimeError("last"))}
+    router = _router(make_settings, models)
+    with pytest.raises(RuntimeError, match="last"):
+        asyncio.run(router.ainvoke(MESSAGES, Answer))
+
+
+def test_timeouts_fall_through(make_settings):
+    models = {MINI: FakeModel("mini", delay=1.0), FULL: FakeModel("full")}
+    router = _router(make_settings, models, llm_timeout_seconds=0.05)
+    assert asyncio.run(router.ainvoke(MESSAGES, Answer)) == Answer(value="full")
+    assert router.metrics()[MINI.value]["error_rate"] == 1.0
+
+
+def test_hedged_call_takes_the_first_answer(make_settings):
+    models = {MINI: FakeModel("mini", delay=1.0), FULL: FakeModel("full")}
+    router = _router(make_settings, models, llm_hedge_enabled=True, llm_hedge_after_seconds=0.02)
+    assert asyncio.run(router.ainvoke(MESSAGES, Answer)) == Answer(value="full")
+    # The cancelled loser is not sampled
+    assert router.metrics()[MINI.value]["samples"] == 0
+    assert router.metrics()[FULL.value]["samples"] == 1
+
+
+def test_without_hedging_the_slow_provider_answers(make_settings):
+    models = {MINI: FakeModel("mini", delay=0.1), FULL: FakeModel("full")}
+    router = _router(make_settings, models, llm_hedge_enabled=False)
+    assert asyncio.run(router.ainvoke(MESSAGES, Answer)) == Answer(value="mini")
+    assert models[FULL].calls == 0
+
+
+def test_streaming_hands_out_fragments(make_settings):
+    router = _router(make_settings, {MINI: FakeModel("mini"), FULL: FakeModel("full")})
+    fragments = []
+    result, usage = asyncio.run(router.ainvoke_with_usage(MESSAGES, Answer, on_text=fragments.append))
+    assert result == {"value": "mini"}
+    assert "".join(fragments) == '{"value": "mini"}'
+    assert usage["input_tokens"] == 10
+
+
+def test_streaming_requires_a_schema(make_settings):
+    router = _router(make_settings, {MINI: FakeModel("mini")})
+    with pytest.raises(ValueError):
+        asyncio.run(router.ainvoke_with_usage(MESSAGES, on_text=lambda text: None))
+
+
+def test_stream_failing_before_any_output_falls_back(make_settings):
+    models = {MINI: FakeModel("mini", error=RuntimeError("down"), fail_after=0), FULL: FakeModel("full")}
+    router = _router(make_settings, models)
+    fragments = []
+    result, _ = asyncio.run(router.ainvoke_with_usage(MESSAGES, Answer, on_text=fragments.append))
+    assert result == {"value": "full"}
+    assert "".join(fragments) == '{"value": "full"}'
+
+
+def test_stream_failing_mid_output_is_not_retried(make_settings):
+    models = {MINI: FakeModel("mini", error=RuntimeError("reset"), fail_after=2), FULL: FakeModel("full")}
+    router = _router(make_settings, models)
+    with pytest.raises(PartialStreamError):
+        asyncio.run(router.ainvoke_with_usage(MESSAGES, Answer, on_text=lambda text: None))
+    assert models[FULL].calls == 0
+
+
+def test_streamed_calls_are_not_hedged(make_settings):
+    models = {MINI: FakeModel("mini", delay=0.1), FULL: FakeModel("full")}
+    router = _router(make_settings, models, llm_hedge_enabled=True, llm_hedge_after_seconds=0.01)
+    result, _ = asyncio.run(router.ainvoke_with_usage(MESSAGES, Answer, on_text=lambda text: None))
+    assert result == {"value": "mini"}
+    assert models[FULL].calls == 0
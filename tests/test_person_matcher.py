@@ -0,0 +1,107 @@
+from datetime import date
+
+from app.agent.person_matcher import (
+    PersonIndex,
+    classify_person_input,
+    match_person,
+    overall_coverage,
+    parse_date,
+)
+
+
+def _person(full_name, document_number):
+    return {"full_name": full_name, "document_number": document_number, "coverage_start_date": "", "type_document": "DNI"}
+
+
+SECTIONS = [
+    {
+        "policy_number": "SCTR7039077",
+        "insurance_company": "Rimac",
+        "start_date_validity": "01/01/2025",
+        "end_date_validity": "31/01/2025",
+        "person_by_policy": [_person("PEREZ GOMEZ JUAN", "12345678"), _person("ROJAS ANA", "87654321")],
+    },
+    {
+        "policy_number": "MP/2025/00123",
+        "insurance_company": "Mapfre",
+        "start_date_validity": "1 de febrero de 2025",
+        "end_date_validity": "28 de febrero de 2025",
+        "person_by_policy": [_person("JUAN PÉREZ GÓMEZ", "12.345.678")],
+    },
+]
+
+
+def test_classify_person_input():
+    assert classify_person_input(" 12345678 ") == ("dni", "12345678")
+    assert classify_person_input("juan  perez") == ("name", "JUAN PEREZ")
+    assert classify_person_input("1234567")[0] == "name"
+
+
+def test_parse_date_formats():
+    assert parse_date("05/03/2024") == date(2024, 3, 5)
+    assert parse_date("2024-03-05") == date(2024, 3, 5)
+    assert parse_date("5 de Setiembre del 2024") == date(2024, 9, 5)
+    assert parse_date("31 de febrero de 2024") is None
+    assert parse_date("sin fecha") is None
+    assert parse_date(None) is None
+
+
+def test_index_finds_documents_ignoring_punctuation():
+    index = PersonIndex.from_sections(SECTIONS)
+    assert [entry for entry, _ in index.find_by_document("12345678")] == [0, 2]
+    assert index.find_by_document("00000000") == []
+
+
+def test_index_name_lookup_ignores_accents_and_token_order():
+    index = PersonIndex.from_sections(SECTIONS)
+    matches = index.find_by_name("Juan Perez Gomez", min_score=0.8)
+    assert sorted(entry for entry, _ in matches) == [0, 2]
+    assert all(score == 1.0 for _, score in matches)
+    assert index.name_score(0, "JUAN PEREZ GOMEZ") == 1.0
+    assert index.find_by_name("CARLOS TORRES", min_score=0.8) == []
+
+
+def test_index_name_lookup_scores_each_query_token():
+    index = PersonIndex.from_sections([
+        {**SECTIONS[0], "person_by_policy": [_person("PEREZ GOMEZ JUAN CARLOS", "12345678")]},
+    ])
+    # A partial name matches as long as each of its tokens is in the row
+    assert index.find_by_name("JUAN PEREZ", min_score=0.8) == [(0, 1.0)]
+    # A misspelled token still counts, a missing one does not
+    assert index.find_by_name("JUAN PERES", min_score=0.6)
+    assert index.find_by_name("JUAN TORRES", min_score=0.8) == []
+
+
+def test_match_person_by_dni_reports_every_policy():
+    result = match_person(SECTIONS, "12345678", "dni", date(2025, 1, 15), 0.8)
+    assert result["found"] is True
+    assert [match["policy_number"] for match in result["matches"]] == ["SCTR7039077", "MP/2025/00123"]
+    assert [match["coverage_valid"] for match in result["matches"]] == [True, False]
+    assert result["coverage_valid"] is True
+
+
+def test_match_person_outside_validity():
+    result = match_person(SECTIONS, "87654321", "dni", date(2025, 3, 1), 0.8)
+    assert result["found"] is True
+    assert result["coverage_valid"] is False
+
+
+def test_match_person_not_found():
+    result = match_person(SECTIONS, "CARLOS TORRES", "name", date(2025, 1, 15), 0.8)
+    assert result["found"] is False
+    assert result["matches"] == []
+    assert result["coverage_valid"] is False
+
+
+def test_match_person_with_unparseable_dates():
+    sections = [{**SECTIONS[0], "start_date_validity": "ilegible"}]
+    result = match_person(sections, "12345678", "dni", date(2025, 1, 15), 0.8)
+    assert result["matches"][0]["coverage_valid"] is None
+    assert result["coverage_valid"] is None
+
+
+def test_overall_coverage():
+    assert overall_coverage([None, True, False]) is True
+    assert overall_coverage([None, None]) is None
+    assert overall_coverage([None, False]) is False
+    assert overall_coverage([]) is False
@@ -0,0 +1,55 @@
+import pytest
+
+from app.agent.document_chunker import DocumentChunk
+from app.agent.prompt_builder import PromptBuilder, count_tokens
+from app.agent.structured_content import StructuredContentExtractor
+from app.providers.llm_manager import LLMType
+
+HEADER = "| N° | Apellidos y Nombres | DNI |\n|---|---|---|"
+
+
+def _page(title, policy, rows, first=1):
+    lines = [f"{title} 01/01/2025", f"Póliza N°: {policy}", "", HEADER]
+    lines += [f"| {i} | ASEGURADO NUMERO {i} | {10000000 + i} |" for i in range(first, first + rows)]
+    return "\n".join(lines)
+
+
+def test_prompt_builder_rejects_a_budget_without_room_for_the_document():
+    instructions = "Extrae las constancias del documento. " * 20
+    with pytest.raises(ValueError):
+        PromptBuilder(instructions, LLMType.GPT_4O_MINI.value, count_tokens(instructions))
+
+    builder = PromptBuilder(instructions, LLMType.GPT_4O_MINI.value, count_tokens(instructions) + 100)
+    assert builder.text_budget == 100
+    assert builder.fits(100)
+    assert not builder.fits(101)
+
+
+def _extractor(make_settings, max_prompt_tokens):
+    # Only the budget logic is exercised: no LLM clients are built
+    extractor = object.__new__(StructuredContentExtractor)
+    extractor.settings = make_settings(segmentation_max_prompt_tokens=max_prompt_tokens)
+    extractor.llm_type = LLMType.GPT_4O_MINI
+    extractor.prompt_builder = PromptBuilder("", extractor.llm_type.value, max_prompt_tokens)
+    return extractor
+
+
+def test_fit_to_budget_splits_until_every_piece_fits(make_settings):
+    extractor = _extractor(make_settings, max_prompt_tokens=400)
+    chunk = DocumentChunk(pages=[0], texts=[_page("CONSTANCIA", "SCTR1000001", 120)])
+    pieces = extractor._fit_to_budget(chunk, max_chars=chunk.size)
+    assert len(pieces) > 1
+    assert all(extractor.prompt_builder.fits(count_tokens(piece.text)) for piece in pieces)
+
+
+def test_fit_to_budget_keeps_chunks_that_already_fit(make_settings):
+    extractor = _extractor(make_settings, max_prompt_tokens=10_000)
+    chunk = DocumentChunk(pages=[0], texts=[_page("CONSTANCIA", "SCTR1000001", 5)])
+    assert extractor._fit_to_budget(chunk, max_chars=chunk.size) == [chunk]
+
+
+def test_fit_to_budget_refuses_to_split_below_the_minimum(make_settings):
+    extractor = _extractor(make_settings, max_prompt_tokens=20)
+    chunk = DocumentChunk(pages=[0], texts=[_page("CONSTANCIA", "SCTR1000001", 120)])
+    with pytest.raises(ValueError):
+        extractor._fit_to_budget(chunk, max_chars=chunk.size)
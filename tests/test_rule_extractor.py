@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from app.agent.rule_extractor import (
+    RuleBasedExtractor,
+    parse_person_tables,
+    parse_person_tables_with_rows,
+    split_documents,
+)
+
+RIMAC = """CONSTANCIA DE SEGURO SCTR - RIMAC SEGUROS
+Póliza N°: SCTR7039077
+Contratante: CONSTRUCTORA ANDINA SAC
+RUC: 20123456789
+Vigencia: del 01/01/2025 al 31/01/2025
+
+| N° | Apellidos y Nombres | Tipo Doc. | N° Documento | Fecha Inicio |
+|---|---|---|---|---|
+| 1 | PEREZ GOMEZ JUAN | DNI | 12345678 | 01/01/2025 |
+| 2 | ROJAS ANA | DNI | 87654321 | 01/01/2025 |
+"""
+
+# Second page of the same table, without its header
+CONTINUATION = """| 3 | LUNA PEDRO | DNI | 11112222 | 01/01/2025 |
+"""
+
+
+@pytest.fixture
+def extractor(make_settings):
+    return RuleBasedExtractor(settings=make_settings())
+
+
+def test_parse_person_tables():
+    persons = parse_person_tables(RIMAC)
+    assert [person["document_number"] for person in persons] == ["12345678", "87654321"]
+    assert persons[0]["full_name"] == "PEREZ GOMEZ JUAN"
+    assert persons[0]["type_document"] == "DNI"
+    assert persons[0]["coverage_start_date"] == "01/01/2025"
+
+
+def test_headerless_continuation_reuses_columns():
+    persons, rows = parse_person_tables_with_rows(RIMAC + "\n" + CONTINUATION)
+    assert [person["full_name"] for person in persons][-1] == "LUNA PEDRO"
+    assert rows == 3
+
+
+def test_rows_count_unparsed_person_rows():
+    text = RIMAC + "| 3 | TORRES LUIS | DNI | | 01/01/2025 |\n| 4 | VEGA | 99998888 |\n"
+    persons, rows = parse_person_tables_with_rows(text)
+    assert len(persons) == 2
+    assert rows == 4
+
+
+def test_rows_ignore_other_tables():
+    text = "| Concepto | Monto |\n|---|---|\n| Prima | 1500.00 |\n\n" + RIMAC
+    persons, rows = parse_person_tables_with_rows(text)
+    assert (len(persons), rows) == (2, 2)
+
+
+def test_extract_section_complete_layout(extractor):
+    section, confidence = extractor.extract_section(RIMAC)
+    assert confidence == 1.0
+    assert section["insurance_company"] == "Rimac"
+    assert section["policy_number"] == "SCTR7039077"
+    assert section["start_date_validity"] == "01/01/2025"
+    assert section["end_date_validity"] == "31/01/2025"
+    assert section["company"] == "CONSTRUCTORA ANDINA SAC"
+
+
+def test_extract_section_without_ruc_loses_confidence(extractor):
+    _, confidence = extractor.extract_section(RIMAC.replace("RUC: 20123456789\n", ""))
+    assert confidence == 0.9
+
+
+def test_unknown_insurer_layout_has_no_confidence(extractor):
+    text = RIMAC.replace("RIMAC SEGUROS", "ASEGURADORA DESCONOCIDA")
+    section, confidence = extractor.extract_section(text)
+    # Every field is parsed, but there is no known layout to trust them
+    assert section["policy_number"] == "SCTR7039077"
+    assert confidence == 0.0
+
+
+def test_partly_parsed_table_does_not_skip_the_llm(extractor):
+    text = RIMAC + "| 3 | TORRES LUIS | DNI | | 01/01/2025 |\n"
+    section, confidence = extractor.extract_section(text)
+    # Every field is present, but one person row was not parsed
+    assert len(section["person_by_policy"]) == 2
+    assert confidence == 0.0
+
+
+def test_row_completeness_threshold_is_configurable(make_settings):
+    extractor = RuleBasedExtractor(settings=make_settings(rule_extraction_min_row_completeness=0.6))
+    _, confidence = extractor.extract_section(RIMAC + "| 3 | TORRES LUIS | DNI | | 01/01/2025 |\n")
+    assert confidence == 1.0
+
+
+def test_split_documents():
+    second = RIMAC.replace("SCTR7039077", "SCTR7039078")
+    assert len(split_documents([RIMAC, CONTINUATION, second])) == 2
+
+
+def test_extract_and_route(extractor):
+    update = asyncio.run(extractor.extract({"extracted_pages": [RIMAC], "extracted_text": RIMAC}))
+    assert update["rule_confidence"] == 1.0
+    assert len(update["segmented_sections"]["content"]) == 1
+    assert extractor.route(update) == "match_person"
+
+    partial = RIMAC + "| 3 | TORRES LUIS | DNI | | 01/01/2025 |\n"
+    update = asyncio.run(extractor.extract({"extracted_pages": [partial], "extracted_text": partial}))
+    assert "segmented_sections" not in update
+    assert extractor.route(update) == "structure_content"
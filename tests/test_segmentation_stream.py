@@ -0,0 +1,29 @@
+import pytest
+
+from app.agent.structured_content import StructuredContentExtractor
+
+
+def _extractor(make_settings, mode):
+    # Only the streaming decision is exercised: no LLM clients are built
+    extractor = object.__new__(StructuredContentExtractor)
+    extractor.settings = make_settings(segmentation_streaming=mode)
+    return extractor
+
+
+@pytest.mark.parametrize(
+    "mode, stream_progress, streamed",
+    [
+        ("auto", True, True),
+        ("auto", False, False),
+        ("always", False, True),
+        ("never", True, False),
+    ],
+)
+def test_stream_for_follows_the_mode_and_the_state_flag(make_settings, mode, stream_progress, streamed):
+    extractor = _extractor(make_settings, mode)
+    state = {"person_name": "12345678", "user_date": "15/03/2024", "stream_progress": stream_progress}
+    assert (extractor._stream_for(state, writer=None) is not None) == streamed
+
+
+def test_auto_mode_without_the_flag_does_not_stream(make_settings):
+    assert _extractor(make_settings, "auto")._stream_for({"person_name": "12345678"}, writer=None) is None
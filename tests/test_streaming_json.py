@@ -0,0 +1,72 @@
+import json
+
+from app.agent.streaming_json import JSONStreamParser
+
+DOCUMENT = {
+    "content": [
+        {
+            "policy_number": "SCTR7039077",
+            "company": "ANDINA \"LOS \\\\ ANDES\" SAC",
+            "person_by_policy": [
+                {"full_name": "PEREZ JUAN", "document_number": "12345678"},
+                {"full_name": "ROJAS ANA", "document_number": "87654321"},
+            ],
+            "signatories": [],
+        },
+    ],
+}
+
+
+def _collect(fragments):
+    values = []
+    parser = JSONStreamParser(lambda path, value: values.append((path, value)))
+    for fragment in fragments:
+        parser.feed(fragment)
+    return values, parser
+
+
+def test_reports_completed_values_with_their_paths():
+    values, parser = _collect([json.dumps(DOCUMENT)])
+    paths = dict(values)
+    assert paths[("content", 0, "policy_number")] == "SCTR7039077"
+    assert paths[("content", 0, "person_by_policy", 1)] == DOCUMENT["content"][0]["person_by_policy"][1]
+    assert paths[("content", 0)] == DOCUMENT["content"][0]
+    assert paths[()] == DOCUMENT
+    assert parser.text == json.dumps(DOCUMENT)
+
+
+def test_keys_are_not_reported_as_values():
+    values, _ = _collect([json.dumps({"a": "b"})])
+    assert values == [(("a",), "b"), ((), {"a": "b"})]
+
+
+def test_fragment_boundaries_do_not_change_the_result():
+    text = json.dumps(DOCUMENT, indent=2)
+    whole, _ = _collect([text])
+    by_character, _ = _collect(list(text))
+    by_three, _ = _collect([text[i:i + 3] for i in range(0, len(text), 3)])
+    assert by_character == whole
+    assert by_three == whole
+
+
+def test_escaped_quotes_and_backslashes():
+    values, _ = _collect(list(json.dumps(DOCUMENT)))
+    assert dict(values)[("content", 0, "company")] == DOCUMENT["content"][0]["company"]
+
+
+def test_rows_are_reported_before_the_document_closes():
+    text = json.dumps(DOCUMENT)
+    cut = text.index("ROJAS")
+    values, parser = _collect([text[:cut]])
+    assert (("content", 0, "person_by_policy", 0), DOCUMENT["content"][0]["person_by_policy"][0]) in values
+    assert not any(path == ("content", 0, "person_by_policy", 1) for path, _ in values)
+
+    parser.feed(text[cut:])
+    assert (("content", 0, "person_by_policy", 1), DOCUMENT["content"][0]["person_by_policy"][1]) in values
+
+
+def test_array_indexes_skip_empty_arrays_and_whitespace():
+    values, _ = _collect([' { "rows" : [ ] , "names" : [ "a" ,\n "b" ] } '])
+    assert (("rows",), []) in values
+    assert (("names", 0), "a") in values
+    assert (("names", 1), "b") in values